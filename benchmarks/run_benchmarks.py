@@ -0,0 +1,272 @@
+'''
+Docstring for run_benchmarks
+
+Standalone benchmark harness for every solver mode on Kuhn and Leduc. It measures:
+
+    - throughput: training iterations per second
+    - exploitability: latency of one calculate_exploitability() call
+    - time to epsilon: training wall clock time (exploitability checks excluded) until the
+      exploitability first drops below each threshold, null if the time budget runs out first
+    - peak memory: peak traced allocation (tracemalloc) while building the agent and training
+
+Results are written as one JSON document so runs can be compared between commits:
+
+    python benchmarks/run_benchmarks.py --output bench.json
+    python benchmarks/run_benchmarks.py --quick --solvers leduc/vector
+
+The Leduc solvers can be run on any game of the Leduc family to see how they scale:
+
+    python benchmarks/run_benchmarks.py --solvers leduc/vector --ranks 13 --suits 4 --rounds 3
+
+regret based pruning (CFR_agent.enable_pruning) against the same agent without it:
+
+    python benchmarks/run_benchmarks.py --solvers leduc/cfr leduc/cfr-pruned --variants vanilla-alternating
+
+and in an abstraction of it (see leduc.abstraction), exploitability is still measured in the real game:
+
+    python benchmarks/run_benchmarks.py --solvers leduc/vector --ranks 13 --suits 4 --card-buckets 6 --betting-abstraction
+'''
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+import numpy as np
+
+from cfr.variants import VanillaCFR, CFRPlus, DiscountedCFR, LinearCFR
+from kuhn.CFR import CFR_agent as KuhnCFR_agent
+from leduc.CFR import CFR_agent as LeducCFR_agent
+from leduc.vector_CFR import VectorCFR_agent
+from leduc.MCCFR import MCCFR_agent
+from leduc.leduc import leduc
+from leduc.abstraction import Abstraction
+
+VARIANTS = {
+    'vanilla': VanillaCFR,
+    'vanilla-alternating': lambda: VanillaCFR(alternating=True),
+    'cfr+': CFRPlus,
+    'dcfr': DiscountedCFR,
+    'lcfr': LinearCFR,
+}
+
+
+def pruned(agent):
+    '''
+    The agent with regret based pruning switched on
+    '''
+    agent.enable_pruning()
+
+    return agent
+
+
+#Agent constructors by solver name, every one takes the variant and the Leduc agents' game and abstraction
+SOLVERS = {
+    'kuhn/cfr': lambda variant, leduc_kwargs: KuhnCFR_agent(0, False, False, variant=variant),
+    'leduc/cfr': lambda variant, leduc_kwargs: LeducCFR_agent(0, False, False, variant=variant, **leduc_kwargs),
+    'leduc/cfr-pruned': lambda variant, leduc_kwargs: pruned(LeducCFR_agent(0, False, False, variant=variant, **leduc_kwargs)),
+    'leduc/vector': lambda variant, leduc_kwargs: VectorCFR_agent(0, False, False, variant=variant, **leduc_kwargs),
+    'leduc/mccfr-external': lambda variant, leduc_kwargs: MCCFR_agent(0, False, False, variant=variant, sampling='external', seed=0, **leduc_kwargs),
+    'leduc/mccfr-outcome': lambda variant, leduc_kwargs: MCCFR_agent(0, False, False, variant=variant, sampling='outcome', seed=0, **leduc_kwargs),
+}
+
+#Exploitability thresholds of the time to epsilon runs, per game
+THRESHOLDS = {
+    'kuhn': [0.1, 0.05, 0.01],
+    'leduc': [0.5, 0.1, 0.05, 0.01],
+}
+
+THROUGHPUT_SECONDS = 2.0 #Training time per throughput measurement
+EPSILON_SECONDS = 30.0 #Training time budget per time to epsilon run
+EPSILON_CHECKS = 200 #Exploitability checks per time to epsilon budget, spread evenly over the iterations
+LATENCY_REPEATS = 50 #calculate_exploitability() calls per latency measurement
+MEMORY_ITERATIONS = 100 #Training iterations traced for peak memory
+
+
+def throughput(make_agent, seconds):
+
+    agent = make_agent()
+    agent.rng.seed(0)
+
+    iterations = 0
+    start = time.perf_counter()
+
+    while time.perf_counter() - start < seconds:
+        agent.iteration()
+        iterations += 1
+
+    elapsed = time.perf_counter() - start
+
+    return {'iterations': iterations, 'seconds': elapsed, 'iterations_per_second': iterations / elapsed}
+
+
+def exploitability_latency(make_agent, repeats):
+
+    agent = make_agent()
+    agent.rng.seed(0)
+
+    for _ in range(10):
+        agent.iteration()
+
+    timings = []
+
+    for _ in range(repeats):
+
+        #Touch every row so each call includes renormalizing the average strategy
+        agent.table.touch(slice(None))
+
+        start = time.perf_counter()
+        agent.calculate_exploitability()
+        timings.append(time.perf_counter() - start)
+
+    return {'median_seconds': float(np.median(timings)), 'min_seconds': float(np.min(timings))}
+
+
+def time_to_epsilon(make_agent, thresholds, seconds, iterations_per_second):
+
+    agent = make_agent()
+    agent.rng.seed(0)
+
+    check_every = max(1, int(iterations_per_second * seconds / EPSILON_CHECKS))
+    remaining = sorted(thresholds, reverse=True)
+    reached = {str(threshold): None for threshold in thresholds}
+
+    training = 0.0
+    exploitability = agent.calculate_exploitability()
+
+    while remaining and training < seconds:
+
+        start = time.perf_counter()
+
+        for _ in range(check_every):
+            agent.iteration()
+
+        training += time.perf_counter() - start
+        exploitability = agent.calculate_exploitability()
+
+        while remaining and exploitability < remaining[0]:
+
+            reached[str(remaining.pop(0))] = {'seconds': training, 'iterations': agent.iteration_count}
+
+    return {'thresholds': reached, 'final_exploitability': exploitability, 'iterations': agent.iteration_count}
+
+
+def peak_memory(make_agent, iterations):
+
+    tracemalloc.start()
+
+    agent = make_agent()
+    agent.rng.seed(0)
+
+    for _ in range(iterations):
+        agent.iteration()
+
+    agent.calculate_exploitability()
+
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {'peak_bytes': peak, 'table_bytes': agent.table.nbytes, 'infostates': len(agent.table.keys)}
+
+
+def git_commit():
+
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(solvers, variants, quick=False, game=None, abstraction=None):
+    '''
+    Runs every benchmark for every (solver, variant) pair
+
+    :param solvers: solver names from SOLVERS
+    :param variants: variant names from VARIANTS
+    :param quick: divide every time budget by 10
+    :param game: Leduc family game of the leduc solvers, standard Leduc if None
+    :param abstraction: abstraction the leduc solvers train in, None for the real game
+    :return: JSON serializable results
+    :rtype: dict
+    '''
+    scale = 0.1 if quick else 1.0
+    game = game if game is not None else leduc()
+    leduc_kwargs = {'game': game, 'abstraction': abstraction}
+
+    results = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'quick': quick,
+        'leduc_game': {name: list(value) if isinstance(value, tuple) else value for name, value in game.parameters().items()},
+        'abstraction': repr(abstraction) if abstraction is not None else None,
+        'modes': [],
+    }
+
+    for solver in solvers:
+        for variant in variants:
+
+            make_agent = lambda: SOLVERS[solver](VARIANTS[variant](), leduc_kwargs)
+            game_name = solver.split('/')[0]
+
+            print(f"{solver} ({variant})...", file=sys.stderr)
+
+            speed = throughput(make_agent, THROUGHPUT_SECONDS * scale)
+
+            results['modes'].append({
+                'solver': solver,
+                'variant': variant,
+                'throughput': speed,
+                'exploitability_latency': exploitability_latency(make_agent, max(1, int(LATENCY_REPEATS * scale))),
+                'time_to_epsilon': time_to_epsilon(make_agent, THRESHOLDS[game_name], EPSILON_SECONDS * scale,
+                                                   speed['iterations_per_second']),
+                'memory': peak_memory(make_agent, max(1, int(MEMORY_ITERATIONS * scale))),
+            })
+
+    return results
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description="Benchmark every CFR solver mode, results are printed as JSON")
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    parser.add_argument('--solvers', nargs='+', default=list(SOLVERS), choices=list(SOLVERS))
+    parser.add_argument('--variants', nargs='+', default=list(VARIANTS), choices=list(VARIANTS))
+    parser.add_argument('--quick', action='store_true', help="10x shorter time budgets, for smoke runs")
+    parser.add_argument('--ranks', type=int, default=3, help="card ranks of the Leduc family game")
+    parser.add_argument('--suits', type=int, default=2, help="suits of the Leduc family game")
+    parser.add_argument('--rounds', type=int, default=2, help="betting rounds of the Leduc family game")
+    parser.add_argument('--bet-sizes', type=int, nargs='+', help="raise size of every round, default 1 then 2")
+    parser.add_argument('--raise-cap', type=int, default=2, help="raises per round of the Leduc family game")
+    parser.add_argument('--antes', type=int, nargs=2, default=[1, 1], help="player 1 and player 2 antes")
+    parser.add_argument('--card-buckets', type=int, help="train the leduc solvers with this many hand strength buckets")
+    parser.add_argument('--betting-abstraction', action='store_true', help="merge histories with the same betting situation")
+    args = parser.parse_args()
+
+    game = leduc(ranks=args.ranks, suits=args.suits, rounds=args.rounds, bet_sizes=args.bet_sizes,
+                 raise_cap=args.raise_cap, antes=args.antes)
+
+    abstraction = None
+
+    if args.card_buckets is not None or args.betting_abstraction:
+        abstraction = Abstraction(card_buckets=args.card_buckets, betting=args.betting_abstraction)
+
+    results = json.dumps(run(args.solvers, args.variants, quick=args.quick, game=game, abstraction=abstraction), indent=2)
+
+    if args.output is None:
+        print(results)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(results + '\n')
+
+
+if __name__ == "__main__":
+    main()
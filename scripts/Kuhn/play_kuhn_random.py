@@ -3,21 +3,33 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
 
 from kuhn.kuhn import KuhnPoker
+from cfr.encoding import InfostateEncoder
+from cfr.policy import Policy
+import numpy as np
 import random
 
+POLICY_FILE = None #Policy file exported by a trained Kuhn agent (agent.export_policy), None for a random bot
+
 def play_vs_random():
 
   game = KuhnPoker()
 
+  # The bot is player 1 (seat 0), you are player 2
   cards = random.sample(game.cards, 2)
 
+  if POLICY_FILE is not None:
+    policy = Policy.from_file(POLICY_FILE)
+    histories = game.getHistories()
+    encoder = InfostateEncoder(len(histories), len(game.cards))
+    rng = np.random.default_rng()
+
   history = ''
 
   print('-----------KUHN POKER-----------')
-  print(f'Your card is : {cards[0]}')
+  print(f'Your card is : {cards[1]}')
+
+  while not game.game_finished(history):
 
-  while not game.isGameFinished(history):
-    
     player_turn = game.getPlayerToAct(history)
 
     if player_turn == 1:
@@ -34,15 +46,17 @@ def play_vs_random():
 
     else :
 
-      bot_action = random.choice(game.actions)
+      if POLICY_FILE is not None:
+        infostate = encoder.encode(0, cards[0], histories.index(history))
+        bot_action = game.actions[policy.sample([infostate], rng)[0]]
+      else:
+        bot_action = random.choice(game.actions)
 
       print(f"The bot chose {bot_action}!")
 
       history += bot_action
 
-  print(f"Game finished! you had {cards[0]} while the bot had {cards[1]}. Your payout is {game.getPayouts(history, cards)}")
+  print(f"Game finished! you had {cards[1]} while the bot had {cards[0]}. Your payout is {-game.getPayouts(history, cards)}")
   print('--------------------------------')
 
 play_vs_random()
-
-
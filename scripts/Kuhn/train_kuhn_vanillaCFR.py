@@ -3,19 +3,27 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
 
 from kuhn.CFR import CFR_agent
+from cfr.variants import VanillaCFR, CFRPlus, DiscountedCFR, LinearCFR
 
 ITERATIONS = 250000 #Iterations used in training
 PLOT_STRATEGY = False #Plot the final (best) strategy over iterations
 PLOT_EXPLOITABILITY = True
+VARIANT = VanillaCFR() #Regret update rule: VanillaCFR(), CFRPlus(), DiscountedCFR(alpha, beta, gamma) or LinearCFR()
 
-def print_infostate(infostate):
+def infostate_fields(infostate, agent):
+
+    player, card, public_card, node = agent.encoder.decode(infostate)
+
+    return player, card, agent.histories[node]
+
+def print_infostate(infostate, agent):
 
     cards = ['Jack', 'Queen', 'King']
 
-    player = int(infostate[0]) + 1
-    card = cards[int(infostate[1])]
+    player, card, history = infostate_fields(infostate, agent)
+    card = cards[card]
 
-    print(f"{card}:  Action is: {infostate[2:] if infostate[2:] != '' else '(ROOT)'}")
+    print(f"{card}:  Action is: {history if history != '' else '(ROOT)'}")
 
 def print_strategy(infostate, agent):
 
@@ -42,7 +50,7 @@ def main():
     
     # Initializing Kuhn Poker CFR agent
 
-    agent = CFR_agent(ITERATIONS, PLOT_STRATEGY, PLOT_EXPLOITABILITY)
+    agent = CFR_agent(ITERATIONS, PLOT_STRATEGY, PLOT_EXPLOITABILITY, variant=VARIANT)
 
     # Train agent
 
@@ -54,7 +62,7 @@ def main():
 
     for infostate in agent.infostate_map:
 
-        if infostate[0] == '0':
+        if infostate_fields(infostate, agent)[0] == 0:
 
             p1_infostates.append(infostate)
         
@@ -68,15 +76,15 @@ def main():
         print_exploitability(agent)
 
     print("----------- PLAYER 1 STRATEGIES -----------")
-    p1_infostates.sort()
+    p1_infostates.sort(key=lambda infostate: infostate_fields(infostate, agent)[1:])
     for infostate in p1_infostates: 
-        print_infostate(infostate)
+        print_infostate(infostate, agent)
         print_strategy(infostate,agent)
     
     print("----------- PLAYER 2 STRATEGIES -----------")
-    p2_infostates.sort()
+    p2_infostates.sort(key=lambda infostate: infostate_fields(infostate, agent)[1:])
     for infostate in p2_infostates: 
-        print_infostate(infostate)
+        print_infostate(infostate, agent)
         print_strategy(infostate,agent)
 
 if __name__ == "__main__":
@@ -0,0 +1,67 @@
+import sys
+import os
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from leduc.CFR import CFR_agent
+from leduc.MCCFR import MCCFR_agent
+from cfr.parallel import SharedMemoryCFR
+
+SECONDS = 30 #Wall clock budget of every run
+CHUNK = 500 #Iterations (per worker) between two exploitability checks
+NUM_WORKERS = os.cpu_count() #Worker processes of the shared memory runs
+
+def single_process(agent):
+
+    start = time.time()
+    curve = []
+
+    while time.time() - start < SECONDS:
+
+        for _ in range(CHUNK):
+            agent.iteration()
+
+        curve.append((time.time() - start, agent.iteration_count, agent.calculate_exploitability()))
+
+    return curve
+
+def shared_memory(agent):
+
+    trainer = SharedMemoryCFR(agent, NUM_WORKERS)
+
+    start = time.time()
+    curve = []
+
+    while time.time() - start < SECONDS:
+
+        trainer.run(CHUNK)
+
+        #Exploitability is read from the shared tables while the workers are idle
+        curve.append((time.time() - start, agent.iteration_count * NUM_WORKERS, agent.calculate_exploitability()))
+
+    trainer.close()
+
+    return curve
+
+def print_curve(name, curve):
+
+    print(f"----------- {name} -----------")
+    print(f"{'seconds':>8} {'deals':>10} {'exploitability':>15}")
+
+    for seconds, deals, exploitability in curve:
+        print(f"{seconds:8.2f} {deals:10d} {exploitability:15.5f}")
+
+    seconds, deals, exploitability = curve[-1]
+    print(f"{deals / seconds:.0f} deals per second, final exploitability {exploitability:.5f}")
+
+def main():
+
+    print(f"Convergence per wall clock second, {SECONDS} seconds per run, {NUM_WORKERS} shared memory workers")
+
+    print_curve("CFR_agent, single process", single_process(CFR_agent(0, False, False)))
+    print_curve(f"CFR_agent, shared memory x{NUM_WORKERS}", shared_memory(CFR_agent(0, False, False)))
+    print_curve("MCCFR_agent (external), single process", single_process(MCCFR_agent(0, False, False, seed=0)))
+    print_curve(f"MCCFR_agent (external), shared memory x{NUM_WORKERS}", shared_memory(MCCFR_agent(0, False, False, seed=0)))
+
+if __name__ == "__main__":
+    main()
@@ -3,34 +3,55 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
 
 from leduc.CFR import CFR_agent
+from leduc.vector_CFR import VectorCFR_agent
+from leduc.MCCFR import MCCFR_agent
+from leduc.leduc import leduc
+from leduc.abstraction import Abstraction
+from leduc.nodes import Node
+from cfr.tables import InfostateMap
+from cfr.variants import VanillaCFR, CFRPlus, DiscountedCFR, LinearCFR
 
 ITERATIONS = 100000#Iterations used in training
+GAME = leduc() #Game of the Leduc family, e.g. leduc(ranks=13, suits=4, rounds=3, raise_cap=3)
+ABSTRACTION = None #Train in an abstract game, e.g. Abstraction(card_buckets=6, betting=True), the strategy is printed for the real game
 PLOT_STRATEGY = False #Plot the final (best) strategy over iterations
 PLOT_EXPLOITABILITY = True
+VARIANT = VanillaCFR() #Regret update rule: VanillaCFR(alternating=False), CFRPlus(), DiscountedCFR(alpha, beta, gamma) or LinearCFR()
+VECTOR_CFR = False #Full width vector CFR over every deal instead of one sampled deal per iteration
+MCCFR_SAMPLING = None #'external' or 'outcome' to train with Monte Carlo CFR instead
+PRUNING = False #Regret based pruning for the chance sampled CFR agent, use it with VanillaCFR(alternating=True), see CFR_agent.enable_pruning
+NUM_WORKERS = None #Number of processes for parallel training of the sampled agents (vanilla CFR only)
+CHECKPOINT = None #Path of a .npz checkpoint, saved during training and resumed from if it exists
+POLICY_FILE = None #Path to export the trained final strategy to, see cfr.policy_file
+METRICS = None #Path of a .csv or .jsonl file the exploitability series is streamed to while training
+INSTRUMENTATION = None #Path of a JSON lines file for node visit counters and phase timers, see cfr.instrumentation
 
-def print_infostate(infostate):
+def infostate_fields(infostate, agent):
 
-    cards = ['Jack', 'Queen', 'King']
+    player, card, public_card, node = agent.encoder.decode(infostate)
 
-    player = int(infostate[0]) + 1
-    card = cards[int(infostate[1])]
-    public_card = ''
+    return player, card, public_card, agent.tree.histories[node]
 
-    if len(infostate) == 2:
-        print(f"{card}:  Action is: (ROOT)")
-    elif infostate[2] not in ['f','p', 'c', 'r']:
-        public_card = cards[int(infostate[2])]
-        print(f"{card}:  Public card: {public_card}, Action is: {infostate[3:] if infostate[3:] != '' else '(ROOT)'}")
+def print_infostate(infostate, agent):
+
+    cards = ['Jack', 'Queen', 'King'] if agent.game.ranks == 3 else [f"Rank {rank}" for rank in range(agent.game.ranks)]
+
+    player, card, public_card, history = infostate_fields(infostate, agent)
+    card = cards[card]
+
+    if public_card >= 0:
+        public_card = cards[public_card]
+        print(f"{card}:  Public card: {public_card}, Action is: {history}")
     else:
-        print(f"{card}:  Action is: {infostate[2:] if infostate[2:] != '' else '(ROOT)'}")
+        print(f"{card}:  Action is: {history if history != '' else '(ROOT)'}")
 
-def print_strategy(infostate, agent):
+def print_strategy(infostate, infostate_map):
 
     probabilities = "Probabilities: "
 
-    for action in agent.infostate_map[infostate].actions:
+    for action in infostate_map[infostate].actions:
         
-        probabilities += f"{action} : {round(agent.infostate_map[infostate].final_strategy[action], 2)}, " 
+        probabilities += f"{action} : {round(infostate_map[infostate].final_strategy[action], 2)}, " 
         
     print(probabilities)
 
@@ -38,19 +59,40 @@ def main():
     
     # Initializing Kuhn Poker CFR agent
 
-    agent = CFR_agent(ITERATIONS, PLOT_STRATEGY, PLOT_EXPLOITABILITY)
+    if MCCFR_SAMPLING is not None:
+        agent = MCCFR_agent(ITERATIONS, PLOT_STRATEGY, PLOT_EXPLOITABILITY, variant=VARIANT, sampling=MCCFR_SAMPLING, game=GAME, abstraction=ABSTRACTION)
+    elif VECTOR_CFR:
+        agent = VectorCFR_agent(ITERATIONS, PLOT_STRATEGY, PLOT_EXPLOITABILITY, variant=VARIANT, game=GAME, abstraction=ABSTRACTION)
+    else:
+        agent = CFR_agent(ITERATIONS, PLOT_STRATEGY, PLOT_EXPLOITABILITY, variant=VARIANT, game=GAME, abstraction=ABSTRACTION)
+
+    if INSTRUMENTATION is not None:
+        agent.instrument(INSTRUMENTATION)
+
+    if PRUNING:
+        agent.enable_pruning()
+
+    if CHECKPOINT is not None and os.path.exists(CHECKPOINT):
+        agent.resume(CHECKPOINT)
+        print(f"Resuming from {CHECKPOINT} at iteration {agent.iteration_count}")
 
     # Train agent
 
-    agent.train()
+    agent.train(num_workers=NUM_WORKERS, checkpoint_path=CHECKPOINT, metrics_path=METRICS)
     agent.calculate_final_strategy()
 
+    if POLICY_FILE is not None:
+        agent.export_policy(POLICY_FILE)
+
+    #Strategies of the real game, expanded from the abstract rows if the agent trained in an abstraction
+    infostate_map = InfostateMap(agent.policy_table(), Node)
+
     p1_infostates = []
     p2_infostates = []
 
-    for infostate in agent.infostate_map:
+    for infostate in infostate_map:
 
-        if infostate[0] == '0':
+        if infostate_fields(infostate, agent)[0] == 0:
 
             p1_infostates.append(infostate)
         
@@ -61,16 +103,16 @@ def main():
     print("-----------  GENERAL STATISTICS -----------")
     print(f"Final Exploitability: {agent.exploitability[-1]}")
     print("----------- PLAYER 1 STRATEGIES -----------")
-    p1_infostates.sort()
+    p1_infostates.sort(key=lambda infostate: infostate_fields(infostate, agent)[1:])
     for infostate in p1_infostates: 
-        print_infostate(infostate)
-        print_strategy(infostate,agent)
+        print_infostate(infostate, agent)
+        print_strategy(infostate, infostate_map)
     
     print("----------- PLAYER 2 STRATEGIES -----------")
-    p2_infostates.sort()
+    p2_infostates.sort(key=lambda infostate: infostate_fields(infostate, agent)[1:])
     for infostate in p2_infostates: 
-        print_infostate(infostate)
-        print_strategy(infostate,agent)
+        print_infostate(infostate, agent)
+        print_strategy(infostate, infostate_map)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,16 @@
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from cfr.plotting import plot_metrics
+
+#Plots the exploitability series of metrics files written by train(metrics_path=...)
+#usage: python scripts/plot_metrics.py run.csv [other_run.jsonl ...]
+
+def main():
+
+    for path in sys.argv[1:]:
+        plot_metrics(path)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+'''
+Docstring for cfr.checkpoint
+
+This file saves and restores the training state of a CFR agent as a single .npz file:
+
+    - keys: the table's infostate keys, checked on load so a checkpoint only resumes the same game
+    - description: the game, its parameters, the abstraction and the CFR variant as JSON, also
+      checked on load, since games with different rules (bet sizes, antes), abstractions or
+      variants can share their infostates
+    - regret_sum, strategy_sum: the table arrays
+    - iteration_count
+    - rng_state: the agent's random.Random state as (version, internal state, gauss_next)
+    - worker_seeds: the parallel workers' SeedSequence (see cfr.parallel) as JSON, if it was used
+    - pruning: the regret based pruning settings, windows and node counts (see
+      CFR_agent.enable_pruning), if pruning is on. The skipped visits are replayed before saving,
+      and a checkpoint only resumes into an agent that prunes exactly when the checkpoint does
+    - exploitability, exploitability_iterations: the measured series so far
+
+Checkpoints are written to a temporary file next to the target and renamed over it, so a run that
+dies mid write leaves the previous checkpoint intact.
+'''
+
+import json
+import os
+
+import numpy as np
+
+
+def _description(agent):
+    '''
+    Game and CFR variant the agent trains, as a JSON string
+    '''
+    game = agent.game
+    variant = agent.variant
+
+    description = {
+        'game': type(game).__name__,
+        'parameters': game.parameters() if hasattr(game, 'parameters') else {},
+        'variant': type(variant).__name__,
+        'variant_parameters': vars(variant),
+    }
+
+    #Abstract tables of different abstractions can share their keys
+    abstraction = getattr(agent, 'abstraction', None)
+
+    if abstraction is not None:
+        description['abstraction'] = repr(abstraction)
+
+    return json.dumps(description, sort_keys=True)
+
+
+def _pruning(agent):
+    '''
+    Whether the agent prunes, agents without pruning support never do
+    '''
+    return getattr(agent, '_prune_windows', None) is not None
+
+
+def save_checkpoint(agent, path):
+    '''
+    Writes the agent's training state to path atomically
+
+    :param agent: a Kuhn or Leduc agent
+    :param path: checkpoint file, conventionally ending in .npz
+    '''
+    version, internal, gauss_next = agent.rng.getstate()
+
+    state = {
+        'keys': np.array(agent.table.keys, dtype=np.int64),
+        'description': np.array(_description(agent)),
+        'regret_sum': agent.table.regret_sum,
+        'strategy_sum': agent.table.strategy_sum,
+        'iteration_count': np.int64(agent.iteration_count),
+        'rng_version': np.int64(version),
+        'rng_internal': np.array(internal, dtype=np.int64),
+        'rng_gauss_next': np.float64(np.nan if gauss_next is None else gauss_next),
+        'exploitability': np.array(agent.exploitability, dtype=np.float64),
+        'exploitability_iterations': np.array(agent.exploitability_iterations, dtype=np.int64),
+    }
+
+    seeds = agent.worker_seeds
+
+    if seeds is not None:
+        state['worker_seeds'] = np.array(json.dumps([seeds.entropy, list(seeds.spawn_key), seeds.n_children_spawned]))
+
+    if _pruning(agent):
+        state['pruning'] = np.array([agent._prune_threshold, agent._prune_full_every, agent.nodes_pruned, agent.nodes_total], dtype=np.float64)
+        state['prune_windows'] = np.array(agent._prune_windows, dtype=np.float64)
+
+    temporary = f"{path}.tmp"
+
+    with open(temporary, 'wb') as f:
+        np.savez(f, **state)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(temporary, path)
+
+
+def load_checkpoint(agent, path):
+    '''
+    Restores the training state written by save_checkpoint into the agent
+
+    :param agent: an agent of the same game the checkpoint was written from
+    :param path: checkpoint file
+    '''
+    with np.load(path) as state:
+
+        if not np.array_equal(state['keys'], agent.table.keys):
+            raise ValueError(f"{path} holds the infostates of a different game")
+
+        description = _description(agent)
+
+        if 'description' not in state.files or str(state['description']) != description:
+            saved = str(state['description']) if 'description' in state.files else 'an unknown game'
+            raise ValueError(f"{path} was written for {saved}, not {description}")
+
+        #The pruning windows depend on the regrets, they can not be rebuilt or dropped on resume
+        if 'pruning' in state.files and not _pruning(agent):
+            raise ValueError(f"{path} was written with regret based pruning, call enable_pruning() before resuming")
+
+        if 'pruning' not in state.files and _pruning(agent):
+            raise ValueError(f"{path} was written without regret based pruning, call enable_pruning() after resuming")
+
+        agent.table.regret_sum[:] = state['regret_sum']
+        agent.table.strategy_sum[:] = state['strategy_sum']
+        agent.table.touch(slice(None))
+        agent.iteration_count = int(state['iteration_count'])
+
+        gauss_next = float(state['rng_gauss_next'])
+        agent.rng.setstate((
+            int(state['rng_version']),
+            tuple(state['rng_internal'].tolist()),
+            None if np.isnan(gauss_next) else gauss_next,
+        ))
+
+        agent.worker_seeds = None
+
+        if 'worker_seeds' in state.files:
+            entropy, spawn_key, n_children_spawned = json.loads(str(state['worker_seeds']))
+            agent.worker_seeds = np.random.SeedSequence(entropy, spawn_key=spawn_key, n_children_spawned=n_children_spawned)
+
+        if 'pruning' in state.files:
+            threshold, full_every, nodes_pruned, nodes_total = state['pruning'].tolist()
+            agent._prune_threshold, agent._prune_full_every = threshold, int(full_every)
+            agent.nodes_pruned, agent.nodes_total = int(nodes_pruned), int(nodes_total)
+            agent._prune_windows = state['prune_windows'].tolist()
+            agent._missed = {}
+
+        agent.exploitability = state['exploitability'].tolist()
+        agent.exploitability_iterations = state['exploitability_iterations'].tolist()
@@ -0,0 +1,83 @@
+'''
+Docstring for cfr.encoding
+
+This file contains the integer infostate encoding shared by training, best response,
+serialization and the printing scripts.
+
+An infostate is (player, private card, public card, history node). The public card is optional:
+-1 means it has not been dealt (every Kuhn infostate, Leduc round 1). The four fields are packed
+in mixed radix, player fastest:
+
+    key = ((node * (num_public_cards + 1) + public_card + 1) * num_cards + card) * 2 + player
+
+so every key is a unique non-negative int below num_nodes * (num_public_cards + 1) * num_cards * 2
+and decode(encode(...)) returns the original fields.
+'''
+
+import numpy as np
+
+
+class InfostateEncoder():
+
+    def __init__(self, num_nodes, num_cards, num_public_cards=0):
+        '''
+        :param num_nodes: number of history nodes in the game tree
+        :param num_cards: number of distinct private cards (ranks)
+        :param num_public_cards: number of distinct public cards, 0 for games without one
+        '''
+        self.num_nodes = num_nodes
+        self.num_cards = num_cards
+        self.num_public_cards = num_public_cards
+
+        self.size = num_nodes * (num_public_cards + 1) * num_cards * 2
+
+    def encode(self, player, card, node, public_card=-1):
+        '''
+        Packs an infostate into one int
+
+        :param player: player to act, 0 or 1
+        :param card: private card of the player to act
+        :param node: history node id
+        :param public_card: public card, -1 if none has been dealt
+        :return: infostate key
+        :rtype: Int
+        '''
+        return ((node * (self.num_public_cards + 1) + public_card + 1) * self.num_cards + card) * 2 + player
+
+    def decode(self, key):
+        '''
+        Unpacks an infostate key
+
+        :param key: infostate key from encode
+        :return: (player, card, public card, node), public card is -1 if none has been dealt
+        :rtype: tuple
+        '''
+        key, player = divmod(key, 2)
+        key, card = divmod(key, self.num_cards)
+        node, public_card = divmod(key, self.num_public_cards + 1)
+
+        return player, card, public_card - 1, node
+
+    def encode_many(self, player, card, node, public_card=-1):
+        '''
+        Vectorized encode over arrays of fields, broadcasting like NumPy arithmetic
+
+        :return: int64 array of infostate keys
+        :rtype: numpy array
+        '''
+        node = np.asarray(node, dtype=np.int64)
+
+        return ((node * (self.num_public_cards + 1) + np.asarray(public_card) + 1) * self.num_cards + card) * 2 + player
+
+    def decode_many(self, keys):
+        '''
+        Vectorized decode of an array of infostate keys
+
+        :return: (player, card, public card, node) int64 arrays
+        :rtype: tuple
+        '''
+        keys, player = np.divmod(np.asarray(keys, dtype=np.int64), 2)
+        keys, card = np.divmod(keys, self.num_cards)
+        node, public_card = np.divmod(keys, self.num_public_cards + 1)
+
+        return player, card, public_card - 1, node
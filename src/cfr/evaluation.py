@@ -0,0 +1,100 @@
+'''
+Docstring for cfr.evaluation
+
+This file runs exploitability checks in a background process while training continues.
+
+Training only pays for a copy of the average strategy. The copy is sent to a process pool worker
+that keeps one evaluation agent of the same class per process: the snapshot is loaded into that
+agent's table as its strategy sums (a normalized strategy is a valid strategy sum) and the agent's
+own calculate_exploitability does the rest, so every game and solver is evaluated the same way
+as in the blocking path.
+'''
+
+from concurrent.futures import ProcessPoolExecutor
+
+#Evaluation agents of the current worker process, by agent class and constructor arguments
+_agents = {}
+
+
+def snapshot_exploitability(agent_type, final_strategy, agent_kwargs=None):
+    '''
+    Exploitability of an average strategy snapshot, run inside a worker process
+
+    :param agent_type: agent class, constructed once per worker as agent_type(0, False, False, **agent_kwargs)
+    :param final_strategy: (num_infostates, max_actions) average strategy in the agent's row order
+    :param agent_kwargs: extra hashable constructor arguments, e.g. the game of a Leduc family agent
+    :return: exploitability of the snapshot
+    :rtype: Float
+    '''
+    agent_kwargs = agent_kwargs or {}
+    key = (agent_type, tuple(sorted(agent_kwargs.items())))
+
+    agent = _agents.get(key)
+
+    if agent is None:
+        agent = _agents[key] = agent_type(0, False, False, **agent_kwargs)
+
+    agent.table.strategy_sum[:] = final_strategy
+    agent.table.calculate_final_strategy()
+
+    return agent.calculate_exploitability()
+
+
+class AsyncExploitability():
+    '''
+    Background exploitability evaluation of strategy snapshots.
+
+    Results come back with the iteration they belong to and in submission order, so they can be
+    appended straight to an agent's exploitability series.
+    '''
+
+    def __init__(self, agent_type, max_workers=1, agent_kwargs=None):
+        '''
+        :param agent_type: class of the training agent
+        :param max_workers: number of worker processes
+        :param agent_kwargs: extra constructor arguments of the evaluation agents
+        '''
+        self.agent_type = agent_type
+        self.agent_kwargs = agent_kwargs
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        self.pending = []
+
+    def submit(self, iteration, final_strategy):
+        '''
+        Queues the exploitability of a snapshot of final_strategy
+
+        :param iteration: training iteration the snapshot was taken at
+        :param final_strategy: the agent's current average strategy, copied here
+        '''
+        future = self.executor.submit(snapshot_exploitability, self.agent_type, final_strategy.copy(), self.agent_kwargs)
+        self.pending.append((iteration, future))
+
+    def collect(self, wait=False):
+        '''
+        Returns the finished results, oldest first. A result is only returned once every earlier
+        snapshot is done too, so the series stays in iteration order.
+
+        :param wait: block until every pending snapshot is evaluated
+        :return: list of (iteration, exploitability)
+        :rtype: list
+        '''
+        results = []
+
+        while self.pending and (wait or self.pending[0][1].done()):
+
+            iteration, future = self.pending.pop(0)
+            results.append((iteration, future.result()))
+
+        return results
+
+    def close(self):
+        '''
+        Waits for every pending snapshot and shuts the worker pool down
+
+        :return: list of (iteration, exploitability) of the remaining snapshots
+        :rtype: list
+        '''
+        results = self.collect(wait=True)
+        self.executor.shutdown()
+
+        return results
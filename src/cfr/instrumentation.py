@@ -0,0 +1,189 @@
+'''
+Docstring for cfr.instrumentation
+
+This file contains the opt in counters and timers of the training loops.
+
+Agents hold self.instrumentation = None by default and every hook in a hot path is guarded by a
+single `if instrumentation is not None` branch, so a disabled layer costs one comparison per node
+visit or per phase and nothing else. agent.instrument(...) switches it on:
+
+    counters - node visits by kind ('terminal', 'chance', 'decision') and 'iterations'
+    timers   - seconds spent in 'regret_matching', 'traversal', 'regret_update',
+               'average_strategy' and 'exploitability'
+
+Phases are timed with start() / lap(name): lap adds the time since the previous mark to the named
+timer and sets a new mark, so consecutive phases need one clock read each.
+
+Every `every` iterations the cumulative counters and timers are written as one JSON line. An
+instrumentation that opened its output from a path closes it with close() (or on leaving a with
+block) and reopen() appends to the same file again, train() does both around every run.
+
+Worker processes (cfr.parallel) never share the master's output: they count on a worker_copy()
+without output, return it with their updates, and the master merge()s the counts and writes the
+snapshots of the iterations the workers ran (advance).
+'''
+
+from collections import defaultdict
+import json
+import os
+import time
+
+#Indices into Instrumentation.visits, the same values as the node kinds of leduc.tree
+DECISION = 0
+CHANCE = 1
+TERMINAL = 2
+
+NODE_KINDS = ('decision', 'chance', 'terminal')
+
+
+class Instrumentation():
+
+    def __init__(self, output=None, every=1000):
+        '''
+        :param output: path or writable text file for the JSON lines snapshots, None to only keep
+                       the counters in memory
+        :param every: iterations between two snapshots
+        '''
+        self.every = every
+        self.counters = defaultdict(int)
+        self.timers = defaultdict(float)
+
+        self._owns_output = isinstance(output, (str, os.PathLike))
+        self.path = output if self._owns_output else None
+        self.output = open(output, 'a') if self._owns_output else output
+
+        #Iteration of the last written snapshot, so no iteration is written twice
+        self._written = None
+
+        self._created = time.perf_counter()
+        self._mark = self._created
+
+        #Node visits by kind, indexed by the tree's node kind constants for the hot paths
+        self.visits = [0, 0, 0]
+
+    def __getstate__(self):
+
+        #Pickled copies (worker results, snapshots) never write to the master's output
+        state = self.__dict__.copy()
+        state['output'] = None
+        state['_owns_output'] = False
+        state['path'] = None
+
+        return state
+
+    def __enter__(self):
+
+        return self
+
+    def __exit__(self, *exc_info):
+
+        self.close()
+
+    def worker_copy(self):
+        '''
+        Instrumentation for a worker process: no output and zeroed counts, merged back with merge()
+
+        :param self: self
+        :return: fresh output-less instrumentation with the same snapshot interval
+        :rtype: Instrumentation
+        '''
+        return Instrumentation(None, self.every)
+
+    def merge(self, other):
+        '''
+        Adds the counters, timers and node visits of another (worker) instrumentation
+
+        :param self: self
+        :param other: Instrumentation, its counts are left unchanged
+        '''
+        for name, n in other.counters.items():
+            self.counters[name] += n
+
+        for name, seconds in other.timers.items():
+            self.timers[name] += seconds
+
+        for kind, visits in enumerate(other.visits):
+            self.visits[kind] += visits
+
+    def advance(self, start, end):
+        '''
+        Writes a snapshot if the iterations from start to end, run elsewhere and merged, passed a
+        multiple of self.every
+
+        :param self: self
+        :param start: iteration count before the batch
+        :param end: iteration count after the batch
+        '''
+        if self.output is not None and start // self.every < end // self.every:
+            self.write(end)
+
+    def start(self):
+
+        self._mark = time.perf_counter()
+
+    def lap(self, name):
+        '''
+        Adds the time since the previous start() / lap() to the timer name
+        '''
+        now = time.perf_counter()
+        self.timers[name] += now - self._mark
+        self._mark = now
+
+    def count(self, name, n=1):
+
+        self.counters[name] += n
+
+    def snapshot(self, iteration):
+        '''
+        Cumulative counters and timers
+
+        :param iteration: the agent's iteration count
+        :return: JSON serializable snapshot
+        :rtype: dict
+        '''
+        counters = dict(self.counters)
+
+        for kind, visits in zip(NODE_KINDS, self.visits):
+            counters[f"{kind}_visits"] = visits
+
+        return {
+            'iteration': iteration,
+            'elapsed': time.perf_counter() - self._created,
+            'counters': counters,
+            'timers': dict(self.timers),
+        }
+
+    def end_iteration(self, iteration):
+        '''
+        Counts one training iteration and writes a snapshot every self.every iterations
+        '''
+        self.counters['iterations'] += 1
+
+        if self.output is not None and self.counters['iterations'] % self.every == 0:
+            self.write(iteration)
+
+    def write(self, iteration):
+
+        self.output.write(json.dumps(self.snapshot(iteration)) + '\n')
+        self.output.flush()
+        self._written = iteration
+
+    def finish(self, iteration):
+        '''
+        Writes the snapshot of the final iteration unless it was already written
+        '''
+        if self.output is not None and self._written != iteration:
+            self.write(iteration)
+
+    def reopen(self):
+        '''
+        Opens the output path again in append mode after close(), no-op otherwise
+        '''
+        if self.path is not None and self.output is None:
+            self.output = open(self.path, 'a')
+
+    def close(self):
+
+        if self._owns_output and self.output is not None:
+            self.output.close()
+            self.output = None
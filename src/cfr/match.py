@@ -0,0 +1,202 @@
+'''
+Docstring for cfr.match
+
+This file simulates head to head matches between two strategies, many hands at a time.
+
+A MatchSimulator holds a game as flat arrays (children, acting player, node kind, payoffs by card)
+and plays a whole batch of hands as NumPy arrays: every hand's cards are dealt at once, then every
+step advances all unfinished hands by one node, and settling is one gather from the payoff table.
+Hands are only ever grouped by who acts, never looped over in Python.
+
+A player is either a cfr.policy.Policy (anything with sample(infostates, rng)) or one of the
+baselines:
+
+    'random'       - uniform over the legal actions
+    'always_raise' - the last legal action: raise / bet, or call once raising is capped
+
+Infostates are encoded exactly like the training agents encode them, so a Policy built from a
+trained agent plays here unchanged.
+'''
+
+import numpy as np
+
+from kuhn.kuhn import KuhnPoker
+from leduc.leduc import leduc
+from leduc.tree import compile_tree, DECISION, CHANCE, TERMINAL
+from .encoding import InfostateEncoder
+
+BASELINES = ('random', 'always_raise')
+
+
+class MatchSimulator():
+
+    def __init__(self, children, player, kind, public, payoffs, deck, encoder):
+        '''
+        :param children: (num_nodes, max_actions) child node ids, -1 padded
+        :param player: acting player of every node, -1 if none
+        :param kind: DECISION, CHANCE or TERMINAL of every node
+        :param public: True for nodes where the public card has been dealt
+        :param payoffs: (num_nodes, num_ranks, num_ranks, num_public) payout to player 1 by
+                        [node, p1 card, p2 card, public card], num_public is 1 without a public card
+        :param deck: card ranks of the deck
+        :param encoder: the agents' InfostateEncoder of this game
+        '''
+        self.children = np.asarray(children, dtype=np.int64)
+        self.player = np.asarray(player, dtype=np.int64)
+        self.kind = np.asarray(kind)
+        self.public = np.asarray(public, dtype=bool)
+        self.payoffs = np.asarray(payoffs)
+        self.num_actions = (self.children >= 0).sum(axis=1)
+        self.deck = np.array(deck, dtype=np.int64)
+        self.encoder = encoder
+
+        # Two private cards, plus the public card if the game has one
+        self.num_dealt = 3 if self.payoffs.shape[3] > 1 else 2
+
+    @classmethod
+    def leduc(cls, game=None):
+        '''
+        Simulator of standard Leduc, or of any game of the Leduc family
+        '''
+        game = game if game is not None else leduc()
+        tree = compile_tree(game)
+        encoder = InfostateEncoder(tree.num_nodes, tree.num_ranks, tree.num_ranks)
+
+        return cls(tree.children, tree.player, tree.kind, tree.round > 0, tree.payoffs, game.cards, encoder)
+
+    @classmethod
+    def kuhn(cls):
+
+        game = KuhnPoker()
+        histories = game.getHistories()
+        node_index = {history: node for node, history in enumerate(histories)}
+        num_cards = len(game.cards)
+
+        children = np.full((len(histories), len(game.actions)), -1)
+        player = np.full(len(histories), -1)
+        kind = np.full(len(histories), TERMINAL)
+        payoffs = np.zeros((len(histories), num_cards, num_cards, 1))
+
+        deals = np.indices((num_cards, num_cards)).reshape(2, -1).T
+
+        for node, history in enumerate(histories):
+
+            if game.game_finished(history):
+                payoffs[node, :, :, 0] = game.payouts(history, deals).reshape(num_cards, num_cards)
+                continue
+
+            kind[node] = DECISION
+            player[node] = game.getPlayerToAct(history)
+            children[node] = [node_index[history + action] for action in game.actions]
+
+        encoder = InfostateEncoder(len(histories), num_cards)
+
+        return cls(children, player, kind, np.zeros(len(histories), bool), payoffs, game.cards, encoder)
+
+    def deal(self, hands, rng):
+        '''
+        Deals every hand without replacement
+
+        :return: (hands, 3) card ranks, p1 card, p2 card, public card (0 if the game has none)
+        :rtype: numpy array
+        '''
+        order = np.argsort(rng.random((hands, len(self.deck))), axis=1)[:, :self.num_dealt]
+        cards = np.zeros((hands, 3), dtype=np.int64)
+        cards[:, :self.num_dealt] = self.deck[order]
+
+        return cards
+
+    def _act(self, player, nodes, infostates, rng):
+
+        if isinstance(player, str):
+
+            if player not in BASELINES:
+                raise ValueError(f"Unknown baseline {player}, expected one of {BASELINES}")
+
+            num_actions = self.num_actions[nodes]
+
+            if player == 'always_raise':
+                return num_actions - 1
+
+            return (rng.random(len(nodes)) * num_actions).astype(np.int64)
+
+        return player.sample(infostates, rng)
+
+    def play_batch(self, players, seats, cards, rng):
+        '''
+        Plays one batch of hands to the end
+
+        :param players: (player a, player b)
+        :param seats: (hands,) seat of player a in every hand, 0 or 1
+        :param cards: (hands, 3) dealt cards
+        :param rng: numpy Generator
+        :return: (hands,) winnings of player a
+        :rtype: numpy array
+        '''
+        hands = np.arange(len(cards))
+        nodes = np.zeros(len(cards), dtype=np.int64)
+        active = hands
+
+        while len(active):
+
+            kind = self.kind[nodes[active]]
+
+            # Chance nodes only reveal the public card, which was dealt up front
+            chance = active[kind == CHANCE]
+            nodes[chance] = self.children[nodes[chance], 0]
+
+            acting = active[kind == DECISION]
+            acting_nodes = nodes[acting]
+            acting_player = self.player[acting_nodes]
+
+            board = np.where(self.public[acting_nodes], cards[acting, 2], -1)
+            card = cards[acting, acting_player]
+            infostates = self.encoder.encode_many(acting_player, card, acting_nodes, board)
+
+            # Player a acts where it sits in the acting seat, player b everywhere else
+            a_acts = acting_player == seats[acting]
+
+            for owner, mask in ((players[0], a_acts), (players[1], ~a_acts)):
+
+                if mask.any():
+                    actions = self._act(owner, acting_nodes[mask], infostates[mask], rng)
+                    nodes[acting[mask]] = self.children[acting_nodes[mask], actions]
+
+            active = active[self.kind[nodes[active]] != TERMINAL]
+
+        payout = self.payoffs[nodes, cards[:, 0], cards[:, 1], cards[:, 2] if self.num_dealt == 3 else 0]
+
+        return np.where(seats == 0, payout, -payout)
+
+    def play(self, player_a, player_b, hands, seed=None, swap_seats=True, batch_size=100000):
+        '''
+        Plays hands hands of player_a against player_b
+
+        :param player_a: Policy or baseline name
+        :param player_b: Policy or baseline name
+        :param hands: number of hands
+        :param seed: seed of the numpy Generator used for deals and sampled actions
+        :param swap_seats: alternate the seats every hand, otherwise player_a is always player 1
+        :param batch_size: hands simulated per batch
+        :return: (mean winnings of player_a per hand, standard error of the mean)
+        :rtype: tuple
+        '''
+        rng = np.random.default_rng(seed)
+
+        total = 0.0
+        total_squares = 0.0
+
+        for start in range(0, hands, batch_size):
+
+            batch = min(batch_size, hands - start)
+            seats = (np.arange(start, start + batch) % 2) if swap_seats else np.zeros(batch, dtype=np.int64)
+
+            winnings = self.play_batch((player_a, player_b), seats, self.deal(batch, rng), rng)
+
+            total += winnings.sum()
+            total_squares += np.square(winnings).sum()
+
+        mean = total / hands
+        variance = (total_squares - hands * mean ** 2) / max(hands - 1, 1)
+
+        return float(mean), float(np.sqrt(variance / hands))
@@ -0,0 +1,72 @@
+'''
+Docstring for cfr.metrics
+
+This file streams the training metrics to disk as training runs, so headless jobs never need
+matplotlib and a run can be plotted (see cfr.plotting) or compared after the fact.
+
+Every measured exploitability becomes one row with the iteration it belongs to and the seconds
+since the writer was opened (training start) when the row was recorded. The format follows
+the file extension:
+
+    .csv          - iteration,exploitability,elapsed with a header line
+    anything else - JSON lines, {"iteration": ..., "exploitability": ..., "elapsed": ...}
+
+Rows are flushed as they are written, so the file can be tailed while training runs.
+'''
+
+import csv
+import json
+import time
+
+FIELDS = ('iteration', 'exploitability', 'elapsed')
+
+
+class MetricsWriter():
+
+    def __init__(self, path):
+
+        self.path = str(path)
+        self.csv = self.path.endswith('.csv')
+        self.file = open(self.path, 'w', newline='')
+        self.start = time.perf_counter()
+
+        if self.csv:
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(FIELDS)
+
+    def write(self, iteration, exploitability):
+
+        row = (iteration, exploitability, time.perf_counter() - self.start)
+
+        if self.csv:
+            self.writer.writerow(row)
+        else:
+            self.file.write(json.dumps(dict(zip(FIELDS, row))) + '\n')
+
+        self.file.flush()
+
+    def close(self):
+
+        self.file.close()
+
+
+def read_metrics(path):
+    '''
+    Reads a metrics file written by MetricsWriter
+
+    :param path: .csv or JSON lines metrics file
+    :return: {'iteration': [...], 'exploitability': [...], 'elapsed': [...]}
+    :rtype: dict
+    '''
+    metrics = {field: [] for field in FIELDS}
+
+    with open(path, newline='') as f:
+
+        rows = csv.DictReader(f) if str(path).endswith('.csv') else (json.loads(line) for line in f if line.strip())
+
+        for row in rows:
+            metrics['iteration'].append(int(row['iteration']))
+            metrics['exploitability'].append(float(row['exploitability']))
+            metrics['elapsed'].append(float(row['elapsed']))
+
+    return metrics
@@ -0,0 +1,288 @@
+'''
+Docstring for cfr.parallel
+
+This file trains any chance sampled CFR agent (Kuhn, Leduc CFR_agent, MCCFR_agent) on a process pool.
+
+Every worker process holds a copy of the agent. One round of training:
+
+    - the coordinator sends the current regret and strategy sums to every worker
+    - each worker runs batch_iterations iterations on its own independently sampled deals
+    - each worker returns the change it made to both sums, and the coordinator adds every delta
+      into the master table
+
+All workers run the same iteration numbers, so a round of n workers is batch_iterations iterations
+that each sample n deals instead of one. Within a round the workers do not see each other's
+updates, a larger batch_iterations means less communication but staler strategies.
+
+Deltas are merged by addition, which is only sound for variants whose updates are purely
+additive (variant.linear). CFR+ clipping and DCFR discounting would be applied once per worker
+to the shared start of the round, so those variants are rejected.
+
+Every (round, worker) task gets its own seed spawned from one numpy SeedSequence, so a run is
+reproducible for a given seed and worker count no matter which process picks up which task. The
+sequence lives on the agent (agent.worker_seeds) and is created from the seed on first use, so
+later runs, and runs resumed from a checkpoint, keep spawning fresh seeds from it.
+
+Workers are forked on Linux, so they inherit the agent as it is rather than a pickled copy. An
+instrumented agent's workers therefore get an output-less worker_copy() of the instrumentation,
+count on it for every batch and return it, the master merges the counts and writes the snapshots.
+
+SharedMemoryCFR is the Hogwild alternative: the regret and strategy sums live in
+multiprocessing.shared_memory blocks, every worker updates them in place without locks and there
+is no merge step. Every agent adds its updates into the tables in place: MCCFR_agent element by
+element during the traversal, the Kuhn and Leduc CFR_agent traverse on a private snapshot and add
+the change of every row they touched once the traversal is done, so rows are never overwritten
+with stale copies. Two workers adding to the same element at the same moment can still lose one
+of the updates, that lost update noise is the price for never copying the tables. Runs are not
+reproducible.
+'''
+
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+
+import numpy as np
+
+#The agent copy of the current worker process, and the shared memory blocks it is attached to
+_agent = None
+_blocks = []
+
+
+def _worker_seeds(agent, seed):
+    '''
+    The agent's SeedSequence of worker seeds, created from seed the first time
+    '''
+    if agent.worker_seeds is None:
+        agent.worker_seeds = np.random.SeedSequence(seed)
+
+    return agent.worker_seeds
+
+
+def _init_worker(agent):
+
+    global _agent
+    _agent = agent
+
+    #A forked worker inherits the master's instrumentation with its open output, it must never write
+    if agent.instrumentation is not None:
+        agent.instrumentation = agent.instrumentation.worker_copy()
+
+
+def _reset_instrumentation(agent):
+    '''
+    Gives the worker's agent zeroed counts for the next batch and returns the previous ones
+    '''
+    instrumentation = agent.instrumentation
+
+    if instrumentation is not None:
+        agent.instrumentation = instrumentation.worker_copy()
+
+    return instrumentation
+
+
+def _merge_instrumentation(agent, instrumentations, start):
+    '''
+    Adds the workers' counts into the master's instrumentation and writes any snapshot due
+    '''
+    if agent.instrumentation is None:
+        return
+
+    for instrumentation in instrumentations:
+        agent.instrumentation.merge(instrumentation)
+
+    agent.instrumentation.advance(start, agent.iteration_count)
+
+
+def _flush_pruning(agent):
+    '''
+    Replays what the worker's pruning windows skipped, so the batch's updates are complete
+    '''
+    if getattr(agent, 'supports_pruning', False):
+        agent.flush_pruning()
+
+
+def _run_batch(regret_sum, strategy_sum, iteration_count, iterations, seed):
+    '''
+    Runs iterations training iterations on the worker's agent from the given sums
+
+    :return: (regret sum delta, strategy sum delta, instrumentation of the batch or None)
+    :rtype: tuple
+    '''
+    agent = _agent
+
+    agent.table.regret_sum[:] = regret_sum
+    agent.table.strategy_sum[:] = strategy_sum
+    agent.iteration_count = iteration_count
+    agent.rng.seed(seed)
+
+    for _ in range(iterations):
+        agent.iteration()
+
+    _flush_pruning(agent)
+
+    return agent.table.regret_sum - regret_sum, agent.table.strategy_sum - strategy_sum, _reset_instrumentation(agent)
+
+
+def _init_shared_worker(agent, regret_name, strategy_name):
+
+    global _agent, _blocks
+    _agent = agent
+
+    if agent.instrumentation is not None:
+        agent.instrumentation = agent.instrumentation.worker_copy()
+
+    #Keep the blocks referenced, the arrays below are only views of their buffers
+    _blocks = [shared_memory.SharedMemory(name=regret_name), shared_memory.SharedMemory(name=strategy_name)]
+
+    table = agent.table
+    table.regret_sum = np.ndarray(table.regret_sum.shape, dtype=table.dtype, buffer=_blocks[0].buf)
+    table.strategy_sum = np.ndarray(table.strategy_sum.shape, dtype=table.dtype, buffer=_blocks[1].buf)
+
+
+def _run_shared(iteration_count, iterations, seed):
+    '''
+    Runs iterations training iterations straight on the shared tables
+
+    :return: instrumentation of the batch or None
+    '''
+    agent = _agent
+
+    agent.iteration_count = iteration_count
+    agent.rng.seed(seed)
+
+    for _ in range(iterations):
+        agent.iteration()
+
+    _flush_pruning(agent)
+
+    return _reset_instrumentation(agent)
+
+
+class ParallelCFR():
+
+    def __init__(self, agent, num_workers=None, batch_iterations=100, seed=0):
+        '''
+        :param agent: master agent, its table receives the merged updates
+        :param num_workers: number of worker processes, the CPU count by default
+        :param batch_iterations: iterations every worker runs between two merges
+        :param seed: seed of every worker's deal stream, unless the agent already holds worker_seeds
+        '''
+        if not agent.chance_sampled:
+            raise ValueError(f"{type(agent).__name__} enumerates every deal per iteration, there are no deals to shard")
+
+        if not agent.variant.linear:
+            raise ValueError(f"{type(agent.variant).__name__} updates can not be merged by addition")
+
+        self.agent = agent
+        self.num_workers = num_workers if num_workers is not None else os.cpu_count()
+        self.batch_iterations = batch_iterations
+        self.seed_sequence = _worker_seeds(agent, seed)
+
+        self.executor = ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_worker, initargs=(agent,))
+
+    def run(self, iterations):
+        '''
+        Trains the master agent for iterations iterations, every iteration samples num_workers deals
+
+        :param iterations: number of iterations
+        '''
+        agent = self.agent
+        table = agent.table
+
+        for start in range(0, iterations, self.batch_iterations):
+
+            batch = min(self.batch_iterations, iterations - start)
+            seeds = [int(s.generate_state(1)[0]) for s in self.seed_sequence.spawn(self.num_workers)]
+
+            futures = [
+                self.executor.submit(_run_batch, table.regret_sum, table.strategy_sum, agent.iteration_count, batch, seed)
+                for seed in seeds
+            ]
+
+            #The tables are pickled for the workers in the background, so nothing is merged before every worker is done
+            deltas = [future.result() for future in futures]
+
+            for regret_delta, strategy_delta, _ in deltas:
+                table.regret_sum += regret_delta
+                table.strategy_sum += strategy_delta
+
+            table.touch(slice(None))
+            agent.iteration_count += batch
+
+            _merge_instrumentation(agent, [delta[2] for delta in deltas], agent.iteration_count - batch)
+
+    def close(self):
+
+        self.executor.shutdown()
+
+
+class SharedMemoryCFR():
+
+    def __init__(self, agent, num_workers=None, seed=0):
+        '''
+        Moves the agent's regret and strategy sums into shared memory until close()
+
+        :param agent: master agent, its table is updated in place by every worker
+        :param num_workers: number of worker processes, the CPU count by default
+        :param seed: seed of the workers' deal streams, unless the agent already holds worker_seeds
+        '''
+        if not agent.chance_sampled:
+            raise ValueError(f"{type(agent).__name__} enumerates every deal per iteration, there are no deals to shard")
+
+        if not agent.variant.linear:
+            raise ValueError(f"{type(agent.variant).__name__} updates can not be applied concurrently")
+
+        self.agent = agent
+        self.num_workers = num_workers if num_workers is not None else os.cpu_count()
+        self.seed_sequence = _worker_seeds(agent, seed)
+
+        table = agent.table
+        self.blocks = []
+
+        for name in ('regret_sum', 'strategy_sum'):
+
+            array = getattr(table, name)
+            block = shared_memory.SharedMemory(create=True, size=array.nbytes)
+            shared = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+            shared[:] = array
+
+            setattr(table, name, shared)
+            self.blocks.append(block)
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            initializer=_init_shared_worker,
+            initargs=(agent, self.blocks[0].name, self.blocks[1].name),
+        )
+
+    def run(self, iterations):
+        '''
+        Every worker runs iterations iterations on its own sampled deals, updating the shared tables
+
+        :param iterations: iterations per worker
+        '''
+        agent = self.agent
+        seeds = [int(s.generate_state(1)[0]) for s in self.seed_sequence.spawn(self.num_workers)]
+
+        futures = [self.executor.submit(_run_shared, agent.iteration_count, iterations, seed) for seed in seeds]
+
+        instrumentations = [future.result() for future in futures]
+
+        agent.table.touch(slice(None))
+        agent.iteration_count += iterations
+
+        _merge_instrumentation(agent, instrumentations, agent.iteration_count - iterations)
+
+    def close(self):
+        '''
+        Stops the workers and gives the agent private copies of the shared tables
+        '''
+        self.executor.shutdown()
+
+        table = self.agent.table
+        table.regret_sum = table.regret_sum.copy()
+        table.strategy_sum = table.strategy_sum.copy()
+
+        for block in self.blocks:
+            block.close()
+            block.unlink()
@@ -0,0 +1,36 @@
+'''
+Docstring for cfr.plotting
+
+This file holds the plotting helpers. matplotlib is imported inside the functions, so importing
+a solver never loads it and headless training jobs never need it.
+'''
+
+from .metrics import read_metrics
+
+
+def plot_exploitability(iterations, exploitability, title="Exploitability over iterations"):
+    '''
+    Plots an exploitability series and shows the figure
+
+    :param iterations: iteration of every measurement
+    :param exploitability: measured exploitability
+    :param title: figure title
+    '''
+    import matplotlib.pyplot as plt
+
+    plt.plot(iterations, exploitability)
+    plt.xlabel("Iterations")
+    plt.ylabel("Exploitability")
+    plt.title(title)
+    plt.show()
+
+
+def plot_metrics(path):
+    '''
+    Plots the exploitability series of a metrics file written during training (see cfr.metrics)
+
+    :param path: .csv or JSON lines metrics file
+    '''
+    metrics = read_metrics(path)
+
+    plot_exploitability(metrics['iteration'], metrics['exploitability'], title=f"Exploitability over iterations ({path})")
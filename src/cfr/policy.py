@@ -0,0 +1,122 @@
+'''
+Docstring for cfr.policy
+
+This file contains Policy, the batched inference side of a trained strategy.
+
+A Policy answers many infostates per call: an array of encoded infostates (cfr.encoding) goes in,
+their (n, max_actions) probability matrix or n sampled action indices come out. Row lookup is one
+gather from a dense key -> row array and sampling is one vectorized draw, so the cost per decision
+is a few NumPy operations shared by the whole batch instead of a dict lookup and a Python loop.
+
+Action indices follow the table's action order, Policy.actions(infostates) returns the labels.
+
+A Policy keeps its arrays as given, so over the memory mapped arrays of a policy file it only reads
+the rows a batch gathers: sampling builds the cumulative probabilities of those rows only, and action
+labels stay one action set index per row plus the few distinct action sets.
+'''
+
+import numpy as np
+
+from .policy_file import PolicyFile, group_action_sets
+
+
+class Policy():
+
+    def __init__(self, strategy, lookup, num_actions, action_set=None, action_sets=None):
+        '''
+        :param strategy: (num_infostates, max_actions) final strategy, zero padded
+        :param lookup: dense infostate key -> row array, -1 for keys without a row
+        :param num_actions: legal action count of every row
+        :param action_set: optional action set index of every row
+        :param action_sets: action labels of every action set
+        '''
+        self.strategy = strategy
+        self.lookup = lookup
+        self.num_actions = num_actions
+        self.action_set = action_set
+        self.action_sets = action_sets
+
+    @classmethod
+    def from_agent(cls, agent):
+        '''
+        Policy of a trained agent's current final strategy (a copy, later training does not change it),
+        in the real game even if the agent trains in an abstraction
+        '''
+        table = agent.policy_table()
+
+        keys = np.array(table.keys, dtype=np.int64)
+        lookup = np.full(keys.max() + 1, -1, dtype=np.int64)
+        lookup[keys] = np.arange(len(keys))
+
+        action_sets, action_set = group_action_sets(table.actions)
+
+        return cls(table.final_strategy.copy(), lookup, table.num_actions.copy(), action_set, action_sets)
+
+    @classmethod
+    def from_file(cls, path):
+        '''
+        Policy over the memory mapped arrays of a policy file written by cfr.policy_file.write_policy
+        '''
+        policy_file = PolicyFile(path)
+
+        return cls(policy_file.strategy, policy_file.lookup, policy_file.num_actions,
+                   policy_file.action_set, policy_file.action_sets)
+
+    def rows(self, infostates):
+        '''
+        Table rows of an array of infostate keys
+
+        :param infostates: array of infostate keys
+        :return: int64 array of rows
+        :rtype: numpy array
+        '''
+        infostates = np.asarray(infostates, dtype=np.int64)
+        inside = (infostates >= 0) & (infostates < len(self.lookup))
+
+        rows = np.full(infostates.shape, -1, dtype=np.int64)
+        rows[inside] = self.lookup[infostates[inside]]
+
+        if (rows < 0).any():
+            raise KeyError(infostates[rows < 0][0].item())
+
+        return rows
+
+    def probabilities(self, infostates):
+        '''
+        Final strategy of every infostate in the batch
+
+        :param infostates: array of infostate keys
+        :return: (n, max_actions) probabilities, zero on padded actions
+        :rtype: numpy array
+        '''
+        return self.strategy[self.rows(infostates)]
+
+    def actions(self, infostates):
+        '''
+        Legal action labels of every infostate in the batch, in strategy order
+
+        :param infostates: array of infostate keys
+        :return: list of action label lists
+        :rtype: list
+        '''
+        return [self.action_sets[i] for i in self.action_set[self.rows(infostates)].tolist()]
+
+    def sample(self, infostates, rng):
+        '''
+        Samples one action for every infostate in the batch with a single vectorized draw
+
+        :param infostates: array of infostate keys
+        :param rng: numpy Generator, e.g. np.random.default_rng(seed)
+        :return: int64 array of action indices
+        :rtype: numpy array
+        '''
+        rows = self.rows(infostates)
+
+        # Cumulative probabilities of the gathered rows, from the last legal column on they are
+        # forced to 1 so rounding never samples a padded action
+        cumulative = np.cumsum(self.strategy[rows], axis=1)
+        cumulative[np.arange(cumulative.shape[1]) >= np.asarray(self.num_actions)[rows][:, None] - 1] = 1
+
+        u = rng.random(len(cumulative))
+
+        return (cumulative <= u[:, None]).sum(axis=1)
@@ -0,0 +1,170 @@
+'''
+Docstring for cfr.policy_file
+
+This file exports a trained average strategy to a read only policy file and maps it back in.
+
+Layout of a policy file:
+
+    MAGIC (8 bytes) | header length (uint64, little endian) | JSON header | padding | arrays
+
+The JSON header lists the action labels of every distinct action set and, for every array, its
+dtype, shape and byte offset. The arrays are 64 byte aligned raw NumPy data:
+
+    - strategy: (num_infostates, max_actions) final strategy, padded with zeros like the tables
+    - lookup: infostate key -> row, -1 for keys that are not infostates (keys are the packed ints
+      of cfr.encoding, so the lookup is one dense array)
+    - num_actions, action_set: legal action count and action set of every row
+
+PolicyFile maps the arrays with numpy.memmap, so loading is near instant and every process that
+opens the same file shares one copy of it through the page cache.
+'''
+
+import json
+
+import numpy as np
+
+MAGIC = b'CFRPOL1\n'
+ALIGNMENT = 64
+
+
+def group_action_sets(actions):
+    '''
+    Groups the action labels of every row into the distinct action sets
+
+    :param actions: action labels of every row
+    :return: list of distinct action sets, int32 array of every row's action set index
+    :rtype: tuple
+    '''
+    action_sets = []
+    action_set = np.empty(len(actions), dtype=np.int32)
+
+    for row, labels in enumerate(actions):
+
+        labels = list(labels)
+
+        if labels not in action_sets:
+            action_sets.append(labels)
+
+        action_set[row] = action_sets.index(labels)
+
+    return action_sets, action_set
+
+
+def write_policy(table, path):
+    '''
+    Exports the final strategy of an InfostateTable with integer keys
+
+    :param table: the trained agent's table
+    :param path: policy file to write
+    '''
+    keys = np.array(table.keys, dtype=np.int64)
+    lookup = np.full(keys.max() + 1, -1, dtype=np.int64)
+    lookup[keys] = np.arange(len(keys))
+
+    action_sets, action_set = group_action_sets(table.actions)
+
+    arrays = {
+        'strategy': np.ascontiguousarray(table.final_strategy),
+        'lookup': lookup,
+        'num_actions': table.num_actions,
+        'action_set': action_set,
+    }
+
+    # Offsets are relative to the end of the header, which is padded to the alignment
+    layout = {}
+    offset = 0
+
+    for name, array in arrays.items():
+        layout[name] = {'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset}
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    header = json.dumps({'action_sets': action_sets, 'arrays': layout}).encode()
+    start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    with open(path, 'wb') as f:
+
+        f.write(MAGIC)
+        f.write(np.uint64(len(header)).tobytes())
+        f.write(header)
+
+        for name, array in arrays.items():
+            f.seek(start + layout[name]['offset'])
+            f.write(array.tobytes())
+
+        f.truncate(start + offset)
+
+
+class PolicyFile():
+    '''
+    Read only, memory mapped view of a policy file written by write_policy
+    '''
+
+    def __init__(self, path):
+
+        with open(path, 'rb') as f:
+
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a policy file")
+
+            header_length = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+            header = json.loads(f.read(header_length))
+
+        start = -(-(len(MAGIC) + 8 + header_length) // ALIGNMENT) * ALIGNMENT
+
+        self.path = path
+        self.action_sets = header['action_sets']
+
+        for name, array in header['arrays'].items():
+
+            mapped = np.memmap(path, dtype=np.dtype(array['dtype']), mode='r',
+                               offset=start + array['offset'], shape=tuple(array['shape']))
+
+            setattr(self, name, mapped)
+
+    def __len__(self):
+
+        return len(self.strategy)
+
+    def __contains__(self, infostate):
+
+        return 0 <= infostate < len(self.lookup) and self.lookup[infostate] >= 0
+
+    def row(self, infostate):
+
+        if infostate not in self:
+            raise KeyError(infostate)
+
+        return int(self.lookup[infostate])
+
+    def actions(self, infostate):
+        '''
+        Legal action labels of an infostate, in strategy order
+        '''
+        return self.action_sets[self.action_set[self.row(infostate)]]
+
+    def probabilities(self, infostate):
+        '''
+        Final strategy of an infostate over its legal actions, like Node.final_strategy:
+        normalized strategy sums, uniform if the infostate was never reached in training
+
+        :param infostate: infostate key
+        :return: read only view of the probabilities, one per legal action
+        :rtype: numpy array
+        '''
+        row = self.row(infostate)
+
+        return self.strategy[row, :self.num_actions[row]]
+
+    def sample_action(self, infostate, rng):
+        '''
+        Samples an action of an infostate from its final strategy
+
+        :param infostate: infostate key
+        :param rng: random.Random or numpy Generator, anything with a random() method
+        :return: action label
+        :rtype: String
+        '''
+        probabilities = self.probabilities(infostate)
+        i = int(np.searchsorted(np.cumsum(probabilities), rng.random() * probabilities.sum(), side='right'))
+
+        return self.actions(infostate)[min(i, len(probabilities) - 1)]
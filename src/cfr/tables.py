@@ -0,0 +1,181 @@
+'''
+Docstring for cfr.tables
+
+This file contains the array backed storage shared by every solver.
+
+An InfostateTable holds one row per infostate. The regret sums, current strategy, strategy sums
+and final (average) strategy are contiguous (num_infostates, max_actions) arrays, and rows with
+fewer legal actions are padded on the right: mask[row] marks which columns are legal actions.
+
+The solvers key their tables with the integer infostates of cfr.encoding. InfostateMap wraps a
+table in the old infostate_map interface (key -> Node) so printing and exploitability helpers keep
+working while the solvers work on rows.
+'''
+
+from collections.abc import Mapping
+
+import numpy as np
+
+
+class InfostateTable():
+
+    def __init__(self, keys, actions, dtype=np.float64):
+        '''
+        :param keys: one hashable key per infostate, in row order
+        :param actions: list of legal action labels for every row
+        :param dtype: float dtype of every array, np.float64 or np.float32
+        '''
+        self.keys = list(keys)
+        self.index = {key: row for row, key in enumerate(self.keys)}
+        self._row_lookup = None
+        self.actions = list(actions)
+
+        self.num_actions = np.array([len(a) for a in self.actions], dtype=np.int64)
+        self.max_actions = int(self.num_actions.max())
+        self.mask = np.arange(self.max_actions) < self.num_actions[:, None]
+        self.uniform = (self.mask / self.num_actions[:, None]).astype(dtype)
+
+        shape = (len(self.keys), self.max_actions)
+
+        self.dtype = np.dtype(dtype)
+        self.regret_sum = np.zeros(shape, dtype=dtype)
+        self.strategy_sum = np.zeros(shape, dtype=dtype)
+        self.strategy = self.uniform.copy()
+
+        #The average strategy is only renormalized for stale rows, and only when it is read
+        self._final_strategy = self.uniform.copy()
+        self._stale = np.zeros(len(self.keys), dtype=bool)
+
+    def __len__(self):
+
+        return len(self.keys)
+
+    def __contains__(self, key):
+
+        return key in self.index
+
+    def row(self, key):
+
+        return self.index[key]
+
+    def rows(self, keys):
+        '''
+        Vectorized row lookup for tables keyed by non-negative ints (see cfr.encoding)
+
+        :param keys: array of infostate keys
+        :return: int64 array of rows, -1 where a key has no row
+        :rtype: numpy array
+        '''
+        if self._row_lookup is None:
+            table_keys = np.array(self.keys, dtype=np.int64)
+            self._row_lookup = np.full(table_keys.max() + 1, -1, dtype=np.int64)
+            self._row_lookup[table_keys] = np.arange(len(table_keys))
+
+        keys = np.asarray(keys, dtype=np.int64)
+        inside = (keys >= 0) & (keys < len(self._row_lookup))
+
+        rows = np.full(keys.shape, -1, dtype=np.int64)
+        rows[inside] = self._row_lookup[keys[inside]]
+
+        return rows
+
+    @property
+    def nbytes(self):
+        '''
+        Bytes held by the four float arrays
+        '''
+        return self.regret_sum.nbytes + self.strategy_sum.nbytes + self.strategy.nbytes + self.final_strategy.nbytes
+
+    def regret_matching(self):
+        '''
+        Computes the current strategy of every row from the positive regrets in one pass.
+        Rows without positive regret play uniformly over their legal actions.
+
+        :return: self.strategy
+        :rtype: numpy array
+        '''
+        positive = np.maximum(self.regret_sum, 0)
+        positive *= self.mask
+        total = positive.sum(axis=1, keepdims=True)
+
+        self.strategy[:] = self.uniform
+        np.divide(positive, total, out=self.strategy, where=total > 0)
+
+        return self.strategy
+
+    def average_strategy(self, rows=slice(None)):
+        '''
+        Normalized strategy sums, uniform where a row was never reached
+
+        :param rows: rows to normalize, every row by default
+        :return: (num_rows, max_actions) average strategy
+        :rtype: numpy array
+        '''
+        strategy_sum = self.strategy_sum[rows]
+        total = strategy_sum.sum(axis=1, keepdims=True)
+
+        average = self.uniform[rows].copy()
+        np.divide(strategy_sum, total, out=average, where=total > 0)
+
+        return average
+
+    def touch(self, rows):
+        '''
+        Marks rows whose strategy sums changed, their final strategy is renormalized on the next read.
+        Scaling a whole row by a positive factor (DCFR discounting) leaves it unchanged and needs no touch.
+
+        :param rows: row index, index array or slice
+        '''
+        self._stale[rows] = True
+
+    @property
+    def final_strategy(self):
+        '''
+        Average strategy of every row, kept up to date lazily: only rows touched since the
+        last read are renormalized
+
+        :return: (num_infostates, max_actions) average strategy
+        :rtype: numpy array
+        '''
+        if self._stale.any():
+
+            rows = np.flatnonzero(self._stale)
+
+            self._final_strategy[rows] = self.average_strategy(rows)
+            self._stale[rows] = False
+
+        return self._final_strategy
+
+    def calculate_final_strategy(self):
+        '''
+        Renormalizes every row now, also picking up strategy sums that were written without touch
+        '''
+        self.touch(slice(None))
+        self.final_strategy
+
+
+class InfostateMap(Mapping):
+    '''
+    Read only key -> Node view over an InfostateTable
+    '''
+
+    def __init__(self, table, node_type):
+
+        self.table = table
+        self.node_type = node_type
+
+    def __getitem__(self, key):
+
+        return self.node_type(self.table, self.table.index[key])
+
+    def __contains__(self, key):
+
+        return key in self.table.index
+
+    def __iter__(self):
+
+        return iter(self.table.keys)
+
+    def __len__(self):
+
+        return len(self.table)
@@ -0,0 +1,99 @@
+'''
+Docstring for cfr.variants
+
+This file contains the regret update rules the CFR agents can train with.
+
+A variant decides four things:
+
+    - update_players: (None,) updates both players in one traversal (simultaneous updates),
+      (0, 1) runs one traversal per player and only updates that player (alternating updates)
+    - strategy_weight(t): weight of iteration t's contribution to the strategy sums
+    - update(table, t, rows): what happens to the cumulative sums of the updated rows after a traversal
+    - linear: True if the sums only ever grow by added updates, so updates computed from the same
+      starting sums can be merged by addition (see cfr.parallel)
+
+Iterations are counted from 1.
+'''
+
+import numpy as np
+
+
+class VanillaCFR():
+    '''
+    Vanilla CFR: simultaneous updates and a uniformly weighted average strategy, or the players
+    updated in turn with alternating=True
+    '''
+
+    update_players = (None,)
+    linear = True
+
+    def __init__(self, alternating=False):
+
+        if alternating:
+            self.update_players = (0, 1)
+
+    def strategy_weight(self, t):
+
+        return 1.0
+
+    def update(self, table, t, rows):
+
+        pass
+
+
+class CFRPlus():
+    '''
+    CFR+: regret matching+ (cumulative regrets are clipped at zero after every update),
+    alternating player updates and a linearly weighted average strategy
+    '''
+
+    update_players = (0, 1)
+    linear = False
+
+    def strategy_weight(self, t):
+
+        return float(t)
+
+    def update(self, table, t, rows):
+
+        table.regret_sum[rows] = np.maximum(table.regret_sum[rows], 0)
+
+
+class DiscountedCFR():
+    '''
+    Discounted CFR (DCFR): after iteration t the positive cumulative regrets are multiplied by
+    t^alpha / (t^alpha + 1), the negative ones by t^beta / (t^beta + 1), and the strategy sums
+    by (t / (t + 1))^gamma. Players are updated alternately.
+    '''
+
+    update_players = (0, 1)
+    linear = False
+
+    def __init__(self, alpha=1.5, beta=0.0, gamma=2.0):
+
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+
+    def strategy_weight(self, t):
+
+        return 1.0
+
+    def update(self, table, t, rows):
+
+        positive = t ** self.alpha / (t ** self.alpha + 1)
+        negative = t ** self.beta / (t ** self.beta + 1)
+
+        regret_sum = table.regret_sum[rows]
+        table.regret_sum[rows] = regret_sum * np.where(regret_sum > 0, positive, negative)
+        table.strategy_sum[rows] *= (t / (t + 1)) ** self.gamma
+
+
+class LinearCFR(DiscountedCFR):
+    '''
+    Linear CFR: iteration t's regrets and strategy count with weight t, DCFR with alpha = beta = gamma = 1
+    '''
+
+    def __init__(self):
+
+        super().__init__(alpha=1.0, beta=1.0, gamma=1.0)
@@ -1,50 +1,220 @@
 from .kuhn import KuhnPoker
 from .nodes import Node
-import matplotlib.pyplot as plt
+from cfr.checkpoint import save_checkpoint, load_checkpoint
+from cfr.encoding import InfostateEncoder
+from cfr.evaluation import AsyncExploitability
+from cfr.instrumentation import Instrumentation, DECISION, TERMINAL
+from cfr.metrics import MetricsWriter
+from cfr.parallel import ParallelCFR
+from cfr.plotting import plot_exploitability
+from cfr.policy_file import write_policy
+from cfr.tables import InfostateTable, InfostateMap
+from cfr.variants import VanillaCFR
+import numpy as np
 import random
 import time
 
 
 class CFR_agent:
 
-    def __init__(self, iterations, plot_strategy_sum, plot_exploitability):
+    #Every iteration samples a deal, see cfr.parallel
+    chance_sampled = True
+
+    def __init__(self, iterations, plot_strategy_sum, plot_exploitability, dtype=np.float64, variant=None):
 
         self.game = KuhnPoker()
         self.iterations = iterations
         self.plot_strategy_sum = plot_strategy_sum
         self.plot_exploitability = plot_exploitability
-        
-        self.infostate_map = dict()
+
+        #Histories are walked by node id, terminal histories have no children
+        self.histories = self.game.getHistories()
+        self.node_index = {history: node for node, history in enumerate(self.histories)}
+        self._children = [
+            [] if self.game.game_finished(history) else [self.node_index[history + action] for action in self.game.getActions()]
+            for history in self.histories
+        ]
+
+        #infostates are as following: player to act, player to act's cards, history node
+        self.encoder = InfostateEncoder(len(self.histories), len(self.game.cards))
+
+        keys = []
+
+        for node, history in enumerate(self.histories):
+
+            if self.game.game_finished(history):
+                continue
+
+            player = self.game.getPlayerToAct(history)
+
+            for card in self.game.cards:
+                keys.append(self.encoder.encode(player, card, node))
+
+        self.table = InfostateTable(keys, [self.game.getActions()] * len(keys), dtype=dtype)
+        self.infostate_map = InfostateMap(self.table, Node)
         self.utility_map = dict()
+
+        #Regret update rule (vanilla, CFR+, ...) and the table rows each player owns
+        self.variant = variant if variant is not None else VanillaCFR()
+        self.iteration_count = 0
+
+        row_players = self.encoder.decode_many(self.table.keys)[0]
+        self.player_rows = {None: slice(None), 0: np.flatnonzero(row_players == 0), 1: np.flatnonzero(row_players == 1)}
         
         self.cards = []
+
+        #Deals are drawn from the agent's own stream so parallel workers can be seeded independently
+        self.rng = random.Random()
+
+        #SeedSequence the parallel workers' seeds are spawned from, kept across train() calls and
+        #checkpoints so a resumed run does not replay the same deals (see cfr.parallel)
+        self.worker_seeds = None
+
         self.exploitability = []
+        self.exploitability_iterations = []
+
+        #Opt in counters and timers, see instrument()
+        self.instrumentation = None
+
+        #Streams every measured exploitability to a file while train() runs, see cfr.metrics
+        self.metrics = None
 
     def plot_exploitability_func(self, data):
         '''
         Helper function to plot exploitabilility of the current final strategy over iterations.
+        matplotlib is only imported here, see cfr.plotting
     
         :param self:
-        :param data: exploitability calculated every 50 iterations
+        :param data: exploitability series, measured at self.exploitability_iterations
+        '''
+        plot_exploitability(self.exploitability_iterations, data)
+
+    def join_exploitability(self, results):
         '''
+        Appends (iteration, exploitability) results to the exploitability series
 
-        step = 50
-        x = [i * step for i in range(len(data))]
+        :param self: self
+        :param results: list of (iteration, exploitability), in iteration order
+        '''
+        for iteration, exploitability in results:
 
-        plt.plot(x, data)
-        plt.xlabel("Iterations")
-        plt.ylabel("Exploitability")
-        plt.title("Exploitability over iterations")
-        plt.show()
+            self.exploitability_iterations.append(iteration)
+            self.exploitability.append(exploitability)
 
+            if self.metrics is not None:
+                self.metrics.write(iteration, exploitability)
 
-    def train(self, iterations, exploitability_sample=50):
-        
-        print(f"Beginning CFR training with {self.iterations} iterations...")
+    def save_checkpoint(self, path):
+        '''
+        Saves the training state (regret and strategy sums, iteration counter, RNG state and the
+        exploitability series) to a .npz file, see cfr.checkpoint
+
+        :param self: self
+        :param path: checkpoint file
+        '''
+        save_checkpoint(self, path)
+
+    def resume(self, path):
+        '''
+        Restores the training state from a checkpoint, the next train() call continues from it
+
+        :param self: self
+        :param path: checkpoint file written by save_checkpoint
+        '''
+        load_checkpoint(self, path)
+
+    def export_policy(self, path):
+        '''
+        Writes the final strategy to a memory mappable policy file, see cfr.policy_file
+
+        :param self: self
+        :param path: policy file
+        '''
+        write_policy(self.policy_table(), path)
+
+    def policy_table(self):
+        '''
+        Table holding the final strategy that policies and policy files are built from
+
+        :param self: self
+        :return: the training table, Kuhn is never abstracted
+        :rtype: InfostateTable
+        '''
+        return self.table
+
+    def instrument(self, output=None, every=1000):
+        '''
+        Switches on node visit counters and phase timers, see cfr.instrumentation
+
+        :param self: self
+        :param output: path or text file for JSON lines snapshots, None to keep them in memory
+        :param every: iterations between two snapshots
+        :return: the instrumentation, its snapshot() can be read at any time
+        :rtype: Instrumentation
+        '''
+        self.instrumentation = Instrumentation(output, every)
+
+        return self.instrumentation
+
+    def measure_exploitability(self):
+        '''
+        calculate_exploitability(), with the average strategy update and the best responses
+        timed separately when instrumented
+
+        :param self: self
+        :return: exploitability of the final strategy
+        :rtype: Float
+        '''
+        instrumentation = self.instrumentation
+
+        if instrumentation is None:
+            return self.calculate_exploitability()
+
+        instrumentation.start()
+        self.table.final_strategy
+        instrumentation.lap('average_strategy')
+        exploitability = self.calculate_exploitability()
+        instrumentation.lap('exploitability')
+
+        return exploitability
+
+    def train(self, iterations=None, exploitability_sample=50, async_exploitability=False, num_workers=None,
+              checkpoint_path=None, checkpoint_every=10000, metrics_path=None):
+        '''
+        Runs iterations training iterations
+
+        :param self: self
+        :param iterations: number of iterations, self.iterations by default
+        :param exploitability_sample: exploitability is measured every exploitability_sample iterations
+        :param async_exploitability: measure it on strategy snapshots in a background process
+                                     instead of blocking training
+        :param num_workers: train on this many worker processes (see cfr.parallel), each running
+                            exploitability_sample iterations between merges
+        :param checkpoint_path: if set, the training state is saved there every checkpoint_every
+                                iterations and at the end of training (see resume)
+        :param checkpoint_every: iterations between two checkpoints
+        :param metrics_path: .csv or .jsonl file the exploitability series is streamed to
+        '''
+        iterations = iterations if iterations is not None else self.iterations
+
+        print(f"Beginning CFR training with {iterations} iterations...")
+
+        #Exploitability is only measured for the plot or the metrics file
+        measure = self.plot_exploitability or metrics_path is not None
+
+        evaluator = AsyncExploitability(type(self)) if async_exploitability and measure else None
+
+        trainer = ParallelCFR(self, num_workers, batch_iterations=exploitability_sample) if num_workers else None
+
+        if metrics_path is not None:
+            self.metrics = MetricsWriter(metrics_path)
+
+        if self.instrumentation is not None:
+            self.instrumentation.reopen()
 
         start = time.time()
 
-        ten_percent = iterations
+        ten_percent = max(1, iterations // 10)
 
         for i in range(iterations):
             
@@ -52,21 +222,45 @@ class CFR_agent:
 
                 print(f"Training {(i // ten_percent)*10}% Done at iteration {i}")
 
-            #Each game requires new cards shuffle
-            self.cards = random.sample(self.game.cards, 2)
-            
-            #One traversal of the game tree
-            self.CFR("", 1, 1)
-            
-            self.calculate_final_strategy()
+            #Parallel workers run the next exploitability_sample iterations in one round
+            if trainer is None:
+                self.iteration()
+            elif i % exploitability_sample == 0:
+                trainer.run(min(exploitability_sample, iterations - i))
 
             #calculate exploitability every 50 iterations
-            if (self.plot_exploitability & (i % exploitability_sample == 0)):
+            if measure and i % exploitability_sample == 0:
 
-                self.exploitability.append(self.calculate_exploitability())
+                if evaluator is None:
+                    self.join_exploitability([(self.iteration_count, self.measure_exploitability())])
+                else:
+                    evaluator.submit(self.iteration_count, self.table.final_strategy)
+                    self.join_exploitability(evaluator.collect())
+
+            if checkpoint_path is not None and (i + 1) % checkpoint_every == 0:
+
+                self.save_checkpoint(checkpoint_path)
 
         end = time.time()
 
+        if evaluator is not None:
+            self.join_exploitability(evaluator.close())
+
+        if trainer is not None:
+            trainer.close()
+
+        if checkpoint_path is not None:
+            self.save_checkpoint(checkpoint_path)
+
+        #The final snapshot, the output is reopened by the next train() call
+        if self.instrumentation is not None:
+            self.instrumentation.finish(self.iteration_count)
+            self.instrumentation.close()
+
+        if self.metrics is not None:
+            self.metrics.close()
+            self.metrics = None
+
         duration = round((end-start),2)
 
         print(f"Training complete in {duration} seconds!")
@@ -76,10 +270,72 @@ class CFR_agent:
             self.plot_exploitability_func(self.exploitability)
 
 
-    def CFR(self, history, pi_i, pi_i_c):
+    def iteration(self):
+        '''
+        One training iteration: a fresh deal and one traversal of the game tree
+        '''
+        #Each game requires new cards shuffle
+        self.cards = self.rng.sample(self.game.cards, 2)
+        
+        self.iteration_count += 1
+        self._strategy_weight = self.variant.strategy_weight(self.iteration_count)
+
+        instrumentation = self.instrumentation
+        self._visits = instrumentation.visits if instrumentation is not None else None
+
+        #One traversal per updated player, or a single one that updates both
+        for update_player in self.variant.update_players:
+
+            self._update_player = update_player
+
+            if instrumentation is not None:
+                instrumentation.start()
+
+            #Regret matching for every infostate at once, then traverse on plain list rows
+            self._strategy = self.table.regret_matching().tolist()
+            regret_start = self.table.regret_sum.copy()
+            strategy_start = self.table.strategy_sum.copy()
+            self._regret_sum = regret_start.tolist()
+            self._strategy_sum = strategy_start.tolist()
+            self._touched = set()
+
+            if instrumentation is not None:
+                instrumentation.lap('regret_matching')
+
+            #One traversal of the game tree
+            self.CFR(0, 1, 1)
+
+            if instrumentation is not None:
+                instrumentation.lap('traversal')
+
+            #Only the rows updated by this traversal are written back and renormalized later. Their
+            #changes are added in place rather than the rows overwritten, so on shared tables the
+            #updates other workers made during the traversal are kept (see cfr.parallel)
+            touched = list(self._touched)
+
+            if touched:
+                self.table.regret_sum[touched] += np.array([self._regret_sum[row] for row in touched]) - regret_start[touched]
+                self.table.strategy_sum[touched] += np.array([self._strategy_sum[row] for row in touched]) - strategy_start[touched]
+                self.table.touch(touched)
+
+            self.variant.update(self.table, self.iteration_count, self.player_rows[update_player])
+
+            if instrumentation is not None:
+                instrumentation.lap('regret_update')
+
+        if instrumentation is not None:
+            instrumentation.end_iteration(self.iteration_count)
+
+
+    def CFR(self, node, pi_i, pi_i_c):
         
+        history = self.histories[node]
+
         #Visiting a terminal node
-        if self.game.game_finished(history):
+        if not self._children[node]:
+
+            if self._visits is not None:
+                self._visits[TERMINAL] += 1
             
             payout = self.game.getPayouts(history, self.cards)
 
@@ -89,104 +345,63 @@ class CFR_agent:
                 return -payout
 
 
-        player_to_act = self.game.getPlayerToAct(history)
-        #infostates are as following: player to act, player to act's cards, history
-        infostate = str(player_to_act) + str(self.cards[player_to_act]) + history
+        if self._visits is not None:
+            self._visits[DECISION] += 1
 
-        if infostate not in self.infostate_map:
-            self.infostate_map[infostate] = Node(['p', 'b'])
+        player_to_act = self.game.getPlayerToAct(history)
+        #infostates are as following: player to act, player to act's cards, history node
+        infostate = self.encoder.encode(player_to_act, self.cards[player_to_act], node)
+        row = self.table.index[infostate]
             
         actions = self.game.getActions()
 
-        #strategy normalization constant
-        regret_sum_sum = 0
-
-        #Calculate strategy normalization constant
-        for i, action in enumerate(actions):
-            #Calculate the normalization constant 
-            #sum of R+(I,a)
-            R_I_a = self.infostate_map[infostate].regret_sum[i]
-
-            regret_sum_sum += max(R_I_a, 0)
-             
-        if regret_sum_sum > 0:
-
-            #Calculate probability of taking action a
-            for i, action in enumerate(actions):
-                
-                #calculate sig(I,a):
-                R_I_a = self.infostate_map[infostate].regret_sum[i]
-
-                R_plus_I_a = max(R_I_a, 0)
-
-                self.infostate_map[infostate].strategy[i] = R_plus_I_a / regret_sum_sum
-
-        else:
-
-            for i, action in enumerate(actions):
-
-                self.infostate_map[infostate].strategy[i] = 1 / len(actions)
+        strategy = self._strategy[row]
 
         #calculate node value: essentially current expected value with current strategy
         #v_sig_I
         node_expected_value = 0
+        values = [0.0] * len(actions)
 
         for i, action in enumerate(actions):
             
-            strategy_a = self.infostate_map[infostate].strategy[i]
+            strategy_a = strategy[i]
 
             # We always swap the probabilities because the turn always changes in Kuhn Poker
             # Arg 1 (Next Self) = Current Opponent (pi_i_c)
             # Arg 2 (Next Opp)  = Current Self * Strategy (pi_i * strategy_a)
             
-            value_a = -self.CFR(history + action, pi_i_c, pi_i * strategy_a)
+            value_a = -self.CFR(self._children[node][i], pi_i_c, pi_i * strategy_a)
 
-            self.infostate_map[infostate].value[i] = value_a
+            values[i] = value_a
             node_expected_value += strategy_a * value_a
 
+        #With alternating updates only the traversing player's regrets change
+        if self._update_player is not None and self._update_player != player_to_act:
+            return node_expected_value
+
+        regret_sum = self._regret_sum[row]
+        strategy_sum = self._strategy_sum[row]
+        self._touched.add(row)
+
+        #Iteration t's share of the average strategy, 1 for vanilla CFR
+        weighted_pi_i = pi_i * self._strategy_weight
+
         #now reassign the regrets
         for i, action in enumerate(actions):
 
-            #compare v(I,a) against v_sig_i
-            value_a = self.infostate_map[infostate].value[i]
-            strategy_a = self.infostate_map[infostate].strategy[i]
-
             #r(I,a) = v(I,a) - v_sig_i
-            instantaneous_regret_a = value_a - node_expected_value
-            self.infostate_map[infostate].regret_sum[i] += pi_i_c * instantaneous_regret_a
+            instantaneous_regret_a = values[i] - node_expected_value
+            regret_sum[i] += pi_i_c * instantaneous_regret_a
 
             #update strategy sum
             #sig(a) = sig(a) + (pi_i * sig(a))
-            self.infostate_map[infostate].strategy_sum[i] += strategy_a * pi_i
+            strategy_sum[i] += strategy[i] * weighted_pi_i
 
         return node_expected_value
 
     def calculate_final_strategy(self):
 
-        for infostate in self.infostate_map:
-            
-            actions = self.infostate_map[infostate].actions
-
-            #normalization constnat for final strategies
-            final_strategy_sum = 0
-
-            for i, action in enumerate(actions):
-
-                final_strategy_sum += self.infostate_map[infostate].strategy_sum[i] 
-
-            if final_strategy_sum > 0:
-
-                for i, action in enumerate(actions):
-
-                    strategy_sum_a = self.infostate_map[infostate].strategy_sum[i] 
-
-                    self.infostate_map[infostate].final_strategy[i] = strategy_sum_a / final_strategy_sum
-            
-            else:
-
-                for i, action in enumerate(actions):
-
-                    self.infostate_map[infostate].final_strategy[i] = 1 / len(actions)
+        self.table.calculate_final_strategy()
 
     #Recursive function to calculate expected utility
     def expected_utility(self, history, pi_i, pi_i_c):  
@@ -207,7 +422,7 @@ class CFR_agent:
 
         #expected utility = P(b) * v(I,b) + P(p) * v(I,p)
         card = self.cards[player]
-        infostate = str(player) + str(card) + history
+        infostate = self.encoder.encode(player, card, self.node_index[history])
 
         p_p = self.infostate_map[infostate].final_strategy[0]
         p_b = self.infostate_map[infostate].final_strategy[1]
@@ -241,7 +456,7 @@ class CFR_agent:
 
                 self.expected_utility("", 1, 1)
 
-                p1_root = "0" + str(self.cards[0])
+                p1_root = self.encoder.encode(0, self.cards[0], 0)
 
                 p1_expected_utility += (1/6) * self.utility_map[p1_root]
 
@@ -251,19 +466,18 @@ class CFR_agent:
         # 1. Terminal Node
         if self.game.game_finished(history=history):
             # Determine payoff for P0
+            opp_cards = np.arange(3)
+            hero_cards = np.full(3, hero_card)
+
             if opp == 0: # Hero is P1
                 # Opponent is P0, Hero is P1. 
-                card_combos = [[0, hero_card], [1, hero_card], [2, hero_card]]
+                card_combos = np.stack([opp_cards, hero_cards], axis=1)
             else: # Hero is P0
-                card_combos = [[hero_card, 0], [hero_card, 1], [hero_card, 2]]
-
-            payout_J = self.game.getPayouts(history, card_combos[0])
-            payout_Q = self.game.getPayouts(history, card_combos[1])
-            payout_K = self.game.getPayouts(history, card_combos[2])
+                card_combos = np.stack([hero_cards, opp_cards], axis=1)
 
-            # Expected Value = Sum(Payoff * Probability)
+            # Expected Value = Sum(Payoff * Probability), one vectorized payout for every opponent card
             # Note: p_card should be normalized (sum to 1) for this to be an average
-            expected_payout = (payout_J * p_card[0]) + (payout_Q * p_card[1]) + (payout_K * p_card[2])
+            expected_payout = float(self.game.payouts(history, card_combos) @ np.asarray(p_card, dtype=float))
 
             # If Hero is P0, we want positive P0 payout. 
             # If Hero is P1, we want negative P0 payout (assuming zero-sum).
@@ -284,7 +498,7 @@ class CFR_agent:
                 # Calculate probability of opponent taking this action
                 for card in [0, 1, 2]:
 
-                    infostate = str(player) + str(card) + history
+                    infostate = self.encoder.encode(player, card, self.node_index[history])
 
                     p_a_given_card = self.infostate_map[infostate].final_strategy[action] if infostate in self.infostate_map else 0.5
 
@@ -298,7 +512,7 @@ class CFR_agent:
                 new_card_probabilities = [0, 0, 0]
                 for card in [0, 1, 2]:
 
-                    infostate = str(player) + str(card) + history
+                    infostate = self.encoder.encode(player, card, self.node_index[history])
 
                     p_a_given_card = self.infostate_map[infostate].final_strategy[action] if infostate in self.infostate_map else 0.5
 
@@ -1,3 +1,5 @@
+import numpy as np
+
 class KuhnPoker:
 
   def __init__(self): 
@@ -42,6 +44,41 @@ class KuhnPoker:
 
     return 0
 
+  def payouts(self, history, deals):
+    '''
+    Vectorized getPayouts: the payout to player 1 of one history for every deal
+
+    :param history: string history
+    :param deals: (n, 2) array of [p1 card, p2 card]
+    :return: (n,) payouts to player 1
+    :rtype: numpy array
+    '''
+    deals = np.asarray(deals)
+
+    if not self.game_finished(history):
+      return np.zeros(len(deals))
+
+    # Uncontested cases
+    if history == 'bp': return np.ones(len(deals))
+    if history == 'pbp': return -np.ones(len(deals))
+
+    # Showdown cases, the pot is 1 after two passes and 2 after a call
+    stake = 1 if history == 'pp' else 2
+
+    return stake * np.sign(deals[:, 0] - deals[:, 1]).astype(float)
+
   def getActions(self):
 
     return self.actions
+
+  def getHistories(self):
+
+    # Every history reachable from the root, breadth first so the root is always index 0
+    histories = ['']
+
+    for history in histories:
+
+      if not self.game_finished(history):
+        histories.extend(history + action for action in self.actions)
+
+    return histories
@@ -1,13 +1,32 @@
 class Node:
+    '''
+    View of one infostate row of a cfr.tables.InfostateTable, values are indexed like actions
+    '''
 
-    def __init__(self, actions):
+    __slots__ = ('table', 'row', 'actions')
+
+    def __init__(self, table, row):
         
-        self.actions = actions
-        self.regret_sum = [0.0] * len(actions) 
-        self.strategy = [0.0] * len(actions)
-        self.strategy_sum = [0.0] * len(actions)
-        self.value = [0.0] * len(actions)
-        self.final_strategy = [0.0] * len(actions)
+        self.table = table
+        self.row = row
+        self.actions = table.actions[row]
+
+    def _by_index(self, array):
+
+        return array[self.row, :len(self.actions)].tolist()
+
+    @property
+    def regret_sum(self):
+        return self._by_index(self.table.regret_sum)
+
+    @property
+    def strategy(self):
+        return self._by_index(self.table.strategy)
 
-    
+    @property
+    def strategy_sum(self):
+        return self._by_index(self.table.strategy_sum)
 
+    @property
+    def final_strategy(self):
+        return self._by_index(self.table.final_strategy)
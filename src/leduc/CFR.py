@@ -1,51 +1,389 @@
 from .leduc import leduc
 from .nodes import Node
-import matplotlib.pyplot as plt
+from .tree import compile_tree, CHANCE, TERMINAL
+from .public_tree import PublicTree
+from cfr.checkpoint import save_checkpoint, load_checkpoint
+from cfr.encoding import InfostateEncoder
+from cfr.evaluation import AsyncExploitability
+from cfr.instrumentation import Instrumentation
+from cfr.metrics import MetricsWriter
+from cfr.parallel import ParallelCFR
+from cfr.plotting import plot_exploitability
+from cfr.policy_file import write_policy
+from cfr.tables import InfostateTable, InfostateMap
+from cfr.variants import VanillaCFR
+import numpy as np
 import random
 import time
 
 
 class CFR_agent:
 
-    def __init__(self, iterations, plot_strategy_sum, plot_exploitability):
+    #Every iteration samples a deal, see cfr.parallel
+    chance_sampled = True
+
+    #The traversal can skip subtrees of actions deep in negative regret, see enable_pruning
+    supports_pruning = True
+
+    def __init__(self, iterations, plot_strategy_sum, plot_exploitability, dtype=np.float64, variant=None, game=None,
+                 abstraction=None):
+
+        #Any game of the Leduc family, standard Leduc by default
+        self.game = game if game is not None else leduc()
+        self.tree = compile_tree(self.game)
+
+        # Plain list copies of the tree arrays, indexing lists is much faster than numpy scalars
+        self._kind = self.tree.kind.tolist()
+        self._player = self.tree.player.tolist()
+        self._children = self.tree.children.tolist()
+        self._payoffs = self.tree.payoffs.tolist()
 
-        self.game = leduc()
         self.iterations = iterations
         self.plot_strategy_sum = plot_strategy_sum
         self.plot_exploitability = plot_exploitability
-        
-        self.infostate_map = dict()
+
+        #One table row per infostate, keyed by the packed (player, private card, public card, node)
+        self.encoder = InfostateEncoder(self.tree.num_nodes, self.tree.num_ranks, self.tree.num_ranks)
+
+        infostates = self.tree.infostates()
+        self._real_keys = [self.encoder.encode(self._player[node], card, node, board) for node, board, card in infostates]
+        self._real_actions = [self.tree.actions[node] for node, board, card in infostates]
+
+        #With an abstraction (see leduc.abstraction) rows belong to abstract infostates: traversals look
+        #real keys up in self.rows and real_rows expands the abstract strategy back to the real game
+        self.abstraction = abstraction
+
+        if abstraction is None:
+            self.table = InfostateTable(self._real_keys, self._real_actions, dtype=dtype)
+            self.rows = self.table.index
+            self.real_rows = None
+            row_players = self.tree.player[[node for node, board, card in infostates]]
+        else:
+            abstract_keys = abstraction.infostate_keys(self.game, self.tree, infostates).tolist()
+            first = {}
+
+            for i, key in enumerate(abstract_keys):
+                first.setdefault(key, i)
+
+            self.table = InfostateTable(list(first), [self._real_actions[i] for i in first.values()], dtype=dtype)
+            self.real_rows = np.array([self.table.index[key] for key in abstract_keys], dtype=np.int64)
+            self.rows = dict(zip(self._real_keys, self.real_rows.tolist()))
+            row_players = self.tree.player[[infostates[i][0] for i in first.values()]]
+
+        self.infostate_map = InfostateMap(self.table, Node)
         self.utility_map = dict()
+
+        #Regret update rule (vanilla, CFR+, ...) and the table rows each player owns
+        self.variant = variant if variant is not None else VanillaCFR()
+        self.iteration_count = 0
+
+        self.player_rows = {None: slice(None), 0: np.flatnonzero(row_players == 0), 1: np.flatnonzero(row_players == 1)}
         
-        self.deck = [0,0,1,1,2,2]
+        self.deck = list(self.game.cards)
         self.cards = []
+
+        #Deals are drawn from the agent's own stream so parallel workers can be seeded independently
+        self.rng = random.Random()
+
+        #SeedSequence the parallel workers' seeds are spawned from, kept across train() calls and
+        #checkpoints so a resumed run does not replay the same deals (see cfr.parallel)
+        self.worker_seeds = None
+
+        #Public cards by private deal, suits collapsed: (rank, probability) for every distinct rank left
+        self._public_cards = [[self._public_card_ranks(c0, c1) for c1 in range(self.tree.num_ranks)] for c0 in range(self.tree.num_ranks)]
+
+        #Public tree (betting node x board) used for best responses, its decisions follow the table rows
+        self.public_tree = PublicTree(self.tree, self.game.cards)
         self.exploitability = []
+        self.exploitability_iterations = []
+
+        #Opt in counters and timers, see instrument()
+        self.instrumentation = None
+
+        #Streams every measured exploitability to a file while train() runs, see cfr.metrics
+        self.metrics = None
+
+        #Regret based pruning, off until enable_pruning()
+        self._prune_windows = None
+        self._prune = False
+        self._missed = {}
+
+    def _public_card_ranks(self, c0, c1):
+        '''
+        Distinct public card ranks left after the private cards c0 and c1, each weighted by the
+        number of its suits still in the deck
+
+        :param self: self
+        :param c0: player 1 card rank
+        :param c1: player 2 card rank
+        :return: list of (rank, probability)
+        :rtype: list
+        '''
+        remaining = list(self.game.cards)
+
+        for card in (c0, c1):
+            if card in remaining:
+                remaining.remove(card)
+
+        return [(rank, remaining.count(rank) / len(remaining)) for rank in sorted(set(remaining))]
 
     def plot_exploitability_func(self, data):
         '''
         Helper function to plot exploitabilility of the current final strategy over iterations.
+        matplotlib is only imported here, see cfr.plotting
     
         :param self:
-        :param data: exploitability calculated every 50 iterations
+        :param data: exploitability series, measured at self.exploitability_iterations
+        '''
+        plot_exploitability(self.exploitability_iterations, data)
+
+    def join_exploitability(self, results):
         '''
+        Appends (iteration, exploitability) results to the exploitability series
 
-        step = 50
-        x = [i * step for i in range(len(data))]
+        :param self: self
+        :param results: list of (iteration, exploitability), in iteration order
+        '''
+        for iteration, exploitability in results:
 
-        plt.plot(x, data)
-        plt.xlabel("Iterations")
-        plt.ylabel("Exploitability")
-        plt.title("Exploitability over iterations")
-        plt.show()
+            self.exploitability_iterations.append(iteration)
+            self.exploitability.append(exploitability)
 
+            if self.metrics is not None:
+                self.metrics.write(iteration, exploitability)
 
-    def train(self):
-        
+    def save_checkpoint(self, path):
+        '''
+        Saves the training state (regret and strategy sums, iteration counter, RNG states, pruning
+        windows and the exploitability series) to a .npz file, see cfr.checkpoint
+
+        :param self: self
+        :param path: checkpoint file
+        '''
+        self.flush_pruning()
+        save_checkpoint(self, path)
+
+    def resume(self, path):
+        '''
+        Restores the training state from a checkpoint, the next train() call continues from it
+
+        :param self: self
+        :param path: checkpoint file written by save_checkpoint
+        '''
+        load_checkpoint(self, path)
+
+    def export_policy(self, path):
+        '''
+        Writes the final strategy to a memory mappable policy file, see cfr.policy_file
+
+        :param self: self
+        :param path: policy file
+        '''
+        write_policy(self.policy_table(), path)
+
+    def real_strategy(self):
+        '''
+        Final strategy of every real infostate, expanded from the abstract rows when the agent
+        trains in an abstraction
+
+        :param self: self
+        :return: (num_decisions, num_hands, max_actions) final strategy in the public tree's order
+        :rtype: numpy array
+        '''
+        tree = self.public_tree
+        final_strategy = self.table.final_strategy
+
+        if self.real_rows is not None:
+            final_strategy = final_strategy[self.real_rows]
+
+        return final_strategy.reshape(tree.num_decisions, tree.num_hands, tree.max_actions)
+
+    def policy_table(self):
+        '''
+        Table of the real game holding the final strategy, what policies and policy files are
+        built from. It is the training table itself unless the agent trains in an abstraction
+
+        :param self: self
+        :return: table keyed by real infostates
+        :rtype: InfostateTable
+        '''
+        self.flush_pruning()
+
+        if self.real_rows is None:
+            return self.table
+
+        table = InfostateTable(self._real_keys, self._real_actions, dtype=self.table.dtype)
+
+        #A normalized strategy is a valid strategy sum
+        table.strategy_sum[:] = self.table.final_strategy[self.real_rows]
+        table.calculate_final_strategy()
+
+        return table
+
+    def enable_pruning(self, threshold=0.0, full_every=100):
+        '''
+        Switches on regret based pruning in the chance sampled traversal. When a zero probability
+        action has cumulative regret below threshold, a window opens and its subtree is skipped
+        on the next visits of the infostate. Every skipped visit takes an upper bound of the
+        regret the action could have gained off the window's slack (initially -regret): the
+        counterfactual reach times the gap between the best payoff reachable below the action for
+        the deal and the infostate's value. The window ends on the visit the slack runs out, when
+        the regret could have turned positive, and on the full traversals every full_every
+        iterations.
+
+        Skipped visits are not lost. Each one records its counterfactual weight for the deal and
+        the infostate's value, and when the window ends _catch_up replays them: nothing below a
+        zero probability action changes during its window, so one traversal of the subtree per
+        distinct deal, weighted by the summed reach of its visits, adds exactly the regrets the
+        skipped visits would have added to the action and to every infostate below it. The
+        opponent's traversals skip the subtree as well and the replay adds the opponent's strategy
+        sums they missed. With alternating vanilla CFR a pruned run flushed after every iteration
+        (flush_pruning) matches an unpruned one, a longer window batches its visits' updates into
+        one. Discounted variants do not discount the skipped visits, and in an abstraction the
+        subtree's rows can also change through other infostates sharing them.
+
+        Pruning needs alternating updates, e.g. VanillaCFR(alternating=True). With simultaneous
+        updates the opponent's strategy sums inside the subtree are updated on the same traversal,
+        so there an action is only pruned where the opponent's reach is zero and the subtree
+        updates nothing. Regrets that never go negative (CFR+) are never pruned.
+
+        :param self: self
+        :param threshold: regret below which zero probability actions are pruned, at most 0
+        :param full_every: iterations between two full traversals, which end every window
+        '''
+        if not self.supports_pruning:
+            raise ValueError(f"{type(self).__name__} does not support regret based pruning")
+
+        self._prune_threshold = min(threshold, 0.0)
+        self._prune_full_every = full_every
+
+        #Pruning window of each (row, action): the regret the action can still gain before it could
+        #turn positive, 0 for none. And what its skipped visits missed, see _catch_up: [weighted
+        #sum of the infostate's values, acting player's weight and opponent's weight by (child
+        #node, cards), acting player]. An abstract row can stand for several nodes
+        self._prune_windows = np.zeros(self.table.strategy.shape).tolist()
+        self._missed = {}
+
+        #Best payoff each player can reach below every node for every deal, boards averaged at chance nodes
+        tree = self.tree
+        num_ranks = tree.num_ranks
+        board_probability = np.zeros((num_ranks, num_ranks, num_ranks))
+
+        for c0 in range(num_ranks):
+            for c1 in range(num_ranks):
+                for card, probability in self._public_cards[c0][c1]:
+                    board_probability[c0, c1, card] = probability
+
+        best = np.zeros((tree.num_nodes, 2, num_ranks, num_ranks, num_ranks))
+
+        for node in range(tree.num_nodes - 1, -1, -1):
+
+            if self._kind[node] == TERMINAL:
+                best[node] = tree.payoffs[node], -tree.payoffs[node]
+            elif self._kind[node] == CHANCE:
+                best[node] = (best[self._children[node][0]] * board_probability).sum(-1, keepdims=True)
+            else:
+                best[node] = best[self._children[node][:tree.num_actions[node]]].max(0)
+
+        self._best_payoffs = best.tolist()
+
+        #Subtree size of every node as (a, b): a + b * (public card ranks of the deal) nodes
+        sizes = [None] * self.tree.num_nodes
+
+        for node in range(self.tree.num_nodes - 1, -1, -1):
+
+            children = self.tree.children[node][:self.tree.num_actions[node]] if self._kind[node] != CHANCE else []
+
+            if self._kind[node] == CHANCE:
+                sizes[node] = (1, sizes[self._children[node][0]][0])
+            else:
+                sizes[node] = (1 + sum(sizes[child][0] for child in children), sum(sizes[child][1] for child in children))
+
+        self._subtree_sizes = sizes
+        self.nodes_pruned = 0
+        self.nodes_total = 0
+
+    def pruned_fraction(self):
+        '''
+        Fraction of the node visits of full traversals that pruning skipped so far
+
+        :param self: self
+        :return: pruned nodes / nodes a traversal without pruning would have visited
+        :rtype: Float
+        '''
+        if self._prune_windows is None or self.nodes_total == 0:
+            return 0.0
+
+        return self.nodes_pruned / self.nodes_total
+
+    def instrument(self, output=None, every=1000):
+        '''
+        Switches on node visit counters and phase timers, see cfr.instrumentation
+
+        :param self: self
+        :param output: path or text file for JSON lines snapshots, None to keep them in memory
+        :param every: iterations between two snapshots
+        :return: the instrumentation, its snapshot() can be read at any time
+        :rtype: Instrumentation
+        '''
+        self.instrumentation = Instrumentation(output, every)
+
+        return self.instrumentation
+
+    def measure_exploitability(self):
+        '''
+        calculate_exploitability(), with the average strategy update and the best responses
+        timed separately when instrumented
+
+        :param self: self
+        :return: exploitability of the final strategy
+        :rtype: Float
+        '''
+        instrumentation = self.instrumentation
+
+        if instrumentation is None:
+            return self.calculate_exploitability()
+
+        instrumentation.start()
+        self.table.final_strategy
+        instrumentation.lap('average_strategy')
+        exploitability = self.calculate_exploitability()
+        instrumentation.lap('exploitability')
+
+        return exploitability
+
+    def train(self, exploitability_sample=100, async_exploitability=False, num_workers=None,
+              checkpoint_path=None, checkpoint_every=10000, metrics_path=None):
+        '''
+        Runs self.iterations training iterations
+
+        :param self: self
+        :param exploitability_sample: exploitability is measured every exploitability_sample iterations
+        :param async_exploitability: measure it on strategy snapshots in a background process
+                                     instead of blocking training
+        :param num_workers: train on this many worker processes (see cfr.parallel), each running
+                            exploitability_sample iterations between merges
+        :param checkpoint_path: if set, the training state is saved there every checkpoint_every
+                                iterations and at the end of training (see resume)
+        :param checkpoint_every: iterations between two checkpoints
+        :param metrics_path: .csv or .jsonl file the exploitability series is streamed to
+        '''
         print(f"Beginning CFR training with {self.iterations} iterations...")
 
+        agent_kwargs = {'game': self.game, 'abstraction': self.abstraction}
+        evaluator = AsyncExploitability(type(self), agent_kwargs=agent_kwargs) if async_exploitability else None
+
+        trainer = ParallelCFR(self, num_workers, batch_iterations=exploitability_sample) if num_workers else None
+
+        if metrics_path is not None:
+            self.metrics = MetricsWriter(metrics_path)
+
+        if self.instrumentation is not None:
+            self.instrumentation.reopen()
+
         start = time.time()
 
-        ten_percent = self.iterations // 10
+        ten_percent = max(1, self.iterations // 10)
 
         for i in range(self.iterations):
             
@@ -53,299 +391,458 @@ class CFR_agent:
 
                 print(f"Training {(i // ten_percent)*10}% Done at iteration {i}")
 
-            #Each game requires new cards shuffle
-            random.shuffle(self.deck)
-            
-            self.cards = [self.deck[0], self.deck[1]]
+            #Parallel workers run the next exploitability_sample iterations in one round
+            if trainer is None:
+                self.iteration()
+            elif i % exploitability_sample == 0:
+                trainer.run(min(exploitability_sample, self.iterations - i))
 
-            #One traversal of the game tree
-            self.CFR("", 1, 1, 1)
-            
-            if i % 100 == 0:
+            if i % exploitability_sample == 0:
+
+                self.flush_pruning()
 
-                self.calculate_final_strategy()
-                self.exploitability.append(self.calculate_exploitability())
+                if evaluator is None:
+                    self.join_exploitability([(self.iteration_count, self.measure_exploitability())])
+                else:
+                    evaluator.submit(self.iteration_count, self.table.final_strategy)
+                    self.join_exploitability(evaluator.collect())
+
+            if checkpoint_path is not None and (i + 1) % checkpoint_every == 0:
+
+                self.save_checkpoint(checkpoint_path)
 
         end = time.time()
 
+        if evaluator is not None:
+            self.join_exploitability(evaluator.close())
+
+        if trainer is not None:
+            trainer.close()
+
+        self.flush_pruning()
+
+        if checkpoint_path is not None:
+            self.save_checkpoint(checkpoint_path)
+
+        #The final snapshot, the output is reopened by the next train() call
+        if self.instrumentation is not None:
+            self.instrumentation.finish(self.iteration_count)
+            self.instrumentation.close()
+
+        if self._prune_windows is not None:
+            print(f"Regret based pruning skipped {self.pruned_fraction():.1%} of the nodes")
+
+        if self.metrics is not None:
+            self.metrics.close()
+            self.metrics = None
+
         duration = round((end-start),2)
 
         print(f"Training complete in {duration} seconds!")
 
-        self.plot_exploitability_func(self.exploitability)
+        if self.plot_exploitability:
 
+            self.plot_exploitability_func(self.exploitability)
 
-    def CFR(self, history, pi_i, pi_i_c, pi_c):
+
+    def iteration(self):
+        '''
+        One training iteration: a fresh shuffle and one chance sampled traversal of the tree
+        '''
+        #Each game requires new cards shuffle, drawn from the full deck so the deal only depends on self.rng
+        self.deck = self.rng.sample(self.game.cards, len(self.game.cards))
         
+        self.cards = [self.deck[0], self.deck[1]]
+
+        self.iteration_count += 1
+        self._strategy_weight = self.variant.strategy_weight(self.iteration_count)
+
+        instrumentation = self.instrumentation
+        self._visits = instrumentation.visits if instrumentation is not None else None
+
+        #Pruning skips subtrees except on the periodic full traversals
+        if self._prune_windows is not None:
+            self._prune = self.iteration_count % self._prune_full_every != 0
+            self._num_public = len(self._public_cards[self.cards[0]][self.cards[1]])
+
+        #One traversal per updated player, or a single one that updates both
+        for update_player in self.variant.update_players:
+
+            self._update_player = update_player
+
+            if self._prune_windows is not None:
+                root = self._subtree_sizes[0]
+                self.nodes_total += root[0] + root[1] * self._num_public
+
+            if instrumentation is not None:
+                instrumentation.start()
+
+            start = self._begin_traversal()
+
+            if instrumentation is not None:
+                instrumentation.lap('regret_matching')
+
+            #One traversal of the game tree
+            self.CFR(0, 1, 1, 1)
+
+            if instrumentation is not None:
+                instrumentation.lap('traversal')
+
+            self._end_traversal(start)
+
+            self.variant.update(self.table, self.iteration_count, self.player_rows[update_player])
+
+            if instrumentation is not None:
+                instrumentation.lap('regret_update')
+
+        if instrumentation is not None:
+            instrumentation.end_iteration(self.iteration_count)
+
+    def _begin_traversal(self):
+        '''
+        Regret matching for every infostate at once, the traversal then runs on plain list rows
+
+        :return: the regret and strategy sums at the start, for _end_traversal
+        :rtype: tuple
+        '''
+        self._strategy = self.table.regret_matching().tolist()
+        regret_start = self.table.regret_sum.copy()
+        strategy_start = self.table.strategy_sum.copy()
+        self._regret_sum = regret_start.tolist()
+        self._strategy_sum = strategy_start.tolist()
+        self._touched = set()
+
+        return regret_start, strategy_start
+
+    def _end_traversal(self, start):
+        '''
+        Only the rows updated by the traversal are written back and renormalized later. Their
+        changes are added in place rather than the rows overwritten, so on shared tables the
+        updates other workers made during the traversal are kept (see cfr.parallel)
+
+        :param start: what _begin_traversal returned
+        '''
+        regret_start, strategy_start = start
+        touched = list(self._touched)
+
+        if touched:
+            self.table.regret_sum[touched] += np.array([self._regret_sum[row] for row in touched]) - regret_start[touched]
+            self.table.strategy_sum[touched] += np.array([self._strategy_sum[row] for row in touched]) - strategy_start[touched]
+            self.table.touch(touched)
+
+    def CFR(self, node, pi_0, pi_1, pi_c):
+        '''
+        One chance sampled CFR traversal of the compiled tree.
+
+        :param node: node id in self.tree
+        :param pi_0: player 1 reach probability
+        :param pi_1: player 2 reach probability
+        :param pi_c: chance reach probability
+        :return: expected value of the node for player 1
+        :rtype: Float
+        '''
+        kind = self._kind[node]
+
+        if self._visits is not None:
+            self._visits[kind] += 1
+
         #Visiting a terminal node
-        if self.game.terminal(history):
-            
-            payout = self.game.payout(history, self.cards)
+        if kind == TERMINAL:
 
-            if self.game.player_to_act(history) == 0:
-                return payout
-            else:
-                return -payout
+            public_card = self.cards[2] if len(self.cards) > 2 else 0
 
-        #Visiting a chance node
-        if self.game.r1_over(history):
+            return self._payoffs[node][self.cards[0]][self.cards[1]][public_card]
+
+        #Visiting a chance node: suits of the same rank lead to identical subtrees, so every
+        #distinct rank is walked once with the probability of all its suits
+        if kind == CHANCE:
             
             cf_value = 0
+            child = self._children[node][0]
 
-            for i in range(2, len(self.deck)):
+            for card, probability in self._public_cards[self.cards[0]][self.cards[1]]:
                 
-                self.cards.append(self.deck[i])
-                cf_value += (1/4) * self.CFR(history=history + ":", pi_i=pi_i, pi_i_c=pi_i_c, pi_c= pi_c*(1/4))
+                self.cards.append(card)
+                cf_value += probability * self.CFR(child, pi_0, pi_1, pi_c * probability)
                 self.cards.pop()
 
             return cf_value
 
-        player_to_act = self.game.player_to_act(history)
+        player_to_act = self._player[node]
 
         #infostate must contain the new card once the second round starts
-        public_card = ""
+        public_card = -1
         if len(self.cards) > 2: 
 
             public_card = self.cards[2]
 
-        infostate = str(player_to_act) + str(self.cards[player_to_act]) + str(public_card) + history
+        infostate = self.encoder.encode(player_to_act, self.cards[player_to_act], node, public_card)
+        row = self.rows[infostate]
+
+        children = self._children[node]
+        num_actions = len(self.tree.actions[node])
+
+        strategy = self._strategy[row]
+
+        #calculate node value: essentially current expected value with current strategy
+        #v_sig_I, from the point of view of the player to act
+        node_expected_value = 0
+        values = [0.0] * num_actions
 
-        if infostate not in self.infostate_map:
-            self.infostate_map[infostate] = Node(self.game.actions(history=history))
+        #Regret based pruning opens and closes windows where this traversal updates the actor's
+        #regrets, with simultaneous updates only where the opponent's reach is zero so no strategy
+        #sum is lost. The opponent's traversal skips the open windows too, see _catch_up
+        windows = None
+        deferred = None
+        pruned = None
+
+        if self._prune_windows is not None:
+            update_player = self._update_player
+
+            if update_player == player_to_act or (update_player is None and (pi_1 if player_to_act == 0 else pi_0) == 0):
+                windows = self._prune_windows[row]
+                row_regrets = self._regret_sum[row]
+
+            elif update_player is not None and self._prune:
+                deferred = self._prune_windows[row]
+
+        for i in range(num_actions):
             
-        actions = self.game.actions(history=history)
+            strategy_a = strategy[i]
 
-        #strategy normalization constant
-        regret_sum_sum = 0
+            if deferred is not None and strategy_a == 0 and deferred[i] > 0:
 
-        #Calculate strategy normalization constant
-        for i, action in enumerate(actions):
-            #Calculate the normalization constant 
-            #sum of R+(I,a)
-            R_I_a = self.infostate_map[infostate].regret_sum.get(action, 0)
+                a, b = self._subtree_sizes[children[i]]
+                self.nodes_pruned += a + b * self._num_public
 
-            regret_sum_sum += max(R_I_a, 0)
-             
-        if regret_sum_sum > 0:
+                weight = (pi_1 if player_to_act == 0 else pi_0) * self._strategy_weight
 
-            #Calculate probability of taking action a
-            for i, action in enumerate(actions):
-                
-                #calculate sig(I,a):
-                R_I_a = self.infostate_map[infostate].regret_sum.get(action,0)
+                if weight:
 
-                R_plus_I_a = max(R_I_a, 0)
+                    missed = self._missed.get((row, i))
 
-                self.infostate_map[infostate].strategy[action] = R_plus_I_a / regret_sum_sum
+                    if missed is None:
+                        missed = self._missed[(row, i)] = [0.0, {}, {}, player_to_act]
 
-        else:
+                    deal = (children[i], *self.cards)
+                    missed[2][deal] = missed[2].get(deal, 0.0) + weight
 
-            for i, action in enumerate(actions):
+                continue
 
-                self.infostate_map[infostate].strategy[action] = 1 / len(actions)
+            #Zero probability actions inside a pruning window are skipped. On a full traversal the
+            #window ends, its skipped visits are caught up and the action traversed. A regret below
+            #the threshold opens a new window
+            if windows is not None and (strategy_a == 0 or windows[i]):
 
-        #calculate node value: essentially current expected value with current strategy
-        #v_sig_I
-        node_expected_value = 0
+                window = windows[i]
+                skip = self._prune and strategy_a == 0
 
-        for i, action in enumerate(actions):
-            
-            strategy_a = self.infostate_map[infostate].strategy.get(action, 0)
+                if window and skip:
+                    pass
 
-            # We always swap the probabilities because the turn always changes in Kuhn Poker
-            # Arg 1 (Next Self) = Current Opponent (pi_i_c)
-            # Arg 2 (Next Opp)  = Current Self * Strategy (pi_i * strategy_a)
-            
-            value_a = -self.CFR(history + action, pi_i_c, pi_i * strategy_a, pi_c)
+                elif window:
+                    self._catch_up(row, i)
+                    windows[i] = 0.0
+                    skip = False
+
+                elif skip and row_regrets[i] < self._prune_threshold:
+                    windows[i] = -row_regrets[i]
+
+                else:
+                    skip = False
+
+                if skip:
+
+                    a, b = self._subtree_sizes[children[i]]
+                    self.nodes_pruned += a + b * self._num_public
 
-            self.infostate_map[infostate].value[action] = value_a
+                    if pruned is None:
+                        pruned = [False] * num_actions
+
+                    pruned[i] = True
+                    continue
+
+            # The tree returns values for player 1, so flip the sign when player 2 acts.
+            # Only the acting player's reach probability is scaled by the strategy.
+            if player_to_act == 0:
+                value_a = self.CFR(children[i], pi_0 * strategy_a, pi_1, pi_c)
+            else:
+                value_a = -self.CFR(children[i], pi_0, pi_1 * strategy_a, pi_c)
+
+            values[i] = value_a
             node_expected_value += strategy_a * value_a
 
-        #now reassign the regrets
-        for i, action in enumerate(actions):
+        #With alternating updates only the traversing player's regrets change
+        if self._update_player is not None and self._update_player != player_to_act:
+            return node_expected_value if player_to_act == 0 else -node_expected_value
+
+        if player_to_act == 0:
+            pi_i, pi_i_c = pi_0, pi_1
+        else:
+            pi_i, pi_i_c = pi_1, pi_0
+
+        #Iteration t's share of the average strategy, 1 for vanilla CFR
+        weighted_pi_i = pi_i * self._strategy_weight
 
-            #compare v(I,a) against v_sig_i
-            value_a = self.infostate_map[infostate].value.get(action, 0)
-            strategy_a = self.infostate_map[infostate].strategy.get(action,0)
+        regret_sum = self._regret_sum[row]
+        strategy_sum = self._strategy_sum[row]
+        self._touched.add(row)
+
+        #now reassign the regrets, pruned actions record the visit for their catch-up instead
+        for i in range(num_actions):
+
+            if pruned is not None and pruned[i]:
+
+                weight = pi_c * pi_i_c
+
+                if weight == 0:
+                    continue
+
+                missed = self._missed.get((row, i))
+
+                if missed is None:
+                    missed = self._missed[(row, i)] = [0.0, {}, {}, player_to_act]
+
+                deal = (children[i], *self.cards)
+                missed[0] += weight * node_expected_value
+                missed[1][deal] = missed[1].get(deal, 0.0) + weight
+
+                #Once the regret could have turned positive the window ends right away, so the
+                #rest of the iteration sees the caught up regret
+                best = self._best_payoffs[children[i]][player_to_act][self.cards[0]][self.cards[1]][public_card]
+                window = windows[i] - weight * (best - node_expected_value)
+
+                if window > 0:
+                    windows[i] = window
+                else:
+                    self._catch_up(row, i)
+                    windows[i] = 0.0
+
+                continue
 
             #r(I,a) = v(I,a) - v_sig_i
-            instantaneous_regret_a = value_a - node_expected_value
-            self.infostate_map[infostate].regret_sum[action] = self.infostate_map[infostate].regret_sum.get(action,0) +  pi_c * pi_i_c * instantaneous_regret_a
+            instantaneous_regret_a = values[i] - node_expected_value
+            regret_sum[i] += pi_c * pi_i_c * instantaneous_regret_a
 
             #update strategy sum
             #sig(a) = sig(a) + (pi_i * sig(a))
-            self.infostate_map[infostate].strategy_sum[action] = self.infostate_map[infostate].strategy_sum.get(action,0) + strategy_a * pi_i
+            strategy_sum[i] += strategy[i] * weighted_pi_i
 
-        return node_expected_value
+        return node_expected_value if player_to_act == 0 else -node_expected_value
 
-    def calculate_final_strategy(self):
+    def flush_pruning(self):
+        '''
+        Replays the skipped visits of every pruning window right away, so the regret and strategy
+        sums hold every iteration so far. The windows stay open. Everything that reads the sums
+        (train(), calculate_final_strategy(), calculate_exploitability(), policy_table(),
+        save_checkpoint()) does it first, no-op without pruning
 
-        for infostate in self.infostate_map:
-            
-            actions = self.infostate_map[infostate].actions
+        :param self: self
+        '''
+        if not self._missed:
+            return
 
-            #normalization constnat for final strategies
-            final_strategy_sum = 0
+        prune, update_player = self._prune, self._update_player
 
-            for i, action in enumerate(actions):
+        #Nested windows below a replayed action are caught up on the way
+        self._prune = False
+        start = self._begin_traversal()
 
-                final_strategy_sum += self.infostate_map[infostate].strategy_sum.get(action, 0)
+        for row, action in list(self._missed):
 
-            if final_strategy_sum > 0:
+            if (row, action) in self._missed:
+                self._catch_up(row, action)
 
-                for i, action in enumerate(actions):
+        self._end_traversal(start)
+        self._prune, self._update_player = prune, update_player
 
-                    strategy_sum_a = self.infostate_map[infostate].strategy_sum.get(action,0)
+    def _catch_up(self, row, action):
+        '''
+        Replays the visits a pruning window skipped. The action has zero probability throughout
+        the window, so nothing below it changes and its subtree plays the same for every deal: one
+        traversal per distinct deal, with the opponent's reach set to the summed weight of its
+        skipped visits, adds exactly what those visits would have added with that play. The
+        acting player's traversals add the regrets of the action and of every infostate below it,
+        the opponent's traversals only the opponent's strategy sums below it
+
+        :param row: table row of the infostate
+        :param action: action index
+        '''
+        missed = self._missed.pop((row, action), None)
 
-                    self.infostate_map[infostate].final_strategy[action] = strategy_sum_a / final_strategy_sum
-            
+        if missed is None:
+            return
+
+        value_sum, deals, opponent_deals, player = missed
+        cards, num_public = self.cards, self._num_public
+        strategy_weight = self._strategy_weight
+        regret = -value_sum
+
+        self._update_player = player
+
+        for (child, *deal), weight in deals.items():
+
+            self._replay(deal, child)
+
+            if player == 0:
+                regret += weight * self.CFR(child, 0.0, weight, 1.0)
             else:
+                regret -= weight * self.CFR(child, weight, 0.0, 1.0)
+
+        #The opponent's strategy weights are already part of its reach
+        self._update_player, self._strategy_weight = 1 - player, 1.0
+
+        for (child, *deal), weight in opponent_deals.items():
+
+            self._replay(deal, child)
+
+            if player == 0:
+                self.CFR(child, 0.0, weight, 1.0)
+            else:
+                self.CFR(child, weight, 0.0, 1.0)
+
+        self.cards, self._num_public = cards, num_public
+        self._update_player, self._strategy_weight = player, strategy_weight
+        self._regret_sum[row][action] += regret
+        self._touched.add(row)
+
+    def _replay(self, deal, child):
+        '''
+        Sets up the traversal of a pruned subtree for a deal, its nodes no longer count as pruned
+
+        :param deal: list of card ranks, the public card last if dealt
+        :param child: child node of the pruned action
+        '''
+        self.cards = deal
+        self._num_public = len(self._public_cards[deal[0]][deal[1]])
+
+        a, b = self._subtree_sizes[child]
+        self.nodes_pruned -= a + b * self._num_public
 
-                for i, action in enumerate(actions):
+    def calculate_final_strategy(self):
 
-                    self.infostate_map[infostate].final_strategy[action] = 1 / len(actions)
+        self.flush_pruning()
+        self.table.calculate_final_strategy()
     
     def calculate_exploitability(self):
-        """
-        Calculates the exploitability of the final strategy by computing the 
-        best response value for each player position.
-        """
-        
-        # 1. Calculate Best Response Value for Player 0 (when P1 plays fixed strategy)
-        # We iterate over all possible initial deals to get the exact Game Value.
-        br_value_p0 = 0
-        br_value_p1 = 0
-        
-        # We need a fresh sorted deck to iterate all permutations
-        full_deck = [0, 0, 1, 1, 2, 2]
-        import itertools
-        
-        # Total permutations of 2 cards from 6
-        n_deals = 30 # 6 * 5
-        
-        # --- Calculate BR for Player 0 (P1 is fixed to final_strategy) ---
-        for card_p0, card_p1 in itertools.permutations(full_deck, 2):
-            # Form the initial cards state. 
-            # Note: We pass the specific deck minus these cards to the helper
-            remaining_deck = list(full_deck)
-            remaining_deck.remove(card_p0)
-            remaining_deck.remove(card_p1)
-            
-            # Recursively calculate value. History is empty.
-            # br_player is 0. 
-            val = self._get_best_response_value(
-                history="", 
-                cards=[card_p0, card_p1], 
-                remaining_deck=remaining_deck, 
-                br_player=0
-            )
-            br_value_p0 += val
-            
-        br_value_p0 /= n_deals
+        '''
+        Exploitability of the final strategy: the average of both players' best response values.
 
-        # --- Calculate BR for Player 1 (P0 is fixed to final_strategy) ---
-        for card_p0, card_p1 in itertools.permutations(full_deck, 2):
-            remaining_deck = list(full_deck)
-            remaining_deck.remove(card_p0)
-            remaining_deck.remove(card_p1)
-            
-            # br_player is 1.
-            val = self._get_best_response_value(
-                history="", 
-                cards=[card_p0, card_p1], 
-                remaining_deck=remaining_deck, 
-                br_player=1
-            )
-            br_value_p1 += val
-
-        br_value_p1 /= n_deals
-        
-        # Exploitability is the average of how much the BR wins in each position.
-        # Since it's zero sum:
-        # If P0 is fixed, P1 (BR) wins X. (br_value_p1)
-        # If P1 is fixed, P0 (BR) wins Y. (br_value_p0)
-        # Total Exploitability = X + Y. Average = (X+Y)/2
-        return (br_value_p0 + br_value_p1) / 2
-
-    def _get_best_response_value(self, history, cards, remaining_deck, br_player):
-        """
-        Helper to traverse the game tree for Best Response calculation.
-        br_player: The player who is playing optimally (Best Response).
-        The other player plays according to self.infostate_map['final_strategy'].
-        """
-        
-        # 1. Terminal Node
-        if self.game.terminal(history):
-            payout = self.game.payout(history, cards)
-            # Payout is usually for Player 0.
-            # If we want value for br_player:
-            if br_player == 0:
-                return payout
-            else:
-                return -payout
-
-        # 2. Chance Node (End of Round 1)
-        if self.game.r1_over(history):
-            expected_value = 0
-            # Chance node logic: average over all remaining cards
-            # In BR calculation, we are exact, so we iterate all remaining cards
-            # distinct values only? No, standard probability weight implies iterating list.
-            count = 0
-            for card in remaining_deck:
-                # Add public card to cards list temporarily
-                new_cards = cards + [card]
-                # Pass a copy of deck without this card (optional optimization, 
-                # but technically round 2 has no more dealing so list doesn't matter much)
-                
-                # Recursive call
-                # Note: history changes usually by appending ":" or handling state transition
-                # Assuming ":" as per your CFR code
-                expected_value += self._get_best_response_value(
-                    history + ":", 
-                    new_cards, 
-                    remaining_deck, # Deck state doesn't change further in Leduc
-                    br_player
-                )
-                count += 1
-            
-            return expected_value / count
+        Each best response is one bottom up pass over the public tree with the opponent's hands
+        kept as a belief vector, so every deal is covered at once and the best responder only
+        knows their own card and the board. It is always measured in the real game, an abstract
+        strategy is expanded first.
 
-        # 3. Decision Node
-        player_to_act = self.game.player_to_act(history)
-        actions = self.game.actions(history)
-        
-        # Determine Infostate Key
-        public_card = ""
-        if len(cards) > 2:
-            public_card = cards[2]
-        
-        # Key must match the CFR training key generation
-        infostate = str(player_to_act) + str(cards[player_to_act]) + str(public_card) + history
-
-        # CASE A: It is the Best Responder's turn. They maximize EV.
-        if player_to_act == br_player:
-            best_value = -float('inf')
-            for action in actions:
-                val = self._get_best_response_value(history + action, cards, remaining_deck, br_player)
-                if val > best_value:
-                    best_value = val
-            return best_value
-
-        # CASE B: It is the Opponent's turn. They play Fixed Strategy.
-        else:
-            node_value = 0
-            
-            # Retrieve strategy from map. If missing, default to uniform (or random).
-            if infostate in self.infostate_map:
-                strategy = self.infostate_map[infostate].final_strategy
-            else:
-                # Should not happen often if training covered tree, but safe fallback
-                strategy = {a: 1.0/len(actions) for a in actions}
-            
-            for action in actions:
-                prob = strategy.get(action, 0)
-                if prob > 0:
-                    val = self._get_best_response_value(history + action, cards, remaining_deck, br_player)
-                    node_value += prob * val
-            
-            return node_value
\ No newline at end of file
+        :param self: self
+        :return: exploitability in chips per hand
+        :rtype: Float
+        '''
+        self.flush_pruning()
+
+        tree = self.public_tree
+        sigma = tree.sigma_rows(self.real_strategy())
+
+        br_value_p0 = tree.best_response(sigma, 0).sum()
+        br_value_p1 = tree.best_response(sigma, 1).sum()
+
+        return float(br_value_p0 + br_value_p1) / 2
@@ -0,0 +1,218 @@
+from .CFR import CFR_agent
+from .tree import CHANCE, TERMINAL
+import numpy as np
+import random
+
+
+class MCCFR_agent(CFR_agent):
+    '''
+    Monte Carlo CFR for Leduc on the compiled tree.
+
+    Every iteration samples one full deal (both private cards and the public card) and runs one
+    traversal per player:
+
+        external - the traverser enumerates all of their own actions, chance and the opponent's
+                   actions are sampled from the current strategy
+        outcome  - a single trajectory is sampled, the traverser explores with probability epsilon
+                   and the sampled values are importance weighted
+
+    Regrets and strategy sums are written into the same InfostateTable as the other agents, so
+    exploitability, infostate_map and the printing scripts work unchanged.
+    '''
+
+    #Sampling already skips most of the tree
+    supports_pruning = False
+
+    def __init__(self, iterations, plot_strategy_sum, plot_exploitability, dtype=np.float64, variant=None,
+                 sampling='external', epsilon=0.6, seed=None, game=None, abstraction=None):
+
+        super().__init__(iterations, plot_strategy_sum, plot_exploitability, dtype=dtype, variant=variant, game=game,
+                         abstraction=abstraction)
+
+        if sampling not in ('external', 'outcome'):
+            raise ValueError(f"Unknown sampling mode {sampling}, expected 'external' or 'outcome'")
+
+        self.sampling = sampling
+        self.epsilon = epsilon
+        self.rng = random.Random(seed)
+
+        self._round = self.tree.round.tolist()
+        self._num_actions = self.tree.num_actions.tolist()
+
+    def iteration(self):
+        '''
+        One MCCFR iteration: a sampled deal, then one traversal per player
+        '''
+        self.iteration_count += 1
+        self._strategy_weight = self.variant.strategy_weight(self.iteration_count)
+
+        #Both private cards and the public card are sampled up front
+        self.cards = self.rng.sample(self.game.cards, 3)
+
+        instrumentation = self.instrumentation
+        self._visits = instrumentation.visits if instrumentation is not None else None
+
+        for traverser in (0, 1):
+
+            if instrumentation is not None:
+                instrumentation.start()
+
+            #Regret matching happens row by row inside the traversal
+            if self.sampling == 'external':
+                self.external_sampling(0, traverser)
+            else:
+                self.outcome_sampling(0, traverser, 1, 1, 1)
+
+            if instrumentation is not None:
+                instrumentation.lap('traversal')
+
+            self.variant.update(self.table, self.iteration_count, self.player_rows[traverser])
+
+            if instrumentation is not None:
+                instrumentation.lap('regret_update')
+
+        if instrumentation is not None:
+            instrumentation.end_iteration(self.iteration_count)
+
+    def _row_strategy(self, node):
+        '''
+        Table row of the infostate at a decision node and its current (regret matching) strategy
+        '''
+        player = self._player[node]
+        public_card = self.cards[2] if self._round[node] > 0 else -1
+
+        row = self.rows[self.encoder.encode(player, self.cards[player], node, public_card)]
+        num_actions = self._num_actions[node]
+
+        regrets = self.table.regret_sum[row, :num_actions].tolist()
+        positive = [r if r > 0 else 0.0 for r in regrets]
+        total = sum(positive)
+
+        if total > 0:
+            strategy = [r / total for r in positive]
+        else:
+            strategy = [1 / num_actions] * num_actions
+
+        return row, strategy
+
+    def _sample(self, probabilities):
+
+        x = self.rng.random()
+        cumulative = 0
+
+        for i, p in enumerate(probabilities):
+            cumulative += p
+            if x < cumulative:
+                return i
+
+        return len(probabilities) - 1
+
+    def external_sampling(self, node, traverser):
+        '''
+        External sampling traversal
+
+        :param node: node id in self.tree
+        :param traverser: player whose regrets are updated
+        :return: sampled counterfactual value of the node for the traverser
+        :rtype: Float
+        '''
+        kind = self._kind[node]
+
+        if self._visits is not None:
+            self._visits[kind] += 1
+
+        if kind == TERMINAL:
+
+            payout = self._payoffs[node][self.cards[0]][self.cards[1]][self.cards[2]]
+
+            return payout if traverser == 0 else -payout
+
+        #The public card was sampled with the deal
+        if kind == CHANCE:
+            return self.external_sampling(self._children[node][0], traverser)
+
+        children = self._children[node]
+        row, strategy = self._row_strategy(node)
+
+        #Opponent node: sample one action, and add the current strategy to the average
+        if self._player[node] != traverser:
+
+            for i, strategy_a in enumerate(strategy):
+                self.table.strategy_sum[row, i] += self._strategy_weight * strategy_a
+
+            self.table.touch(row)
+
+            return self.external_sampling(children[self._sample(strategy)], traverser)
+
+        #Traverser node: every action is walked
+        values = [self.external_sampling(children[i], traverser) for i in range(len(strategy))]
+        node_value = sum(s * v for s, v in zip(strategy, values))
+
+        for i, value_a in enumerate(values):
+            self.table.regret_sum[row, i] += value_a - node_value
+
+        return node_value
+
+    def outcome_sampling(self, node, traverser, pi_i, pi_o, sample_probability):
+        '''
+        Outcome sampling traversal of a single trajectory
+
+        :param node: node id in self.tree
+        :param traverser: player whose regrets are updated
+        :param pi_i: traverser reach probability
+        :param pi_o: opponent reach probability
+        :param sample_probability: probability of sampling the trajectory so far
+        :return: (importance weighted terminal value for the traverser, traverser tail reach)
+        :rtype: tuple
+        '''
+        kind = self._kind[node]
+
+        if self._visits is not None:
+            self._visits[kind] += 1
+
+        if kind == TERMINAL:
+
+            payout = self._payoffs[node][self.cards[0]][self.cards[1]][self.cards[2]]
+            payout = payout if traverser == 0 else -payout
+
+            return payout / sample_probability, 1.0
+
+        if kind == CHANCE:
+            return self.outcome_sampling(self._children[node][0], traverser, pi_i, pi_o, sample_probability)
+
+        children = self._children[node]
+        row, strategy = self._row_strategy(node)
+        num_actions = len(strategy)
+
+        if self._player[node] == traverser:
+
+            #Explore with probability epsilon so every action keeps being sampled
+            sampling_policy = [self.epsilon / num_actions + (1 - self.epsilon) * s for s in strategy]
+            a = self._sample(sampling_policy)
+
+            value, tail = self.outcome_sampling(children[a], traverser, pi_i * strategy[a], pi_o,
+                                                sample_probability * sampling_policy[a])
+
+            #r(I,a') = W * (pi(z|ha) - pi(z|h)) with W = u(z) * pi_o / q(z)
+            weighted = value * pi_o
+
+            for i in range(num_actions):
+                if i == a:
+                    self.table.regret_sum[row, i] += weighted * tail * (1 - strategy[a])
+                else:
+                    self.table.regret_sum[row, i] -= weighted * tail * strategy[a]
+
+            return value, tail * strategy[a]
+
+        a = self._sample(strategy)
+
+        #Stochastically weighted averaging of the opponent's strategy
+        for i, strategy_a in enumerate(strategy):
+            self.table.strategy_sum[row, i] += self._strategy_weight * pi_o / sample_probability * strategy_a
+
+        self.table.touch(row)
+
+        value, tail = self.outcome_sampling(children[a], traverser, pi_i, pi_o * strategy[a],
+                                            sample_probability * strategy[a])
+
+        return value, tail * strategy[a]
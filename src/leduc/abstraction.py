@@ -0,0 +1,188 @@
+'''
+Docstring for leduc.abstraction
+
+This file contains the abstraction stage of the Leduc family: a smaller abstract game the solvers
+train in, and the map of every real infostate onto its abstract infostate.
+
+Both parts are optional:
+
+    card buckets - private cards are grouped by hand strength, the probability of winning the
+                   showdown (ties count half) against a random opponent card. Before the board is
+                   dealt the strength is averaged over every board, afterwards the bucket of the
+                   (card, board) pair replaces both cards, so abstract infostates forget the board
+    betting      - histories that reach the same betting situation (round, player to act, chips
+                   committed, raises this round, last action) share their abstract infostate, they
+                   always have the same legal actions
+
+An agent built with an abstraction keeps one table row per abstract infostate. Its traversals still
+walk the real tree with real cards, only the row lookup goes through the map, so training runs in
+the abstract game (with imperfect recall). The agent's real_rows maps every real infostate back to
+its row, which expands the abstract strategy to the real game for best responses and play.
+'''
+
+import numpy as np
+
+from cfr.encoding import InfostateEncoder
+from .tree import DECISION
+
+
+def _quantile_buckets(values, buckets):
+    '''
+    Splits values into buckets of (nearly) equal size by rank, equal values share a bucket
+    '''
+    values = np.round(values, 12)
+    position = np.searchsorted(np.sort(values), values, side='left')
+
+    return np.minimum(position * buckets // len(values), buckets - 1)
+
+
+class Abstraction():
+
+    def __init__(self, card_buckets=None, betting=False):
+        '''
+        :param card_buckets: number of hand strength buckets, None keeps the exact cards
+        :param betting: merge histories that reach the same betting situation
+        '''
+        if card_buckets is not None and card_buckets < 1:
+            raise ValueError(f"Expected at least one card bucket, got {card_buckets}")
+
+        self.card_buckets = card_buckets
+        self.betting = betting
+
+    def __eq__(self, other):
+
+        return type(other) is type(self) and (self.card_buckets, self.betting) == (other.card_buckets, other.betting)
+
+    def __hash__(self):
+
+        return hash((type(self), self.card_buckets, self.betting))
+
+    def __repr__(self):
+
+        return f"{type(self).__name__}(card_buckets={self.card_buckets!r}, betting={self.betting!r})"
+
+    def hand_strength(self, game, card, public_card=-1):
+        '''
+        Probability of winning the showdown against a random opponent card, ties count half
+
+        :param self: self
+        :param game: leduc family game
+        :param card: private card rank
+        :param public_card: public card rank, -1 to average over every board
+        :return: hand strength, 0 if the cards can not be dealt together
+        :rtype: Float
+        '''
+        counts = np.bincount(game.cards, minlength=game.ranks).astype(float)
+        counts[card] -= 1
+
+        if public_card < 0:
+
+            boards = np.flatnonzero(counts > 0)
+            weights = counts[boards] / counts.sum()
+
+            return float(sum(weight * self.hand_strength(game, card, board) for board, weight in zip(boards, weights)))
+
+        counts[public_card] -= 1
+
+        if counts.min() < 0 or counts.sum() <= 0:
+            return 0.0
+
+        opponent = np.arange(game.ranks)
+        strength = game.strength(card, public_card)
+        opponent_strength = game.strength(opponent, public_card)
+
+        outcome = (strength > opponent_strength) + 0.5 * (strength == opponent_strength)
+
+        return float((counts * outcome).sum() / counts.sum())
+
+    def card_map(self, game):
+        '''
+        Abstract card of every (public card, private card)
+
+        :param self: self
+        :param game: leduc family game
+        :return: (num_ranks + 1, num_ranks) array indexed by [public card + 1, card]
+        :rtype: numpy array
+        '''
+        ranks = np.arange(game.ranks)
+
+        if self.card_buckets is None:
+            return np.tile(ranks, (game.ranks + 1, 1))
+
+        card_map = np.zeros((game.ranks + 1, game.ranks), dtype=np.int64)
+
+        #Before the board: one strength per card
+        card_map[0] = _quantile_buckets([self.hand_strength(game, card) for card in ranks], self.card_buckets)
+
+        #After the board: (card, board) pairs that can be dealt, bucketed together
+        counts = np.bincount(game.cards, minlength=game.ranks)
+        pairs = [(board, card) for board in ranks for card in ranks if counts[card] - (card == board) > 0]
+        strengths = [self.hand_strength(game, card, board) for board, card in pairs]
+
+        for (board, card), bucket in zip(pairs, _quantile_buckets(strengths, self.card_buckets)):
+            card_map[board + 1, card] = bucket
+
+        return card_map
+
+    def betting_key(self, state):
+        '''
+        Betting situation of a state, histories with equal keys share their abstract infostates.
+        Subclasses can override it with a coarser or finer betting abstraction, states with equal
+        keys must have the same legal actions
+
+        :param self: self
+        :param state: GameState of a decision node
+        :return: hashable key
+        '''
+        return (state.round, state.player, state.committed, state.raises, state.last)
+
+    def node_map(self, game, tree):
+        '''
+        Abstract node of every node of the compiled tree
+
+        :param self: self
+        :param game: leduc family game
+        :param tree: compiled GameTree of game
+        :return: abstract node ids in order of first appearance, and how many there are
+        :rtype: tuple
+        '''
+        abstract_nodes = {}
+        node_map = np.empty(tree.num_nodes, dtype=np.int64)
+
+        for node, history in enumerate(tree.histories):
+
+            if self.betting and tree.kind[node] == DECISION:
+                key = self.betting_key(game.state(history))
+            else:
+                key = node
+
+            node_map[node] = abstract_nodes.setdefault(key, len(abstract_nodes))
+
+        return node_map, len(abstract_nodes)
+
+    def infostate_keys(self, game, tree, infostates):
+        '''
+        Abstract infostate key of every real infostate
+
+        :param self: self
+        :param game: leduc family game
+        :param tree: compiled GameTree of game
+        :param infostates: real infostates as (node, public card, private card), see GameTree.infostates
+        :return: int64 array of abstract keys, parallel to infostates
+        :rtype: numpy array
+        '''
+        card_map = self.card_map(game)
+        node_map, num_nodes = self.node_map(game, tree)
+
+        node, board, card = np.array(infostates, dtype=np.int64).reshape(-1, 3).T
+        player = tree.player[node].astype(np.int64)
+        abstract_card = card_map[board + 1, card]
+
+        #Bucketed cards already stand for the board, so the board is dropped from the key
+        if self.card_buckets is None:
+            encoder = InfostateEncoder(num_nodes, game.ranks, game.ranks)
+            return encoder.encode_many(player, abstract_card, node_map[node], board)
+
+        encoder = InfostateEncoder(num_nodes, self.card_buckets)
+
+        return encoder.encode_many(player, abstract_card, node_map[node])
@@ -14,13 +14,314 @@ The Rules of Leduc Poker goes as follows:
 5. Both players showdown if neither player folded in the previous betting rounds. The pot goes to the winner which is determined in this order:
     Pair > high card, K > Q > J
 
+The engine is the GameState class: a small slotted object for one point of a hand whose apply(action)
+derives the next state incrementally (round, player to act, raises this round, chips committed, fold),
+so legal actions, terminal checks and payouts are O(1) reads instead of re-parsing the history.
+
+payouts(deals) scores a terminal state against a whole array of deals at once with NumPy, it is the
+kernel behind the compiled tree's (terminal x deal) payoff tables.
+
+The class leduc keeps the original string history API as a thin layer over GameState, every history
+is turned into its state once and cached.
+
+leduc() is standard Leduc, its parameters make the rest of the Leduc family for scaling experiments:
+
+    ranks, suits - the deck holds every rank in every suit
+    rounds       - betting rounds, the public card is dealt before round 2 and later rounds are
+                   played on the same board, 1 round is a private card only game
+    bet_sizes    - chips a raise adds in each round, by default 1 in round 1 and 2 afterwards
+    raise_cap    - raises (the opening bet included) allowed per round
+    antes        - chips each player antes, (player 1, player 2). Both antes must be equal: every
+                   round opens with a check or a bet, so a larger ante would be a blind the other
+                   player could check past without ever matching it
+
+Every variant keeps one public card, so the compiled tree, the public tree and every solver consume
+it unchanged. At showdown a pair with the board beats a high card and equal hands split the pot.
 '''
 
+import numpy as np
+
+
+class GameState():
+
+    __slots__ = ('game', 'history', 'round', 'player', 'raises', 'committed', 'last', 'folded', 'terminal', 'r1_over')
+
+    def __init__(self, game):
+        '''
+        The state before any action: antes posted, round 1, player 1 to act
+
+        :param game: the leduc game whose rules the state follows
+        '''
+        self.game = game
+        self.history = ''
+        self.round = 1
+        self.player = 0
+        self.raises = 0
+        self.committed = tuple(game.antes)
+        self.last = '' #Last action of the current round, '' at the start of a round
+        self.folded = -1 #Player who folded, -1 if nobody did
+        self.terminal = False
+        self.r1_over = False
+
+    def actions(self):
+        '''
+        Returns the legal actions of the player to act, empty at terminal and chance states
+
+        :param self: self
+        :return: legal actions
+        :rtype: list
+        '''
+        if self.terminal or self.r1_over:
+            return []
+
+        if self.last == 'r':
+
+            if self.raises >= self.game.raise_cap:
+                return ['f', 'c']
+
+            return ['f', 'c', 'r']
+
+        return ['p', 'r']
+
+    def apply(self, action):
+        '''
+        Returns the state after action, ':' deals the public card once round 1 is over. Later rounds
+        start right after the previous one ends, their ':' is appended to the history by the call
+        or check that ended it
+
+        :param self: self
+        :param action: 'p', 'r', 'c', 'f' or ':'
+        :return: the next state, self is left unchanged
+        :rtype: GameState
+        '''
+        game = self.game
+
+        state = GameState.__new__(GameState)
+        state.game = game
+        state.history = self.history + action
+        state.committed = self.committed
+        state.folded = -1
+        state.terminal = False
+        state.r1_over = False
+
+        if action == ':':
+
+            if not self.r1_over:
+                raise ValueError(f"Cannot deal the public card after {self.history!r}")
+
+            state.round = 2
+            state.player = 0
+            state.raises = 0
+            state.last = ''
+
+            return state
+
+        if action not in self.actions():
+            raise ValueError(f"Illegal action {action!r} after {self.history!r}")
+
+        player = self.player
+        opponent = 1 - player
+
+        state.round = self.round
+        state.player = opponent
+        state.raises = self.raises
+        state.last = action
+
+        if action == 'r':
+            committed = list(self.committed)
+            committed[player] = self.committed[opponent] + game.bet_sizes[self.round - 1]
+            state.committed = tuple(committed)
+            state.raises += 1
+
+        elif action == 'c':
+            committed = list(self.committed)
+            committed[player] = self.committed[opponent]
+            state.committed = tuple(committed)
+
+        elif action == 'f':
+            state.folded = player
+
+        #A fold ends the hand, a call or a second check ends the round
+        round_over = action == 'c' or (action == 'p' and self.last == 'p')
+
+        if action == 'f' or (round_over and self.round == game.rounds):
+            state.terminal = True
+
+        elif round_over and self.round == 1:
+            state.r1_over = True
+
+        elif round_over:
+            state.history += ':'
+            state.round += 1
+            state.player = 0
+            state.raises = 0
+            state.last = ''
+
+        return state
+
+    def payout(self, cards):
+        '''
+        Returns the payout to player 1, 0 if the hand is not over
+
+        :param self: self
+        :param cards: [p1 card, p2 card, public card], the public card is only read at showdowns
+                      of games with more than one round
+        :return: payout to player 1
+        :rtype: Int
+        '''
+        if not self.terminal:
+            return 0
+
+        #The folding player loses what they committed
+        if self.folded == 0:
+            return -self.committed[0]
+
+        if self.folded == 1:
+            return self.committed[1]
+
+        public_card = cards[2] if len(cards) > 2 else -1
+        strength_1, strength_2 = self.game.strength(cards[0], public_card), self.game.strength(cards[1], public_card)
+
+        if strength_1 > strength_2:
+            return self.committed[1]
+
+        if strength_2 > strength_1:
+            return -self.committed[0]
+
+        return 0
+
+    def payouts(self, deals):
+        '''
+        Vectorized payout: the payout to player 1 of this terminal state for every deal
+
+        :param self: self
+        :param deals: (n, 3) array of [p1 card, p2 card, public card] ranks, (n, 2) is enough when
+                      the hand ended with a fold or the game has a single round
+        :return: (n,) payouts to player 1, all 0 if the hand is not over
+        :rtype: numpy array
+        '''
+        deals = np.asarray(deals)
+
+        if not self.terminal:
+            return np.zeros(len(deals))
+
+        if self.folded >= 0:
+            return np.full(len(deals), float(self.committed[1] if self.folded == 1 else -self.committed[0]))
+
+        public_card = deals[:, 2] if deals.shape[1] > 2 else -1
+        strength_1 = self.game.strength(deals[:, 0], public_card)
+        strength_2 = self.game.strength(deals[:, 1], public_card)
+
+        return np.where(strength_1 > strength_2, self.committed[1],
+                        np.where(strength_2 > strength_1, -self.committed[0], 0)).astype(float)
+
+
 class leduc():
 
-    def __init__(self):
-        
-        self.cards = [0,0,1,1,2,2]
+    def __init__(self, ranks=3, suits=2, rounds=2, bet_sizes=None, raise_cap=2, antes=(1, 1)):
+        '''
+        :param ranks: number of card ranks
+        :param suits: number of suits of every rank
+        :param rounds: number of betting rounds
+        :param bet_sizes: chips a raise adds in each round, None for 1 in round 1 and 2 afterwards
+        :param raise_cap: raises allowed per round, the opening bet counts as one
+        :param antes: chips (player 1, player 2) ante, equal for both players
+        '''
+        if bet_sizes is None:
+            bet_sizes = (1,) + (2,) * (rounds - 1)
+
+        if rounds < 1 or len(bet_sizes) != rounds:
+            raise ValueError(f"Expected one bet size per round, got {len(bet_sizes)} for {rounds} rounds")
+
+        if ranks * suits < 3:
+            raise ValueError(f"A deck of {ranks} ranks and {suits} suits can not deal two private cards and a public card")
+
+        if raise_cap < 1 or len(antes) != 2:
+            raise ValueError("Expected a raise cap of at least 1 and one ante per player")
+
+        if antes[0] != antes[1]:
+            raise ValueError(f"Expected equal antes, got {tuple(antes)}")
+
+        self.ranks = ranks
+        self.suits = suits
+        self.rounds = rounds
+        self.bet_sizes = tuple(bet_sizes)
+        self.raise_cap = raise_cap
+        self.antes = tuple(antes)
+
+        self.cards = [rank for rank in range(ranks) for _ in range(suits)]
+
+        #History string -> GameState, filled on first use
+        self._states = {'': GameState(self)}
+
+    def parameters(self):
+        '''
+        Returns the keyword arguments that rebuild this game
+
+        :param self: self
+        :return: leduc(**parameters) is an equal game
+        :rtype: dict
+        '''
+        return {'ranks': self.ranks, 'suits': self.suits, 'rounds': self.rounds, 'bet_sizes': self.bet_sizes,
+                'raise_cap': self.raise_cap, 'antes': self.antes}
+
+    def __eq__(self, other):
+
+        return isinstance(other, leduc) and self.parameters() == other.parameters()
+
+    def __hash__(self):
+
+        return hash(tuple(self.parameters().values()))
+
+    def __repr__(self):
+
+        return "leduc(" + ", ".join(f"{name}={value!r}" for name, value in self.parameters().items()) + ")"
+
+    def strength(self, card, public_card):
+        '''
+        Showdown strength of a private card, pairing the board beats every high card. Works on
+        scalars and NumPy arrays alike
+
+        :param self: self
+        :param card: private card rank
+        :param public_card: public card rank, ignored in single round games
+        :return: larger is better, equal strengths split the pot
+        :rtype: Int
+        '''
+        if self.rounds == 1:
+            return card
+
+        return card + self.ranks * (card == public_card)
+
+    def initial_state(self):
+
+        return self._states['']
+
+    def state(self, history):
+        '''
+        Returns the GameState of a history string, built from its longest cached prefix
+
+        :param self: self
+        :param history: string history
+        :return: the state after history
+        :rtype: GameState
+        '''
+        state = self._states.get(history)
+
+        if state is None:
+            state = self.state(history[:-1])
+
+            #The ':' of rounds after the second is already part of the state that ended the round
+            if state.history != history:
+                state = state.apply(history[-1])
+
+            #Only that trailing ':' may differ, a missing round separator is an illegal history
+            if state.history not in (history, history + ':'):
+                raise ValueError(f"Illegal history {history!r}, expected {state.history!r}")
+
+            self._states[history] = state
+
+        return state
 
     def terminal(self, history):
         '''
@@ -31,22 +332,7 @@ class leduc():
         :return: True for if the game is over, False for if not
         :rtype: Boolean
         '''
-        #if any player folds, the game instantly terminates
-        if history == '':
-            return False
-        
-        if history[-1] == 'f':
-            return True
-
-        #if there is a flat call in round 2, the game ends
-        if ':' in history and history[-1] == 'c':
-            return True
-        
-        #if both players check round 2, the game ends
-        if ':' in history and history[-2:] == 'pp':
-            return True
-        
-        return False
+        return self.state(history).terminal
 
     def r1_over(self, history):
         '''
@@ -57,19 +343,7 @@ class leduc():
         :return: True for if the game is ready to move onto round 2 / False otherwise
         :rtype: Boolean
         '''
-        if history == '':
-            return False
-
-        if ':' in history:
-            return False
-        
-        if history[-1] == 'c':
-            return True
-        
-        if history[-2:] == 'pp':
-            return True
-        
-        return False
+        return self.state(history).r1_over
         
     def get_round(self, history):
         '''
@@ -80,10 +354,7 @@ class leduc():
         :return: 1 for round 1, 2 for round 2
         :rtype: Int
         '''
-        if ':' in history:
-            return 2
-        else:
-            return 1
+        return self.state(history).round
 
     def player_to_act(self, history):
         '''
@@ -98,23 +369,7 @@ class leduc():
         :return: Returns the player next to act (0,1) for (P1, P2)
         :rtype: Int
         '''
-        if self.get_round(history=history) == 2:    
-            
-            r1, sep, r2  = history.partition(':')
-
-            if len(r2) % 2 == 0: 
-                return 0 #P1
-            else: 
-                return 1 #P2
-            
-        else: 
-
-            if len(history) % 2 == 0: 
-                return 0 #P1
-            else: 
-                return 1 #P2
-        
-
+        return self.state(history).player
         
     def payout(self, history, cards):
         '''
@@ -132,134 +387,27 @@ class leduc():
         :return: Returns the payout for Player 1 always
         :rtype: Int
         '''
-        if not self.terminal(history=history):
-            return 0
-        
-        # Initialize committed chips (usually 1 chip ante per player)
-        committed = [1, 1]
-        
-        # Split the history into Round 1 and Round 2
-        if ':' in history:
-            r1, _, r2 = history.partition(':')
-        else:
-            r1 = history
-            r2 = ""
-            
-        # --- PROCESS ROUND 1 ---
-        # Fixed bet size is 1
-        bet_size = 1
-        
-        # Round 1 always starts with Player 1 (Index 0)
-        current_player = 0
-        
-        for action in r1:
-            opponent = 1 - current_player
-            
-            if action == 'r':
-                # Match opponent + bet size
-                committed[current_player] = committed[opponent] + bet_size
-            
-            elif action == 'c':
-                # Match opponent
-                committed[current_player] = committed[opponent]
-            
-            elif action == 'f':
-                # Player folded. Opponent wins the folder's committed chips.
-                # If P1 folded (current=0), P1 loses their chips (-committed[0])
-                # If P2 folded (current=1), P1 wins P2's chips (+committed[1])
-                if current_player == 0:
-                    return -committed[0]
-                else:
-                    return committed[1]
-            
-            # Switch turn
-            current_player = 1 - current_player
-
-        # --- PROCESS ROUND 2 ---
-        # Fixed bet size is 2 (Leduc rules usually double bets in R2)
-        bet_size = 2
-        
-        # Round 2 always starts with Player 1 (Index 0)
-        current_player = 0
-        
-        for action in r2:
-            opponent = 1 - current_player
-            
-            if action == 'r':
-                committed[current_player] = committed[opponent] + bet_size
-            
-            elif action == 'c':
-                committed[current_player] = committed[opponent]
-            
-            elif action == 'f':
-                if current_player == 0:
-                    return -committed[0]
-                else:
-                    return committed[1]
-            
-            current_player = 1 - current_player
-
-        # --- SHOWDOWN ---
-        p1_card = cards[0]
-        p2_card = cards[1]
-        community_card = cards[2]
-
-        # 1. Check for Pairs (Highest ranking hand in Leduc)
-        # Note: In Leduc with 6 cards (2 suits), it's impossible for 
-        # BOTH players to pair the board (there is only 1 matching card left).
-        if p1_card == community_card:
-            return committed[1] # P1 wins P2's chips
-        
-        if p2_card == community_card:
-            return -committed[0] # P1 loses their chips
-        
-        # 2. High Card
-        if p1_card > p2_card:
-            return committed[1]
-        
-        if p2_card > p1_card:
-            return -committed[0]
-        
-        # 3. Draw (Equal ranks, no pairs)
-        return 0
+        return self.state(history).payout(cards)
     
     def actions(self, history):
+        '''
+        Returns the legal actions after history, empty once the hand or round 1 is over
 
-        if history == '':
-
-            return ['p', 'r']
-        
-        if history[-1] == ':':
-
-            return ['p', 'r']
-
-        if history[-1] == 'p':
-            
-            return ['p', 'r']
-        
-        if history[-1] == 'r':
-            
-            num_raises = 0
-
-            if ':' in history:
-
-                r1, sep, r2 = history.partition(':')
-                
-                num_raises = r2.count('r')
-            
-            else:
-
-                num_raises = history.count('r')
-
-            if num_raises > 1:
-
-                return ['f', 'c']
-            
-            else:
+        :param self: self
+        :param history: string history
+        :return: legal actions
+        :rtype: list
+        '''
+        return self.state(history).actions()
 
-                return ['f', 'c', 'r']
-        
-        return []
+    def payouts(self, history, deals):
+        '''
+        Vectorized payout of one terminal history for an array of deals
 
- 
-                
+        :param self: self
+        :param history: string history
+        :param deals: (n, 3) array of [p1 card, p2 card, public card] ranks
+        :return: (n,) payouts to player 1
+        :rtype: numpy array
+        '''
+        return self.state(history).payouts(deals)
@@ -1,11 +1,32 @@
 class Node:
+    '''
+    View of one infostate row of a cfr.tables.InfostateTable, values are keyed by action
+    '''
 
-    def __init__(self, actions):
+    __slots__ = ('table', 'row', 'actions')
+
+    def __init__(self, table, row):
         
-        self.actions = actions
-        self.regret_sum = dict()
-        self.strategy = dict()
-        self.strategy_sum = dict()
-        self.value = dict()
-        self.final_strategy = dict()
-    
+        self.table = table
+        self.row = row
+        self.actions = table.actions[row]
+
+    def _by_action(self, array):
+
+        return dict(zip(self.actions, array[self.row, :len(self.actions)].tolist()))
+
+    @property
+    def regret_sum(self):
+        return self._by_action(self.table.regret_sum)
+
+    @property
+    def strategy(self):
+        return self._by_action(self.table.strategy)
+
+    @property
+    def strategy_sum(self):
+        return self._by_action(self.table.strategy_sum)
+
+    @property
+    def final_strategy(self):
+        return self._by_action(self.table.final_strategy)
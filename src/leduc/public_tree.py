@@ -0,0 +1,310 @@
+'''
+Docstring for leduc.public_tree
+
+This file expands the compiled betting tree into the public tree used by the vectorized solvers.
+
+A public state is a betting node together with the public card (board), or no board in round 1.
+Both players' private hands are left unresolved: every quantity is a vector over hands, so a
+single pass over the public tree covers every card deal at once.
+
+Chance is folded into the terminal matrices: weights[z][h0, h1] is the probability of dealing
+(h0, h1, board) times the payout to player 1, so reach vectors only ever hold player probabilities.
+
+Everything the solvers need is flattened into index arrays, so a full traversal is a handful of
+NumPy gathers and reductions instead of a Python recursion:
+
+    - sigma is stored as a (num_decisions * max_actions + 1, num_hands) matrix, the last row is all ones
+    - reach_paths[p][s] lists the (decision, action) rows player p took on the way to state s
+    - the cfv pairs list, for every (decision, action), the terminals below it and the acting
+      player's own actions between the two
+
+best_response walks the public tree bottom up once per best responder, carrying the opponent's
+reach as a belief vector over their hands.
+'''
+
+import numpy as np
+
+from .tree import DECISION, CHANCE, TERMINAL
+
+
+def deal_probabilities(deck):
+    '''
+    Probability of every (p1 card, p2 card) and (p1 card, p2 card, public card) rank deal
+
+    :param deck: list of card ranks, duplicated ranks are separate suits
+    :return: (num_ranks, num_ranks) and (num_ranks, num_ranks, num_ranks) probability arrays
+    :rtype: tuple
+    '''
+    counts = np.bincount(deck).astype(float)
+    n = counts.sum()
+    num_ranks = len(counts)
+    same = np.eye(num_ranks)
+
+    private = counts[:, None] / n * (counts[None, :] - same) / (n - 1)
+
+    remaining = counts[None, None, :] - same[:, None, :] - same[None, :, :]
+    public = private[:, :, None] * np.clip(remaining, 0, None) / (n - 2)
+
+    return private, public
+
+
+class PublicTree():
+
+    def __init__(self, tree, deck):
+
+        self.tree = tree
+        num_ranks = tree.payoffs.shape[1]
+        self.num_hands = num_ranks
+        self.max_actions = tree.max_actions
+
+        # --- Expand the betting tree by board ---
+        node = []
+        board = []
+        children = []
+
+        def expand(tree_node, tree_board):
+
+            s = len(node)
+            node.append(tree_node)
+            board.append(tree_board)
+            children.append([])
+
+            if tree.kind[tree_node] == CHANCE:
+                child = tree.children[tree_node][0]
+                for b in range(num_ranks):
+                    children[s].append(expand(child, b))
+
+            elif tree.kind[tree_node] == DECISION:
+                for child in tree.children[tree_node][:tree.num_actions[tree_node]]:
+                    children[s].append(expand(child, tree_board))
+
+            return s
+
+        expand(0, -1)
+
+        # Children padded with -1, every child has a larger id and a depth one below its parent
+        self.children = np.full((len(node), max(len(c) for c in children)), -1, dtype=np.int64)
+        depth = np.zeros(len(node), dtype=np.int64)
+
+        for s, state_children in enumerate(children):
+            self.children[s, :len(state_children)] = state_children
+            depth[state_children] = depth[s] + 1
+
+        # Non terminal states grouped by depth, deepest first, for bottom up passes
+        inner = np.flatnonzero(self.children[:, 0] >= 0)
+        self._levels = [inner[depth[inner] == d] for d in range(depth.max() - 1, -1, -1)]
+
+        self.node = np.array(node, dtype=np.int32)
+        self.board = np.array(board, dtype=np.int32)
+        self.kind = tree.kind[self.node]
+        self.player = tree.player[self.node]
+        self.num_states = len(node)
+
+        # Sorted by (node, board) so that (decision, hand) matches the tree's infostate row order
+        self.decisions = np.flatnonzero(self.kind == DECISION)
+        self.decisions = self.decisions[np.lexsort((self.board[self.decisions], self.node[self.decisions]))]
+        self.terminals = np.flatnonzero(self.kind == TERMINAL)
+        self.num_decisions = len(self.decisions)
+
+        decision_of = np.full(self.num_states, -1, dtype=np.int64)
+        decision_of[self.decisions] = np.arange(self.num_decisions)
+        self.action_mask = tree.action_mask[self.node[self.decisions]]
+
+        # Row of the padded sigma matrix that is always one
+        self.ones_row = self.num_decisions * self.max_actions
+
+        # --- Paths from the root: which (decision, action) rows each player used ---
+        paths = [[None] * self.num_states, [None] * self.num_states]
+
+        def walk(s, path0, path1):
+
+            paths[0][s] = path0
+            paths[1][s] = path1
+
+            if self.kind[s] == DECISION:
+                d = decision_of[s]
+                for a, child in enumerate(children[s]):
+                    sa = d * self.max_actions + a
+                    if self.player[s] == 0:
+                        walk(child, path0 + [sa], path1)
+                    else:
+                        walk(child, path0, path1 + [sa])
+            else:
+                for child in children[s]:
+                    walk(child, path0, path1)
+
+        walk(0, [], [])
+
+        # Both players padded to the same width so their paths stack into one index
+        width = max(len(path) for p in range(2) for path in paths[p])
+        self.reach_paths = [self._pad(paths[p], width) for p in range(2)]
+        self._reach_index = self._flat_index(np.concatenate(self.reach_paths))
+
+        # traverse only needs the opponent's reach at terminals and the actor's reach at decisions
+        decision_paths = [paths[self.player[s]][s] for s in self.decisions]
+        traverse_paths = [paths[1][z] for z in self.terminals] + [paths[0][z] for z in self.terminals] + decision_paths
+        self._traverse_index = self._flat_index(self._pad(traverse_paths))
+        self._num_terminal_values = 2 * len(self.terminals) * self.num_hands
+
+        # --- Terminal weights: chance probability times payout to player 1 ---
+        private, public = deal_probabilities(deck)
+
+        self.weights = np.empty((len(self.terminals), num_ranks, num_ranks))
+
+        for i, s in enumerate(self.terminals):
+            payoff = tree.payoffs[self.node[s]]
+            if self.board[s] < 0:
+                self.weights[i] = private * payoff[:, :, 0]
+            else:
+                b = self.board[s]
+                self.weights[i] = public[:, :, b] * payoff[:, :, b]
+
+        # Player 1's values come from weights, player 2's from the negated transpose
+        self._terminal_weights = np.concatenate([self.weights, -self.weights.transpose(0, 2, 1)])
+
+        # --- cfv pairs: every terminal below every (decision, action) ---
+        pair_sa = []
+        pair_terminal = []
+        pair_player = []
+        pair_path = []
+
+        for i, z in enumerate(self.terminals):
+            for p in range(2):
+                path = paths[p][z]
+                # Each of p's actions on the way to z gets the part of the path after it
+                for k, sa in enumerate(path):
+                    pair_sa.append(sa)
+                    pair_terminal.append(i)
+                    pair_player.append(p)
+                    pair_path.append(path[k + 1:])
+
+        order = np.argsort(pair_sa, kind='stable')
+        pair_sa = np.array(pair_sa)[order]
+
+        self.pair_terminal = np.array(pair_terminal)[order]
+        self.pair_player = np.array(pair_player)[order]
+        self.pair_path = self._pad([pair_path[k] for k in order])
+        self.pair_sa, self.pair_starts = np.unique(pair_sa, return_index=True)
+
+        self._pair_path_index = self._flat_index(self.pair_path)
+
+        # Where each reduced (decision, action) row lands in a flat (decision, hand, action) array
+        decision, action = np.divmod(self.pair_sa, self.max_actions)
+        hands = np.arange(self.num_hands)
+        self._action_value_index = (
+            (decision[:, None] * self.num_hands + hands) * self.max_actions + action[:, None]
+        ).ravel()
+        self._pair_value_index = self._flat_index(
+            (self.pair_player * len(self.terminals) + self.pair_terminal)[:, None]
+        )[0]
+
+    def _flat_index(self, rows):
+        '''
+        Expands (n, width) row indices into (width, n * num_hands) indices of a flattened
+        (rows, num_hands) matrix, so a gather is a single contiguous take
+        '''
+        hands = np.arange(self.num_hands)
+
+        return (rows.T[:, :, None] * self.num_hands + hands).reshape(rows.shape[1], -1)
+
+    def _pad(self, paths, width=0):
+
+        width = max(1, width, max(len(path) for path in paths))
+        padded = np.full((len(paths), width), self.ones_row, dtype=np.int64)
+
+        for i, path in enumerate(paths):
+            padded[i, :len(path)] = path
+
+        return padded
+
+    def sigma_rows(self, strategy):
+        '''
+        Flattens a (num_decisions, num_hands, max_actions) strategy into the padded sigma matrix
+
+        :param strategy: per decision, per hand action probabilities
+        :return: (num_decisions * max_actions + 1, num_hands) matrix
+        :rtype: numpy array
+        '''
+        rows = np.ones((self.ones_row + 1, self.num_hands), dtype=strategy.dtype)
+        rows[:-1] = strategy.transpose(0, 2, 1).reshape(-1, self.num_hands)
+
+        return rows
+
+    def reach(self, sigma):
+        '''
+        Reach probabilities of every public state for every private hand
+
+        :param sigma: padded sigma matrix from sigma_rows
+        :return: (2, num_states, num_hands) reach of player 1 and player 2
+        :rtype: numpy array
+        '''
+        reach = sigma.ravel().take(self._reach_index).prod(axis=0)
+
+        return reach.reshape(2, self.num_states, self.num_hands)
+
+    def traverse(self, sigma):
+        '''
+        One pass over the public tree for every hand of both players
+
+        :param sigma: padded sigma matrix from sigma_rows
+        :return: (num_decisions, num_hands, max_actions) counterfactual action values of the
+                 acting player, and (num_decisions, num_hands) reach of the acting player
+        :rtype: tuple
+        '''
+        reach = sigma.ravel().take(self._traverse_index).prod(axis=0)
+
+        opponent_reach = reach[:self._num_terminal_values].reshape(-1, self.num_hands)
+        own_reach = reach[self._num_terminal_values:].reshape(self.num_decisions, self.num_hands)
+
+        # Player 1's then player 2's counterfactual value of every terminal
+        terminal_values = np.einsum('zij,zj->zi', self._terminal_weights, opponent_reach)
+
+        pair_values = terminal_values.ravel().take(self._pair_value_index)
+        pair_values *= sigma.ravel().take(self._pair_path_index).prod(axis=0)
+        pair_values = pair_values.reshape(-1, self.num_hands)
+
+        action_values = np.zeros(self.ones_row * self.num_hands, dtype=pair_values.dtype)
+        action_values[self._action_value_index] = np.add.reduceat(pair_values, self.pair_starts, axis=0).ravel()
+        action_values = action_values.reshape(self.num_decisions, self.num_hands, self.max_actions)
+
+        return action_values, own_reach
+
+    def best_response(self, sigma, player):
+        '''
+        Best response of one player against the strategy in sigma.
+
+        The opponent's reach at every terminal is their belief vector (unnormalized, chance is in
+        the weights), so the terminal values of every hand are one batched matrix product. The
+        values are then reduced bottom up: the best responder takes the max over their actions,
+        opponent and chance states sum over their children.
+
+        :param sigma: padded sigma matrix from sigma_rows, only the opponent's rows are used
+        :param player: best responding player, 0 or 1
+        :return: (num_hands,) best response value of each of the player's hands, chance weighted
+                 so the sum over hands is the best response value of the game
+        :rtype: numpy array
+        '''
+        opponent_reach = self.reach(sigma)[1 - player]
+
+        weights = self.weights if player == 0 else -self.weights.transpose(0, 2, 1)
+
+        values = np.zeros((self.num_states + 1, self.num_hands))
+        values[self.terminals] = np.einsum('zij,zj->zi', weights, opponent_reach[self.terminals])
+
+        # Padded children point at the last row, 0 for sums and -inf for the best responder's max
+        children = self.children
+        responder = (self.kind == DECISION) & (self.player == player)
+
+        for states in self._levels:
+
+            child_values = values[children[states]]
+            own = responder[states]
+
+            values[states[~own]] = child_values[~own].sum(axis=1)
+
+            if own.any():
+                own_values = child_values[own]
+                own_values[children[states[own]] < 0] = -np.inf
+                values[states[own]] = own_values.max(axis=1)
+
+        return values[0]
@@ -0,0 +1,208 @@
+'''
+Docstring for leduc.tree
+
+This file compiles the Leduc betting tree once into flat integer arrays so the solvers
+can walk node ids instead of re-parsing history strings on every visit.
+
+Every legal history gets a node id in breadth first order (the root is always node 0).
+A node is one of three kinds:
+
+    DECISION - a player chooses one of the legal actions in children[node]
+    CHANCE   - round 1 is over and the public card is dealt, the only child is history + ':'
+    TERMINAL - the hand is over, payoffs[node] holds the payout to player 1 for every card triple
+
+'''
+
+import numpy as np
+
+DECISION = 0
+CHANCE = 1
+TERMINAL = 2
+
+
+class GameTree():
+
+    def __init__(self, histories, actions, parent, children, player, rounds, kind, payoffs):
+
+        self.histories = histories
+        self.actions = actions
+        self.node_index = {history: node for node, history in enumerate(histories)}
+
+        self.parent = parent
+        self.children = children
+        self.player = player
+        self.round = rounds
+        self.kind = kind
+        self.action_mask = children >= 0
+        self.num_actions = self.action_mask.sum(axis=1)
+        self.terminal = kind == TERMINAL
+        self.chance = kind == CHANCE
+        self.payoffs = payoffs
+
+        self.terminal_nodes = np.flatnonzero(self.terminal)
+
+        self.num_nodes = len(histories)
+        self.max_actions = children.shape[1]
+        self.num_ranks = payoffs.shape[1]
+
+    def node(self, history):
+        '''
+        Returns the node id of a history string
+
+        :param self: self
+        :param history: string history
+        :return: node id
+        :rtype: Int
+        '''
+        return self.node_index[history]
+
+    def payouts(self, node, deals):
+        '''
+        Payouts to player 1 of one terminal node for an array of deals, gathered from the
+        precomputed payoff table
+
+        :param self: self
+        :param node: terminal node id
+        :param deals: (n, 3) array of [p1 card, p2 card, public card] rank indices
+        :return: (n,) payouts to player 1
+        :rtype: numpy array
+        '''
+        deals = np.asarray(deals)
+
+        return self.payoffs[node, deals[:, 0], deals[:, 1], deals[:, 2]]
+
+    def payoff_matrix(self, deals):
+        '''
+        Payouts to player 1 of every terminal node for an array of deals
+
+        :param self: self
+        :param deals: (n, 3) array of [p1 card, p2 card, public card] rank indices
+        :return: (num_terminals, n) payoffs, rows follow self.terminal_nodes
+        :rtype: numpy array
+        '''
+        deals = np.asarray(deals)
+
+        return self.payoffs[self.terminal_nodes[:, None], deals[:, 0], deals[:, 1], deals[:, 2]]
+
+    def decision_nodes(self, player=None):
+        '''
+        Returns the ids of every decision node, optionally only those of one player
+
+        :param self: self
+        :param player: 0 or 1 to filter by the acting player, None for both
+        :return: node ids in breadth first order
+        :rtype: numpy array
+        '''
+        mask = self.kind == DECISION
+
+        if player is not None:
+            mask &= self.player == player
+
+        return np.flatnonzero(mask)
+
+    def infostates(self):
+        '''
+        Every infostate in canonical row order: decision nodes in breadth first order,
+        then public card (-1 before it is dealt), then the acting player's private card
+
+        :param self: self
+        :return: list of (node, public card, private card)
+        :rtype: list
+        '''
+        infostates = []
+
+        for node in self.decision_nodes().tolist():
+
+            boards = [-1] if self.round[node] == 0 else range(self.num_ranks)
+
+            for board in boards:
+                for card in range(self.num_ranks):
+                    infostates.append((node, board, card))
+
+        return infostates
+
+
+def compile_tree(game):
+    '''
+    Enumerates every legal history of the game and precomputes the terminal payoffs.
+
+    The payoff table has shape (num_nodes, num_ranks, num_ranks, num_ranks) and is indexed
+    by [node, p1 card, p2 card, public card]. Terminals reached before the public card is dealt
+    hold the same payout along the public card axis.
+
+    :param game: a leduc game engine, walked through its GameState objects
+    :return: the compiled tree
+    :rtype: GameTree
+    '''
+    states = [game.initial_state()]
+    actions = []
+    parent = [-1]
+    child_lists = []
+    player = []
+    rounds = []
+    kind = []
+
+    # Breadth first, so a node's children always get larger ids than the node itself
+    i = 0
+    while i < len(states):
+
+        state = states[i]
+        rounds.append(state.round - 1)
+
+        if state.terminal:
+            kind.append(TERMINAL)
+            player.append(-1)
+            next_states = []
+            node_actions = []
+
+        elif state.r1_over:
+            kind.append(CHANCE)
+            player.append(-1)
+            next_states = [state.apply(':')]
+            node_actions = []
+
+        else:
+            kind.append(DECISION)
+            player.append(state.player)
+            node_actions = state.actions()
+            next_states = [state.apply(action) for action in node_actions]
+
+        actions.append(node_actions)
+        child_lists.append(list(range(len(states), len(states) + len(next_states))))
+
+        for next_state in next_states:
+            states.append(next_state)
+            parent.append(i)
+
+        i += 1
+
+    histories = [state.history for state in states]
+
+    max_actions = max(len(c) for c in child_lists)
+    children = np.full((len(histories), max_actions), -1, dtype=np.int32)
+
+    for node, node_children in enumerate(child_lists):
+        children[node, :len(node_children)] = node_children
+
+    ranks = np.array(sorted(set(game.cards)))
+    num_ranks = len(ranks)
+    payoffs = np.zeros((len(histories), num_ranks, num_ranks, num_ranks))
+
+    # Every rank triple as one array of deals, scored with one vectorized call per terminal
+    deals = ranks[np.indices((num_ranks,) * 3).reshape(3, -1).T]
+
+    for node, state in enumerate(states):
+
+        if kind[node] == TERMINAL:
+            payoffs[node] = state.payouts(deals).reshape(num_ranks, num_ranks, num_ranks)
+
+    return GameTree(
+        histories=histories,
+        actions=actions,
+        parent=np.array(parent, dtype=np.int32),
+        children=children,
+        player=np.array(player, dtype=np.int8),
+        rounds=np.array(rounds, dtype=np.int8),
+        kind=np.array(kind, dtype=np.int8),
+        payoffs=payoffs,
+    )
@@ -0,0 +1,123 @@
+from .CFR import CFR_agent
+import numpy as np
+
+
+class VectorCFR_agent(CFR_agent):
+    '''
+    Full width vanilla CFR over the public tree.
+
+    Instead of sampling one deal per iteration, every iteration walks the public tree once with
+    reach vectors over every private hand, so regret matching and the regret / strategy sum
+    updates are array operations over all hands and all decisions at once. Each iteration is an
+    exact vanilla CFR iteration (simultaneous updates, chance fully enumerated).
+
+    The table rows are in (decision, hand) order, so the table arrays are viewed directly as
+    (num_decisions, num_hands, max_actions). In an abstraction the strategy is gathered from the
+    abstract rows instead and every real infostate's update is summed into its abstract row.
+    '''
+
+    chance_sampled = False
+    supports_pruning = False
+
+    def __init__(self, iterations, plot_strategy_sum, plot_exploitability, dtype=np.float64, variant=None, game=None,
+                 abstraction=None):
+
+        super().__init__(iterations, plot_strategy_sum, plot_exploitability, dtype=dtype, variant=variant, game=game,
+                         abstraction=abstraction)
+
+        self.shape = (self.public_tree.num_decisions, self.public_tree.num_hands, self.public_tree.max_actions)
+
+        self.mask = self._real(self.table.mask)
+
+        #Legal action masks restricted to the decisions of each updated player
+        decision_player = self.public_tree.player[self.public_tree.decisions][:, None, None]
+        self.update_masks = {
+            None: self.mask,
+            0: self.mask & (decision_player == 0),
+            1: self.mask & (decision_player == 1),
+        }
+
+        #Public states by node kind, the visit counts of one traversal
+        self._public_states = np.bincount(self.public_tree.kind, minlength=3).tolist()
+
+    #The table in the real game's layout: views, or gathered copies when the rows are abstract
+    @property
+    def regret_sum(self):
+        return self._real(self.table.regret_sum)
+
+    @property
+    def strategy_sum(self):
+        return self._real(self.table.strategy_sum)
+
+    @property
+    def strategy(self):
+        return self._real(self.table.strategy)
+
+    def _real(self, rows):
+        '''
+        Table rows as a (num_decisions, num_hands, max_actions) array of the real game
+        '''
+        if self.real_rows is None:
+            return rows.reshape(self.shape)
+
+        return rows[self.real_rows].reshape(self.shape)
+
+    def _accumulate(self, rows, values):
+        '''
+        Adds real game values to the table rows, summed over the real infostates of each abstract row
+        '''
+        if self.real_rows is None:
+            rows += values.reshape(rows.shape)
+        else:
+            np.add.at(rows, self.real_rows, values.reshape(-1, rows.shape[1]))
+
+    def iteration(self):
+        '''
+        One CFR iteration over every card deal at once, exact vanilla CFR with the default variant
+        '''
+        tree = self.public_tree
+
+        self.iteration_count += 1
+        weight = self.variant.strategy_weight(self.iteration_count)
+        instrumentation = self.instrumentation
+
+        for update_player in self.variant.update_players:
+
+            if instrumentation is not None:
+                instrumentation.start()
+
+            self.table.regret_matching()
+            strategy = self._real(self.table.strategy)
+            sigma = tree.sigma_rows(strategy)
+
+            if instrumentation is not None:
+                instrumentation.lap('regret_matching')
+
+            action_values, own_reach = tree.traverse(sigma)
+            mask = self.update_masks[update_player]
+
+            if instrumentation is not None:
+                instrumentation.lap('traversal')
+
+                #Every public state is visited once per traversal
+                for kind, states in enumerate(self._public_states):
+                    instrumentation.visits[kind] += states
+
+            #v_sig_I for every hand, then r(I,a) = v(I,a) - v_sig_I on legal actions
+            node_values = (strategy * action_values).sum(axis=2, keepdims=True)
+            action_values -= node_values
+            action_values *= mask
+            self._accumulate(self.table.regret_sum, action_values)
+
+            #sig(a) = sig(a) + (pi_i * sig(a))
+            own_reach *= weight
+            self._accumulate(self.table.strategy_sum, own_reach[:, :, None] * strategy * mask)
+            self.table.touch(self.player_rows[update_player])
+
+            self.variant.update(self.table, self.iteration_count, self.player_rows[update_player])
+
+            if instrumentation is not None:
+                instrumentation.lap('regret_update')
+
+        if instrumentation is not None:
+            instrumentation.end_iteration(self.iteration_count)
@@ -0,0 +1,67 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from leduc.abstraction import Abstraction
+from leduc.leduc import leduc
+from leduc.vector_CFR import VectorCFR_agent
+from leduc.MCCFR import MCCFR_agent
+from cfr.match import MatchSimulator
+from cfr.policy import Policy
+
+def test_identity_abstraction_matches_real_game():
+
+    real = VectorCFR_agent(1, False, False)
+    abstract = VectorCFR_agent(1, False, False, abstraction=Abstraction())
+
+    for _ in range(50):
+        real.iteration()
+        abstract.iteration()
+
+    assert np.allclose(abstract.real_strategy(), real.real_strategy())
+    assert abstract.calculate_exploitability() == pytest.approx(real.calculate_exploitability())
+
+def test_card_buckets_follow_hand_strength():
+
+    game = leduc(ranks=5)
+    card_map = Abstraction(card_buckets=2).card_map(game)
+
+    # Before the board the buckets split the ranks by strength, a pair with the board is always on top
+    assert card_map[0].tolist() == [0, 0, 0, 1, 1]
+    assert all(card_map[board + 1, board] == 1 for board in range(5))
+
+def test_abstract_training_maps_back_to_real_game():
+
+    game = leduc(ranks=6)
+    abstraction = Abstraction(card_buckets=3, betting=True)
+    agent = VectorCFR_agent(1, False, False, game=game, abstraction=abstraction)
+
+    # Merged betting histories always share their legal actions
+    for row, actions in zip(agent.real_rows, agent._real_actions):
+        assert agent.table.actions[row] == actions
+
+    assert len(agent.table.keys) < len(agent._real_keys) / 4
+
+    start = agent.calculate_exploitability()
+
+    for _ in range(100):
+        agent.iteration()
+
+    assert agent.calculate_exploitability() < start / 2
+
+    policy = Policy.from_agent(agent)
+
+    assert policy.lookup.max() == len(agent._real_keys) - 1
+    assert MatchSimulator.leduc(game).play(policy, 'random', 2000, seed=0)[0] > 0
+
+def test_sampled_agents_train_in_abstraction():
+
+    agent = MCCFR_agent(1, False, False, abstraction=Abstraction(card_buckets=2), seed=0)
+
+    for _ in range(200):
+        agent.iteration()
+
+    assert len(agent.table.keys) < 288
+    assert np.isfinite(agent.calculate_exploitability())
@@ -0,0 +1,25 @@
+import pytest
+import sys
+import os
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+sys.path.append(os.path.join(os.path.dirname(__file__), "../benchmarks"))
+
+import run_benchmarks
+
+def test_harness_emits_json(monkeypatch):
+
+    monkeypatch.setattr(run_benchmarks, "THROUGHPUT_SECONDS", 0.05)
+    monkeypatch.setattr(run_benchmarks, "EPSILON_SECONDS", 0.2)
+    monkeypatch.setattr(run_benchmarks, "LATENCY_REPEATS", 2)
+    monkeypatch.setattr(run_benchmarks, "MEMORY_ITERATIONS", 5)
+
+    results = json.loads(json.dumps(run_benchmarks.run(["kuhn/cfr", "leduc/vector"], ["vanilla"])))
+
+    assert [mode["solver"] for mode in results["modes"]] == ["kuhn/cfr", "leduc/vector"]
+
+    for mode in results["modes"]:
+        assert mode["throughput"]["iterations_per_second"] > 0
+        assert mode["exploitability_latency"]["median_seconds"] > 0
+        assert mode["memory"]["peak_bytes"] >= mode["memory"]["table_bytes"]
+        assert set(mode["time_to_epsilon"]["thresholds"]) == {str(t) for t in run_benchmarks.THRESHOLDS[mode["solver"].split("/")[0]]}
@@ -0,0 +1,152 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from kuhn.CFR import CFR_agent as KuhnCFR_agent
+from leduc.CFR import CFR_agent as LeducCFR_agent
+from leduc.leduc import leduc
+from leduc.abstraction import Abstraction
+from cfr.parallel import ParallelCFR
+from cfr.variants import LinearCFR, VanillaCFR
+
+@pytest.mark.parametrize("agent_type", [KuhnCFR_agent, LeducCFR_agent])
+def test_resumed_training_matches_uninterrupted(agent_type, tmp_path):
+
+    path = tmp_path / "checkpoint.npz"
+
+    agent = agent_type(1, False, False)
+    agent.rng.seed(7)
+
+    for i in range(50):
+        agent.iteration()
+
+    agent.join_exploitability([(agent.iteration_count, agent.calculate_exploitability())])
+    agent.save_checkpoint(path)
+
+    resumed = agent_type(1, False, False)
+    resumed.resume(path)
+
+    assert os.listdir(tmp_path) == ["checkpoint.npz"]
+    assert resumed.iteration_count == 50
+    assert resumed.exploitability_iterations == [50]
+    assert resumed.exploitability == agent.exploitability
+
+    for i in range(50):
+        agent.iteration()
+        resumed.iteration()
+
+    assert np.array_equal(agent.table.regret_sum, resumed.table.regret_sum)
+    assert np.array_equal(agent.table.final_strategy, resumed.table.final_strategy)
+
+def test_checkpoint_of_another_game_is_rejected(tmp_path):
+
+    path = tmp_path / "kuhn.npz"
+    KuhnCFR_agent(1, False, False).save_checkpoint(path)
+
+    with pytest.raises(ValueError):
+        LeducCFR_agent(1, False, False).resume(path)
+
+def test_checkpoint_of_other_rules_or_variant_is_rejected(tmp_path):
+
+    path = tmp_path / "leduc.npz"
+    LeducCFR_agent(1, False, False).save_checkpoint(path)
+
+    with pytest.raises(ValueError):
+        LeducCFR_agent(1, False, False, game=leduc(bet_sizes=(2, 8))).resume(path)
+
+    with pytest.raises(ValueError):
+        LeducCFR_agent(1, False, False, variant=LinearCFR()).resume(path)
+
+def test_checkpoint_of_another_abstraction_is_rejected(tmp_path):
+
+    path = tmp_path / "leduc.npz"
+    LeducCFR_agent(1, False, False).save_checkpoint(path)
+
+    #The identity abstraction has the same infostate keys, only the description tells them apart
+    with pytest.raises(ValueError):
+        LeducCFR_agent(1, False, False, abstraction=Abstraction()).resume(path)
+
+    LeducCFR_agent(1, False, False, abstraction=Abstraction(card_buckets=2)).save_checkpoint(path)
+
+    with pytest.raises(ValueError):
+        LeducCFR_agent(1, False, False, abstraction=Abstraction(card_buckets=3)).resume(path)
+
+def pruned_agent():
+
+    agent = LeducCFR_agent(1, False, False, variant=VanillaCFR(alternating=True))
+    agent.enable_pruning(full_every=40)
+    agent.rng.seed(5)
+
+    return agent
+
+def test_resumed_pruned_training_matches_uninterrupted(tmp_path):
+
+    path = tmp_path / "checkpoint.npz"
+
+    agent = pruned_agent()
+
+    for i in range(60):
+        agent.iteration()
+
+    agent.save_checkpoint(path)
+
+    resumed = pruned_agent()
+    resumed.resume(path)
+
+    assert resumed._prune_windows == agent._prune_windows
+    assert resumed.pruned_fraction() == agent.pruned_fraction() > 0
+
+    for i in range(60):
+        agent.iteration()
+        resumed.iteration()
+
+    agent.flush_pruning()
+    resumed.flush_pruning()
+
+    assert np.array_equal(agent.table.regret_sum, resumed.table.regret_sum)
+    assert np.array_equal(agent.table.strategy_sum, resumed.table.strategy_sum)
+
+def test_pruning_state_that_can_not_be_restored_is_rejected(tmp_path):
+
+    pruned = tmp_path / "pruned.npz"
+    pruned_agent().save_checkpoint(pruned)
+
+    with pytest.raises(ValueError):
+        LeducCFR_agent(1, False, False, variant=VanillaCFR(alternating=True)).resume(pruned)
+
+    unpruned = tmp_path / "unpruned.npz"
+    LeducCFR_agent(1, False, False, variant=VanillaCFR(alternating=True)).save_checkpoint(unpruned)
+
+    with pytest.raises(ValueError):
+        pruned_agent().resume(unpruned)
+
+def parallel_run(agent, iterations, seed=0):
+
+    trainer = ParallelCFR(agent, num_workers=2, batch_iterations=25, seed=seed)
+    trainer.run(iterations)
+    trainer.close()
+
+def test_resumed_parallel_training_continues_the_worker_seeds(tmp_path):
+
+    path = tmp_path / "checkpoint.npz"
+
+    agent = KuhnCFR_agent(1, False, False)
+    parallel_run(agent, 50)
+    agent.save_checkpoint(path)
+
+    resumed = KuhnCFR_agent(1, False, False)
+    resumed.resume(path)
+
+    #A fresh run from the same checkpoint would replay the deals of the first 50 iterations
+    replayed = KuhnCFR_agent(1, False, False)
+    replayed.resume(path)
+    replayed.worker_seeds = None
+
+    for trainer_agent in (agent, resumed, replayed):
+        parallel_run(trainer_agent, 50)
+
+    assert np.array_equal(agent.table.regret_sum, resumed.table.regret_sum)
+    assert np.array_equal(agent.table.strategy_sum, resumed.table.strategy_sum)
+    assert not np.array_equal(agent.table.regret_sum, replayed.table.regret_sum)
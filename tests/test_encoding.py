@@ -0,0 +1,41 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from cfr.encoding import InfostateEncoder
+
+def test_round_trip():
+
+    encoder = InfostateEncoder(num_nodes=90, num_cards=3, num_public_cards=3)
+
+    keys = set()
+
+    for node in range(90):
+        for public_card in range(-1, 3):
+            for card in range(3):
+                for player in range(2):
+
+                    key = encoder.encode(player, card, node, public_card)
+
+                    assert 0 <= key < encoder.size
+                    assert encoder.decode(key) == (player, card, public_card, node)
+
+                    keys.add(key)
+
+    assert len(keys) == encoder.size
+
+def test_vectorized_matches_scalar():
+
+    encoder = InfostateEncoder(num_nodes=12, num_cards=3)
+
+    node = np.arange(12)
+    keys = encoder.encode_many(1, 2, node)
+
+    assert keys.tolist() == [encoder.encode(1, 2, n) for n in range(12)]
+
+    player, card, public_card, decoded = encoder.decode_many(keys)
+
+    assert (decoded == node).all()
+    assert (public_card == -1).all()
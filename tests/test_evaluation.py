@@ -0,0 +1,29 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from cfr.evaluation import AsyncExploitability
+from kuhn.CFR import CFR_agent as KuhnCFR_agent
+from leduc.vector_CFR import VectorCFR_agent
+
+@pytest.mark.parametrize("agent_type", [KuhnCFR_agent, VectorCFR_agent])
+def test_snapshots_match_blocking_exploitability(agent_type):
+
+    agent = agent_type(1, False, False)
+    evaluator = AsyncExploitability(agent_type)
+    expected = []
+
+    for i in range(30):
+
+        agent.iteration()
+
+        if i % 10 == 0:
+            evaluator.submit(i, agent.table.final_strategy)
+            expected.append((i, agent.calculate_exploitability()))
+
+    agent.join_exploitability(evaluator.close())
+
+    assert agent.exploitability_iterations == [0, 10, 20]
+    assert np.allclose(agent.exploitability, [value for i, value in expected])
@@ -0,0 +1,64 @@
+import pytest
+import sys
+import os
+import io
+import json
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from kuhn.CFR import CFR_agent as KuhnCFR_agent
+from leduc.CFR import CFR_agent as LeducCFR_agent
+from leduc.vector_CFR import VectorCFR_agent
+
+@pytest.mark.parametrize("agent_type", [KuhnCFR_agent, LeducCFR_agent, VectorCFR_agent])
+def test_snapshots_are_json_lines(agent_type):
+
+    output = io.StringIO()
+    agent = agent_type(1, False, False)
+    instrumentation = agent.instrument(output, every=5)
+
+    for i in range(10):
+        agent.iteration()
+
+    agent.measure_exploitability()
+
+    lines = [json.loads(line) for line in output.getvalue().splitlines()]
+
+    assert [line["iteration"] for line in lines] == [5, 10]
+    assert lines[-1]["counters"]["iterations"] == 10
+    assert lines[-1]["counters"]["decision_visits"] > 0
+    assert lines[-1]["counters"]["terminal_visits"] > 0
+    assert {"traversal", "regret_update"} <= set(lines[-1]["timers"])
+    assert {"average_strategy", "exploitability"} <= set(instrumentation.snapshot(10)["timers"])
+
+def test_parallel_workers_never_write_and_their_counts_are_merged(tmp_path):
+
+    path = tmp_path / "instrumentation.jsonl"
+    agent = LeducCFR_agent(100, False, False)
+    assert agent.instrumentation is None
+
+    agent.instrument(str(path), every=20)
+    agent.train(exploitability_sample=20, num_workers=2)
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+
+    assert [line["iteration"] for line in lines] == [20, 40, 60, 80, 100]
+    assert lines[-1]["counters"]["iterations"] == 200
+    assert lines[-1]["counters"]["decision_visits"] > 0
+    assert lines[-1]["counters"]["chance_visits"] > 0
+    assert lines[-1]["counters"]["terminal_visits"] > 0
+
+def test_train_closes_the_file_and_reopens_it_on_the_next_run(tmp_path):
+
+    path = tmp_path / "instrumentation.jsonl"
+    agent = KuhnCFR_agent(20, False, False)
+    instrumentation = agent.instrument(str(path), every=10)
+    output = instrumentation.output
+
+    agent.train(exploitability_sample=10)
+
+    assert output.closed
+    assert [json.loads(line)["iteration"] for line in path.read_text().splitlines()] == [10, 20]
+
+    agent.train(exploitability_sample=10)
+
+    assert [json.loads(line)["iteration"] for line in path.read_text().splitlines()] == [10, 20, 30, 40]
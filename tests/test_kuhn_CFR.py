@@ -4,6 +4,8 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
 
 from kuhn.CFR import CFR_agent
+from kuhn.kuhn import KuhnPoker
+import numpy as np
 
 #Compute the expected utilities of each players strategies
 def test_expected_utilities():
@@ -12,3 +14,14 @@ def test_expected_utilities():
 
 
 
+
+def test_vectorized_payouts_match_scalar():
+
+    game = KuhnPoker()
+    deals = np.indices((3, 3)).reshape(2, -1).T
+
+    for history in game.getHistories():
+
+        expected = [game.getPayouts(history, deal) for deal in deals.tolist()]
+
+        assert np.array_equal(game.payouts(history, deals), expected)
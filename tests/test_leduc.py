@@ -85,4 +85,62 @@ def test_actions():
     
     for history in history_map:
         print(history)
-        assert agent.actions(history) == history_map[history]
\ No newline at end of file
+        assert agent.actions(history) == history_map[history]
+
+
+def test_game_state_apply():
+
+    agent = leduc()
+
+    state = agent.initial_state()
+
+    for action in 'prc:':
+        state = state.apply(action)
+
+    assert (state.round, state.player, state.raises, state.committed) == (2, 0, 0, (2, 2))
+
+    state = state.apply('r').apply('r')
+
+    assert state.actions() == ['f', 'c']
+    assert state.committed == (4, 6)
+
+    state = state.apply('f')
+
+    assert state.terminal
+    assert state.payout([0, 1, 2]) == -4
+    assert agent.payout('prc:rrf', [0, 1, 2]) == -4
+
+    with pytest.raises(ValueError):
+        agent.initial_state().apply('c')
+
+def test_leduc_family():
+
+    assert leduc().cards == [0,0,1,1,2,2]
+    assert leduc() == leduc(bet_sizes=(1, 2))
+
+    game = leduc(ranks=4, suits=3, rounds=3, raise_cap=1, antes=(2, 2))
+
+    assert len(game.cards) == 12
+
+    # Rounds after the second start right away on the same board
+    assert game.actions('rc') == []
+    assert game.actions('rc:rc:') == ['p', 'r']
+    assert game.player_to_act('rc:pp:r') == 1
+    assert game.actions('rc:pp:r') == ['f', 'c']
+    assert game.payout('rc:pp:rc', [3, 3, 1]) == 0
+    assert game.payout('rc:pp:rc', [3, 1, 1]) == -5
+    assert game.payout('pp:pp:pp', [2, 0, 0]) == -2
+
+    # Single round games settle on the private cards alone
+    assert leduc(rounds=1).payout('rc', [2, 1]) == 2
+
+    with pytest.raises(ValueError):
+        leduc(rounds=3, bet_sizes=(1, 2))
+
+    with pytest.raises(ValueError):
+        leduc(antes=(1, 2))
+
+    # Round 3 starts after its separator only
+    for history in ['rc:ppr', 'rc:pp::', 'rc:rcp']:
+        with pytest.raises(ValueError):
+            game.state(history)
@@ -0,0 +1,150 @@
+import pytest
+import sys
+import os
+import copy
+import numpy as np
+from collections import Counter
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from leduc.CFR import CFR_agent
+from leduc.vector_CFR import VectorCFR_agent
+from cfr.variants import VanillaCFR
+
+def test_public_card_ranks_match_suited_deck():
+
+    agent = CFR_agent(1, False, False)
+    deck = agent.game.cards
+
+    for i, c0 in enumerate(deck):
+        for j, c1 in enumerate(deck):
+
+            if i == j:
+                continue
+
+            # Every suited card left in the deck, one by one
+            remaining = [card for k, card in enumerate(deck) if k not in (i, j)]
+            expected = {rank: count / len(remaining) for rank, count in Counter(remaining).items()}
+
+            assert dict(agent._public_cards[c0][c1]) == pytest.approx(expected)
+
+def test_exploitability_decreases():
+
+    agent = CFR_agent(1, False, False)
+    agent.rng.seed(0)
+
+    start = agent.calculate_exploitability()
+
+    for _ in range(200):
+        agent.iteration()
+
+    assert agent.calculate_exploitability() < start / 2
+
+def test_pruning_skips_negative_regret_subtrees():
+
+    agent = CFR_agent(1, False, False)
+    agent.rng.seed(0)
+
+    for _ in range(2000):
+        agent.iteration()
+
+    # A threshold no regret reaches leaves training unchanged
+    unpruned = copy.deepcopy(agent)
+    never = copy.deepcopy(agent)
+    never.enable_pruning(threshold=-1e18)
+
+    for _ in range(50):
+        unpruned.iteration()
+        never.iteration()
+
+    assert np.array_equal(never.table.regret_sum, unpruned.table.regret_sum)
+    assert never.pruned_fraction() == 0
+
+    # With simultaneous updates only subtrees that update nothing are pruned
+    unpruned = copy.deepcopy(agent)
+    agent.enable_pruning(full_every=10)
+    start = agent.calculate_exploitability()
+
+    for _ in range(1000):
+        agent.iteration()
+        unpruned.iteration()
+
+    assert 0 < agent.pruned_fraction() < 1
+    assert np.allclose(agent.table.regret_sum, unpruned.table.regret_sum)
+    assert np.allclose(agent.table.strategy_sum, unpruned.table.strategy_sum)
+    assert agent.calculate_exploitability() < start
+
+    # Full traversals prune nothing
+    pruned = agent.nodes_pruned
+    agent.iteration_count = 9999
+    agent.iteration()
+
+    assert agent.nodes_pruned == pruned
+
+def test_pruning_flushed_every_iteration_matches_alternating_cfr():
+
+    agent = CFR_agent(1, False, False, variant=VanillaCFR(alternating=True))
+    agent.rng.seed(0)
+
+    for _ in range(300):
+        agent.iteration()
+
+    unpruned = copy.deepcopy(agent)
+    agent.enable_pruning()
+
+    # Replaying the skipped visits right away adds exactly what traversing them would have
+    for _ in range(300):
+        agent.iteration()
+        agent.flush_pruning()
+        unpruned.iteration()
+
+    assert agent.pruned_fraction() > 0
+    assert np.allclose(agent.table.regret_sum, unpruned.table.regret_sum)
+    assert np.allclose(agent.table.strategy_sum, unpruned.table.strategy_sum)
+
+def test_pruning_window_ends_once_the_regret_could_turn_positive():
+
+    agent = CFR_agent(1, False, False, variant=VanillaCFR(alternating=True))
+    agent.rng.seed(0)
+
+    # Player 1 never raises at the root
+    rows = [agent.rows[agent.encoder.encode(0, card, 0, -1)] for card in range(3)]
+    agent.table.regret_sum[rows, :2] = [1, -1e6]
+
+    unpruned = copy.deepcopy(agent)
+    agent.enable_pruning(full_every=1000)
+
+    agent.iteration()
+    unpruned.iteration()
+    row = rows[agent.cards[0]]
+
+    # The window stays open and keeps the skipped visit until it is replayed
+    assert agent.nodes_pruned > 0
+    assert 0 < agent._prune_windows[row][1] < 1e6
+    assert agent.table.regret_sum[row, 1] == -1e6
+
+    agent.flush_pruning()
+
+    assert not agent._missed
+    assert np.allclose(agent.table.regret_sum, unpruned.table.regret_sum)
+    assert np.allclose(agent.table.strategy_sum, unpruned.table.strategy_sum)
+
+    # A regret the first visit could already turn positive is caught up on that visit
+    agent = CFR_agent(1, False, False, variant=VanillaCFR(alternating=True))
+    agent.rng.seed(0)
+    agent.table.regret_sum[rows, :2] = [1, -1e-9]
+
+    unpruned = copy.deepcopy(agent)
+    agent.enable_pruning(full_every=1000)
+
+    agent.iteration()
+    unpruned.iteration()
+
+    assert agent.nodes_pruned == 0
+    assert agent._prune_windows[rows[agent.cards[0]]][1] == 0
+    assert not agent._missed
+    assert np.allclose(agent.table.regret_sum, unpruned.table.regret_sum)
+
+def test_pruning_needs_a_chance_sampled_traversal():
+
+    with pytest.raises(ValueError):
+        VectorCFR_agent(1, False, False).enable_pruning()
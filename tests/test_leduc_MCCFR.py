@@ -0,0 +1,38 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from leduc.MCCFR import MCCFR_agent
+
+def test_sampling_modes_fill_the_tables():
+
+    for sampling in ['external', 'outcome']:
+
+        agent = MCCFR_agent(1, False, False, sampling=sampling, seed=0)
+
+        for i in range(500):
+            agent.iteration()
+
+        agent.calculate_final_strategy()
+
+        assert (agent.table.regret_sum != 0).any()
+        assert (agent.table.strategy_sum != 0).any()
+        assert np.allclose(agent.table.final_strategy.sum(axis=1), 1)
+        assert (agent.table.final_strategy[~agent.table.mask] == 0).all()
+
+def test_seeded_runs_are_reproducible():
+
+    agents = [MCCFR_agent(1, False, False, seed=7) for i in range(2)]
+
+    for agent in agents:
+        for i in range(200):
+            agent.iteration()
+
+    assert np.array_equal(agents[0].table.regret_sum, agents[1].table.regret_sum)
+
+def test_unknown_sampling_mode():
+
+    with pytest.raises(ValueError):
+        MCCFR_agent(1, False, False, sampling='chance')
@@ -0,0 +1,62 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from leduc.leduc import leduc
+from leduc.tree import compile_tree, DECISION, CHANCE, TERMINAL
+
+def test_tree_matches_string_engine():
+
+    game = leduc()
+    tree = compile_tree(game)
+
+    assert tree.histories[0] == ''
+
+    for node, history in enumerate(tree.histories):
+
+        if game.terminal(history):
+            assert tree.kind[node] == TERMINAL
+        elif game.r1_over(history):
+            assert tree.kind[node] == CHANCE
+            assert tree.histories[tree.children[node][0]] == history + ':'
+        else:
+            assert tree.kind[node] == DECISION
+            assert tree.player[node] == game.player_to_act(history)
+            assert tree.actions[node] == game.actions(history)
+            assert tree.num_actions[node] == len(game.actions(history))
+
+        if node > 0:
+            assert tree.histories[tree.parent[node]] == history[:-1]
+
+def test_precomputed_payoffs():
+
+    game = leduc()
+    tree = compile_tree(game)
+
+    for history in ['pp:pp', 'prc:rc', 'rrc:prrc', 'rf', 'pp:prrf']:
+        for cards in [[2,1,0], [1,2,2], [2,2,1], [0,1,0]]:
+
+            node = tree.node(history)
+
+            assert tree.payoffs[node, cards[0], cards[1], cards[2]] == game.payout(history, cards)
+
+def test_vectorized_payouts_match_scalar():
+
+    game = leduc()
+    tree = compile_tree(game)
+
+    deals = np.indices((3, 3, 3)).reshape(3, -1).T
+    matrix = tree.payoff_matrix(deals)
+
+    assert matrix.shape == (len(tree.terminal_nodes), len(deals))
+
+    for row, node in enumerate(tree.terminal_nodes):
+
+        history = tree.histories[node]
+        expected = [game.payout(history, deal) for deal in deals.tolist()]
+
+        assert np.array_equal(game.payouts(history, deals), expected)
+        assert np.array_equal(tree.payouts(node, deals), expected)
+        assert np.array_equal(matrix[row], expected)
@@ -0,0 +1,120 @@
+import pytest
+import sys
+import os
+import itertools
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from leduc.vector_CFR import VectorCFR_agent
+from leduc.leduc import leduc
+
+def test_traverse_matches_per_deal_recursion():
+
+    agent = VectorCFR_agent(1, False, False)
+    game = agent.game
+    tree = agent.public_tree
+
+    rng = np.random.default_rng(0)
+    strategy = rng.random(agent.regret_sum.shape) * agent.mask
+    strategy /= strategy.sum(axis=2, keepdims=True)
+
+    action_values, own_reach = tree.traverse(tree.sigma_rows(strategy))
+
+    decision = {(tree.node[s], tree.board[s]): d for d, s in enumerate(tree.decisions)}
+    expected = np.zeros_like(action_values)
+
+    # Counterfactual values of every deal, straight from the string game engine
+    def walk(history, cards, reach, chance):
+
+        if game.terminal(history):
+            payout = game.payout(history, cards)
+            return np.array([payout, -payout])
+
+        if game.r1_over(history):
+            remaining = list(game.cards)
+            remaining.remove(cards[0])
+            remaining.remove(cards[1])
+            return sum(walk(history + ':', cards + [card], reach, chance / 4) / 4 for card in remaining)
+
+        player = game.player_to_act(history)
+        board = cards[2] if len(cards) > 2 else -1
+        d = decision[(agent.tree.node(game.state(history).history), board)]
+
+        value = np.zeros(2)
+        for i, action in enumerate(game.actions(history)):
+            prob = strategy[d, cards[player], i]
+            next_reach = list(reach)
+            next_reach[player] *= prob
+            action_value = walk(history + action, cards, next_reach, chance)
+            expected[d, cards[player], i] += chance * reach[1 - player] * action_value[player]
+            value += prob * action_value
+
+        return value
+
+    for i, j in itertools.permutations(range(6), 2):
+        walk('', [game.cards[i], game.cards[j]], [1, 1], 1 / 30)
+
+    assert np.allclose(action_values, expected)
+
+def test_exploitability_decreases():
+
+    agent = VectorCFR_agent(1, False, False)
+
+    agent.calculate_final_strategy()
+    start = agent.calculate_exploitability()
+
+    for i in range(200):
+        agent.iteration()
+
+    agent.calculate_final_strategy()
+
+    assert agent.calculate_exploitability() < start
+
+@pytest.mark.parametrize("game", [leduc(), leduc(ranks=2, suits=3, rounds=3, raise_cap=1, antes=(2, 2))])
+def test_best_response_matches_belief_recursion(game):
+
+    agent = VectorCFR_agent(1, False, False, game=game)
+    tree = agent.public_tree
+    num_ranks = game.ranks
+
+    rng = np.random.default_rng(1)
+    strategy = rng.random(agent.regret_sum.shape) * agent.mask
+    strategy /= strategy.sum(axis=2, keepdims=True)
+
+    decision = {(tree.node[s], tree.board[s]): d for d, s in enumerate(tree.decisions)}
+    deals = list(itertools.permutations(range(len(game.cards)), 3))
+
+    # Best response values per own hand, opponent hands kept as reach vectors over every deal
+    def walk(history, board, player, opponent_reach):
+
+        if game.terminal(history):
+            value = np.zeros(num_ranks)
+            for i, j, k in deals:
+                if board >= 0 and game.cards[k] != board:
+                    continue
+                cards = [game.cards[i], game.cards[j], game.cards[k]]
+                payout = game.payout(history, cards) if player == 0 else -game.payout(history, cards)
+                value[cards[player]] += payout * opponent_reach[cards[1 - player]] / len(deals)
+            return value
+
+        if game.r1_over(history):
+            return sum(walk(history + ':', b, player, opponent_reach) for b in range(num_ranks))
+
+        actor = game.player_to_act(history)
+        d = decision[(agent.tree.node(game.state(history).history), board)]
+        values = []
+
+        for i, action in enumerate(game.actions(history)):
+            # Rounds after the second add their ':' to the history themselves
+            child = game.state(history).apply(action).history
+            if actor == player:
+                values.append(walk(child, board, player, opponent_reach))
+            else:
+                values.append(walk(child, board, player, opponent_reach * strategy[d, :, i]))
+
+        return np.max(values, axis=0) if actor == player else np.sum(values, axis=0)
+
+    sigma = tree.sigma_rows(strategy)
+
+    for player in range(2):
+        assert np.allclose(tree.best_response(sigma, player), walk('', -1, player, np.ones(num_ranks)))
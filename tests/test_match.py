@@ -0,0 +1,48 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from cfr.match import MatchSimulator
+from cfr.policy import Policy
+from kuhn.CFR import CFR_agent as KuhnCFR_agent
+from leduc.CFR import CFR_agent as LeducCFR_agent
+
+def test_kuhn_equilibrium_value():
+
+    agent = KuhnCFR_agent(1, False, False)
+    agent.rng.seed(0)
+    for i in range(20000):
+        agent.iteration()
+
+    policy = Policy.from_agent(agent)
+    mean, stderr = MatchSimulator.kuhn().play(policy, policy, 400000, seed=0, swap_seats=False)
+
+    # Player 1's game value in Kuhn poker is -1/18
+    assert abs(mean + 1 / 18) < 4 * stderr + 0.005
+
+def test_seat_swapped_self_play_is_fair():
+
+    simulator = MatchSimulator.leduc()
+
+    mean, stderr = simulator.play('random', 'random', 200000, seed=1)
+
+    assert abs(mean) < 4 * stderr
+
+def test_batches_settle_with_payout():
+
+    simulator = MatchSimulator.leduc()
+    game = LeducCFR_agent(1, False, False).game
+    rng = np.random.default_rng(2)
+
+    cards = simulator.deal(1000, rng)
+    seats = np.zeros(1000, dtype=np.int64)
+
+    # always_raise against itself: raise, re-raise, call in both rounds
+    winnings = simulator.play_batch(('always_raise', 'always_raise'), seats, cards, rng)
+    expected = [game.payout('rrc:rrc', list(c)) for c in cards.tolist()]
+
+    assert np.array_equal(winnings, expected)
+    # no rank is dealt more often than it is in the deck
+    assert all(np.bincount(c, minlength=3).max() <= 2 for c in cards)
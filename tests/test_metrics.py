@@ -0,0 +1,32 @@
+import pytest
+import sys
+import os
+import subprocess
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from cfr.metrics import read_metrics
+from kuhn.CFR import CFR_agent as KuhnCFR_agent
+
+@pytest.mark.parametrize("name", ["metrics.csv", "metrics.jsonl"])
+def test_training_streams_metrics(name, tmp_path):
+
+    path = tmp_path / name
+
+    agent = KuhnCFR_agent(120, False, False)
+    agent.train(metrics_path=path)
+
+    metrics = read_metrics(path)
+
+    assert metrics["iteration"] == agent.exploitability_iterations == [1, 51, 101]
+    assert metrics["exploitability"] == pytest.approx(agent.exploitability)
+    assert metrics["elapsed"] == sorted(metrics["elapsed"])
+    assert agent.metrics is None
+
+def test_solvers_import_without_matplotlib():
+
+    src = os.path.join(os.path.dirname(__file__), "../src")
+    code = "import sys, kuhn.CFR, leduc.CFR, leduc.vector_CFR, leduc.MCCFR; print('matplotlib' in sys.modules)"
+
+    result = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True)
+
+    assert result.stdout.strip() == "False"
@@ -0,0 +1,62 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from cfr.parallel import ParallelCFR, SharedMemoryCFR
+from cfr.variants import CFRPlus
+from kuhn.CFR import CFR_agent as KuhnCFR_agent
+from leduc.CFR import CFR_agent as LeducCFR_agent
+from leduc.MCCFR import MCCFR_agent
+from leduc.vector_CFR import VectorCFR_agent
+
+def train(agent_type, seed):
+
+    agent = agent_type(1, False, False)
+    trainer = ParallelCFR(agent, num_workers=2, batch_iterations=25, seed=seed)
+    trainer.run(50)
+    trainer.close()
+
+    return agent
+
+@pytest.mark.parametrize("agent_type", [KuhnCFR_agent, LeducCFR_agent])
+def test_parallel_runs_are_reproducible(agent_type):
+
+    agent = train(agent_type, seed=3)
+    again = train(agent_type, seed=3)
+    other = train(agent_type, seed=4)
+
+    assert agent.iteration_count == 50
+    assert np.array_equal(agent.table.regret_sum, again.table.regret_sum)
+    assert np.array_equal(agent.table.strategy_sum, again.table.strategy_sum)
+    assert not np.array_equal(agent.table.regret_sum, other.table.regret_sum)
+
+def test_parallel_training_lowers_exploitability():
+
+    agent = train(KuhnCFR_agent, seed=0)
+    start = KuhnCFR_agent(1, False, False)
+
+    assert agent.calculate_exploitability() < start.calculate_exploitability()
+
+def test_unmergeable_agents_are_rejected():
+
+    with pytest.raises(ValueError):
+        ParallelCFR(VectorCFR_agent(1, False, False))
+
+    with pytest.raises(ValueError):
+        ParallelCFR(KuhnCFR_agent(1, False, False, variant=CFRPlus()))
+
+def test_shared_memory_workers_update_the_master_table():
+
+    agent = MCCFR_agent(1, False, False, seed=0)
+    start = agent.calculate_exploitability()
+
+    trainer = SharedMemoryCFR(agent, num_workers=2)
+    trainer.run(200)
+    trainer.close()
+
+    assert agent.iteration_count == 200
+    assert agent.table.regret_sum.flags.owndata
+    assert agent.table.strategy_sum.sum() > 0
+    assert agent.calculate_exploitability() < start
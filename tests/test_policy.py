@@ -0,0 +1,44 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from cfr.policy import Policy
+from kuhn.CFR import CFR_agent as KuhnCFR_agent
+from leduc.CFR import CFR_agent as LeducCFR_agent
+
+def test_batched_probabilities_match_final_strategy(tmp_path):
+
+    agent = LeducCFR_agent(1, False, False)
+    for i in range(100):
+        agent.iteration()
+
+    policy = Policy.from_agent(agent)
+    infostates = np.array(agent.table.keys)[::-1]
+
+    assert np.array_equal(policy.probabilities(infostates), agent.table.final_strategy[::-1])
+
+    agent.export_policy(tmp_path / "leduc.policy")
+    mapped = Policy.from_file(tmp_path / "leduc.policy")
+
+    assert np.array_equal(mapped.probabilities(infostates), policy.probabilities(infostates))
+    assert mapped.actions(infostates) == policy.actions(infostates)
+    assert mapped.actions(infostates)[-1] == list(agent.table.actions[0])
+
+    with pytest.raises(KeyError):
+        policy.probabilities([agent.table.keys[0], -5])
+
+def test_vectorized_sampling_frequencies():
+
+    agent = KuhnCFR_agent(1, False, False)
+    agent.table.strategy_sum[:2] = [[1, 3], [1, 0]]
+    agent.table.touch([0, 1])
+
+    policy = Policy.from_agent(agent)
+    rng = np.random.default_rng(0)
+
+    actions = policy.sample(np.repeat(agent.table.keys[:2], 20000), rng)
+
+    assert abs(actions[:20000].mean() - 0.75) < 0.01
+    assert not actions[20000:].any()
@@ -0,0 +1,52 @@
+import pytest
+import sys
+import os
+import random
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from cfr.policy_file import PolicyFile
+from leduc.CFR import CFR_agent
+
+def test_policy_file_matches_final_strategy(tmp_path):
+
+    path = tmp_path / "leduc.policy"
+
+    agent = CFR_agent(1, False, False)
+    for i in range(100):
+        agent.iteration()
+
+    agent.export_policy(path)
+    policy = PolicyFile(path)
+
+    assert isinstance(policy.strategy, np.memmap)
+    assert len(policy) == len(agent.table)
+
+    for infostate in agent.infostate_map:
+
+        final_strategy = agent.infostate_map[infostate].final_strategy
+
+        assert policy.actions(infostate) == list(final_strategy)
+        assert np.allclose(policy.probabilities(infostate), list(final_strategy.values()))
+
+    assert -1 not in policy
+    with pytest.raises(KeyError):
+        policy.probabilities(10 ** 9)
+
+def test_sample_action_follows_probabilities(tmp_path):
+
+    path = tmp_path / "leduc.policy"
+
+    agent = CFR_agent(1, False, False)
+    row = int(np.flatnonzero(agent.table.num_actions == 3)[0])
+    infostate = agent.table.keys[row]
+    agent.table.strategy_sum[row] = [0, 1, 3]
+    agent.table.touch(row)
+    agent.export_policy(path)
+
+    policy = PolicyFile(path)
+    rng = random.Random(0)
+    samples = [policy.sample_action(infostate, rng) for i in range(4000)]
+
+    assert policy.actions(infostate)[0] not in samples
+    assert abs(samples.count(policy.actions(infostate)[2]) / 4000 - 0.75) < 0.03
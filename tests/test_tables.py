@@ -0,0 +1,61 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from cfr.tables import InfostateTable, InfostateMap
+from leduc.nodes import Node
+
+def test_regret_matching():
+
+    table = InfostateTable(['a', 'b', 'c'], [['p', 'r'], ['f', 'c', 'r'], ['f', 'c']])
+
+    table.regret_sum[0] = [1, 3, 0]
+    table.regret_sum[1] = [-1, -2, -3]
+    table.regret_sum[2] = [2, -1, 5] # the padded column must be ignored
+
+    strategy = table.regret_matching()
+
+    assert np.allclose(strategy[0], [0.25, 0.75, 0])
+    assert np.allclose(strategy[1], [1/3, 1/3, 1/3])
+    assert np.allclose(strategy[2], [1, 0, 0])
+
+def test_average_strategy_and_dtype():
+
+    table = InfostateTable(['a', 'b'], [['p', 'r'], ['p', 'r']], dtype=np.float32)
+
+    table.strategy_sum[0] = [3, 1]
+    table.calculate_final_strategy()
+
+    assert table.final_strategy.dtype == np.float32
+    assert np.allclose(table.final_strategy, [[0.75, 0.25], [0.5, 0.5]])
+
+def test_infostate_map_view():
+
+    table = InfostateTable(['0pp', '1p'], [['p', 'r'], ['f', 'c', 'r']])
+    infostate_map = InfostateMap(table, Node)
+
+    table.strategy_sum[1] = [0, 1, 1]
+    table.calculate_final_strategy()
+
+    assert '1p' in infostate_map
+    assert len(infostate_map) == 2
+    assert infostate_map['1p'].final_strategy == {'f': 0.0, 'c': 0.5, 'r': 0.5}
+
+def test_final_strategy_is_lazy():
+
+    table = InfostateTable(['a', 'b'], [['p', 'r'], ['p', 'r']])
+
+    table.strategy_sum[0] = [3, 1]
+    table.strategy_sum[1] = [1, 1]
+    table.touch([0])
+
+    # only the touched row is renormalized
+    assert np.allclose(table.final_strategy, [[0.75, 0.25], [0.5, 0.5]])
+
+    table.strategy_sum[1] = [0, 2]
+    assert np.allclose(table.final_strategy[1], [0.5, 0.5])
+
+    table.touch(1)
+    assert np.allclose(table.final_strategy[1], [0, 1])
@@ -0,0 +1,95 @@
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from cfr.variants import VanillaCFR, CFRPlus, DiscountedCFR, LinearCFR
+from kuhn.CFR import CFR_agent as KuhnAgent
+from leduc.vector_CFR import VectorCFR_agent
+
+def test_cfr_plus_regrets_stay_non_negative():
+
+    for agent in [KuhnAgent(1, False, False, variant=CFRPlus()), VectorCFR_agent(1, False, False, variant=CFRPlus())]:
+
+        for i in range(50):
+            agent.iteration()
+
+        assert (agent.table.regret_sum >= 0).all()
+        assert agent.iteration_count == 50
+
+def test_cfr_plus_keeps_infostate_map_outputs():
+
+    agent = VectorCFR_agent(1, False, False, variant=CFRPlus())
+
+    for i in range(20):
+        agent.iteration()
+
+    agent.calculate_final_strategy()
+
+    for infostate in agent.infostate_map:
+
+        final_strategy = agent.infostate_map[infostate].final_strategy
+
+        assert set(final_strategy) == set(agent.infostate_map[infostate].actions)
+        assert sum(final_strategy.values()) == pytest.approx(1)
+
+def test_alternating_updates_only_touch_the_traversing_player():
+
+    agent = VectorCFR_agent(1, False, False, variant=CFRPlus())
+
+    # Only player 1's traversal, player 2's rows must be untouched
+    agent.variant.update_players = (0,)
+    agent.iteration()
+
+    assert (agent.table.regret_sum[agent.player_rows[1]] == 0).all()
+    assert (agent.table.strategy_sum[agent.player_rows[1]] == 0).all()
+    assert (agent.table.strategy_sum[agent.player_rows[0]] != 0).any()
+
+def test_vanilla_cfr_can_alternate():
+
+    assert VanillaCFR().update_players == (None,)
+    assert VanillaCFR(alternating=True).update_players == (0, 1)
+
+    simultaneous = KuhnAgent(1, False, False, variant=VanillaCFR())
+    alternating = KuhnAgent(1, False, False, variant=VanillaCFR(alternating=True))
+
+    for agent in [simultaneous, alternating]:
+
+        agent.rng.seed(0)
+
+        for i in range(50):
+            agent.iteration()
+
+    # Player 2's traversal already sees player 1's updated strategy
+    assert not np.allclose(alternating.table.regret_sum, simultaneous.table.regret_sum)
+
+def test_discounted_cfr_discounts():
+
+    agent = VectorCFR_agent(1, False, False)
+    table = agent.table
+
+    table.regret_sum[:, 0] = 4
+    table.regret_sum[:, 1] = -4
+    table.strategy_sum[:] = 1
+
+    DiscountedCFR(alpha=1.5, beta=0, gamma=2).update(table, 1, agent.player_rows[None])
+
+    assert np.allclose(table.regret_sum[:, 0], 2)
+    assert np.allclose(table.regret_sum[:, 1], -2)
+    assert np.allclose(table.strategy_sum, 0.25)
+
+def test_linear_cfr_preset():
+
+    variant = LinearCFR()
+
+    assert (variant.alpha, variant.beta, variant.gamma) == (1, 1, 1)
+
+    agent = KuhnAgent(1, False, False, variant=variant)
+
+    for i in range(100):
+        agent.iteration()
+
+    agent.calculate_final_strategy()
+
+    assert np.allclose(agent.table.final_strategy.sum(axis=1), 1)